@@ -1,4 +1,64 @@
+import logging
+from argparse import ArgumentParser
+
+from src.systems import STARTUP
+from src.const.settings import AI, AUDIO, INPUT, NET, RENDERER
 from src.game import CrazyPong
+from src.net.session import LossyLink, NetHost, NetClient
 
 if __name__ == '__main__':
-    CrazyPong().run()
\ No newline at end of file
+    parser = ArgumentParser()
+    parser.add_argument('--startup-times', action='store_true', help="print the time of each startup phase")
+    parser.add_argument('--profile-csv', metavar='FILE', help="write the frame profiler buffer to FILE on quit")
+    parser.add_argument('--record', metavar='FILE', help="write the replay of each game to its own FILE-N (replay-1.bin, replay-2.bin, ... for replay.bin) when it is left")
+    parser.add_argument('--replay', metavar='FILE', help="play a replay file")
+    parser.add_argument('--replay-speed', type=int, default=1, metavar='N', help="fast-forward the replay N times")
+    parser.add_argument('--difficulty', choices=list(AI['levels']), default=AI['difficulty'], help="AI level")
+    parser.add_argument('--host', type=int, nargs='?', const=NET['port'], metavar='PORT', help="host a network game")
+    parser.add_argument('--join', metavar='ADDRESS[:PORT]', help="join a network game")
+    parser.add_argument('--latency', type=float, default=0, metavar='MS', help="delay the sent packets, one way")
+    parser.add_argument('--jitter', type=float, default=0, metavar='MS', help="random delay added to --latency")
+    parser.add_argument('--loss', type=float, default=0, metavar='RATIO', help="drop this ratio of the sent packets")
+    parser.add_argument('--backend', choices=('surface', 'texture'), default=RENDERER['backend'],
+                        help="texture: SDL renderer scaling the frame to the window, GPU if any")
+    parser.add_argument('--window-size', metavar='WxH', help="window size of the texture backend")
+    parser.add_argument('--fullscreen', action='store_true', help="fullscreen with the texture backend")
+    parser.add_argument('--blit-audit', action='store_true', help="log the blits converting their source pixels")
+    parser.add_argument('--input-latency', action='store_true',
+                        help="show the input to flip latency percentiles in the F3 overlay, logged on quit")
+    parser.add_argument('--no-audio', action='store_true', help="play without any sound")
+    parser.add_argument('--audio-buffer', type=int, default=AUDIO['buffer'], metavar='N',
+                        help="samples per audio device buffer, lower for less latency")
+    args = parser.parse_args()
+
+    window_size = RENDERER['window_size']
+    if args.window_size:
+        width, _, height = args.window_size.partition('x')
+        window_size = (int(width), int(height))
+
+    net = None
+    link = LossyLink(args.latency / 1000, args.jitter / 1000, args.loss)
+    if args.host is not None:
+        net = NetHost(args.host, link)
+    elif args.join:
+        address, _, port = args.join.partition(':')
+        net = NetClient((address, int(port) if port else NET['port']), link)
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s: %(message)s')
+    STARTUP.mark('import')
+    CrazyPong(
+        show_startup_times=args.startup_times,
+        profile_csv=args.profile_csv,
+        record=args.record,
+        replay=args.replay,
+        replay_speed=args.replay_speed,
+        net=net,
+        difficulty=args.difficulty,
+        backend=args.backend,
+        window_size=window_size,
+        fullscreen=args.fullscreen or RENDERER['fullscreen'],
+        audio=not args.no_audio and AUDIO['enabled'],
+        audio_buffer=args.audio_buffer,
+        blit_audit=args.blit_audit or RENDERER['blit_audit'],
+        input_latency=args.input_latency or INPUT['measure']
+    ).run()
\ No newline at end of file
@@ -0,0 +1,128 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from os import path
+from typing import Dict, Iterable, Tuple
+
+from pygame import Surface
+from pygame.font import Font
+from pygame.mixer import Sound
+
+from src.const.settings import ASSETS, FONT, SOUNDS
+from src.asset_pack import BufferReader
+from src.systems import init_audio
+from src.utils import ASSET_PACK, ASSETS_DIR, load_font, load_sound, load_img
+
+
+def read_file(file_path: str) -> bytes:
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+
+def packed(data: memoryview) -> Future:
+    """Already read: a slice of the asset pack."""
+    future = Future()
+    future.set_result(data)
+    return future
+
+
+class LazySound:
+    """Start the audio device and decode the sound on its first play."""
+    def __init__(self, data: Future, file: str, vol: float) -> None:
+        self.data = data
+        self.file = file
+        self.vol = vol
+        self.sound = None
+
+    def get(self) -> Sound:
+        if self.sound is None:
+            init_audio()
+            self.sound = load_sound(self.file, self.vol, source=BufferReader(self.data.result()))
+        return self.sound
+
+    def play(self, *args, **kwargs):
+        return self.get().play(*args, **kwargs)
+
+    def stop(self):
+        if self.sound is not None:
+            self.sound.stop()
+
+    def fadeout(self, time: int):
+        if self.sound is not None:
+            self.sound.fadeout(time)
+
+    def set_volume(self, vol: float):
+        self.vol = vol
+        if self.sound is not None:
+            self.sound.set_volume(vol)
+
+
+class AssetManager:
+    """
+    Read the assets in a thread pool, on top of load_font / load_sound / load_img.
+    With an asset pack, nothing is read: the loaders get views of the mapped pack.
+    Fonts and images are created on the main thread when first asked, images need the display
+    to be converted. Sounds are decoded at their first play, which starts the audio device.
+    """
+    def __init__(self, workers: int = ASSETS['workers']) -> None:
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='assets')
+
+        self.files: Dict[str, Future] = {}
+        self.sounds: Dict[str, LazySound] = {}
+        self.fonts: Dict[Tuple[str, int], Font] = {}
+        self.images: Dict[Tuple[str, bool], Surface] = {}
+
+    def read(self, sub_dir: str, file: str) -> Future:
+        """Start reading an asset, once. The Future gives its data: bytes, or a memoryview of the pack."""
+        name = f"{sub_dir}/{file}"
+        if name not in self.files:
+            if ASSET_PACK is not None and name in ASSET_PACK:
+                self.files[name] = packed(ASSET_PACK.view(name))
+            else:
+                self.files[name] = self.pool.submit(read_file, path.join(ASSETS_DIR, sub_dir, file))
+        return self.files[name]
+
+    def prefetch_font(self) -> None:
+        """Every size use the same file."""
+        self.read('fonts', FONT['family'])
+
+    def prefetch_sound(self, name: str) -> None:
+        if name in self.sounds: return
+
+        data = SOUNDS[name]
+        self.sounds[name] = LazySound(self.read('sounds', data['file']), data['file'], data['vol'])
+
+    def prefetch_image(self, file: str) -> None:
+        self.read('graphics', file)
+
+    def prefetch(self, sounds: Iterable[str] = (), images: Iterable[str] = ()) -> None:
+        self.prefetch_font()
+        for file in images:
+            self.prefetch_image(file)
+        for name in sounds:
+            self.prefetch_sound(name)
+
+    def font(self, name: str) -> Font:
+        """Font of FONT['sizes'] by name, waits for the file if it is not read yet."""
+        size = FONT['sizes'][name]
+        key = (FONT['family'], size)
+
+        if key not in self.fonts:
+            data = self.read('fonts', FONT['family']).result()
+            # Every Font keeps its own file object.
+            self.fonts[key] = load_font(FONT['family'], size, source=BufferReader(data))
+        return self.fonts[key]
+
+    def sound(self, name: str) -> LazySound:
+        """Sound of SOUNDS by name."""
+        self.prefetch_sound(name)
+        return self.sounds[name]
+
+    def image(self, file: str, convert_a: bool = False) -> Surface:
+        key = (file, convert_a)
+
+        if key not in self.images:
+            data = self.read('graphics', file).result()
+            self.images[key] = load_img(file, convert_a=convert_a, source=BufferReader(data))
+        return self.images[key]
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,120 @@
+"""
+Every asset in one file, memory-mapped at runtime: the fonts, sounds and images are read from slices
+of the mapping, nothing is extracted to disk. Built by src/tools/pack.py.
+File: header, index (name length, offset, size, name per asset), then the assets data.
+Names are the paths under assets/ with '/' separators, like 'sounds/ball_hit.wav'.
+"""
+import mmap
+import struct
+from io import RawIOBase
+from os import path, walk
+from typing import Dict, Iterable, Optional, Tuple
+
+MAGIC = b'CPAK'
+VERSION = 1
+# Magic, version, assets count.
+HEADER = struct.Struct('<4sBI')
+# Name length, offset from the start of the file, size.
+ENTRY = struct.Struct('<HQQ')
+
+
+class BufferReader(RawIOBase):
+    """Read-only file object over a buffer, the data is copied by the reader only."""
+    def __init__(self, buffer: memoryview) -> None:
+        RawIOBase.__init__(self)
+        self.buffer = memoryview(buffer).cast('B')
+        self.position = int(0)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        size = min(len(target), len(self.buffer) - self.position)
+        if size <= 0:
+            return 0
+        target[:size] = self.buffer[self.position:self.position + size]
+        self.position += size
+        return size
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        base = (0, self.position, len(self.buffer))[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+
+class AssetPack:
+    """An asset pack mapped in memory, open for the whole process."""
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            # The mapping stays valid once the file is closed.
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self.map)
+
+        magic, version, count = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file_path} is not an asset pack of version {VERSION}")
+
+        self.index: Dict[str, Tuple[int, int]] = {}
+        offset = HEADER.size
+        for _ in range(count):
+            name_size, data_offset, size = ENTRY.unpack_from(self.data, offset)
+            offset += ENTRY.size
+            name = bytes(self.data[offset:offset + name_size]).decode()
+            offset += name_size
+            if data_offset + size > len(self.data):
+                raise ValueError(f"{file_path} is truncated at {name}")
+            self.index[name] = (data_offset, size)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def view(self, name: str) -> memoryview:
+        """The asset data, without copy."""
+        offset, size = self.index[name]
+        return self.data[offset:offset + size]
+
+    def open(self, name: str) -> BufferReader:
+        return BufferReader(self.view(name))
+
+    @classmethod
+    def find(cls, file_paths: Iterable[str]) -> Optional['AssetPack']:
+        """The first pack found, None to use the loose files."""
+        for file_path in file_paths:
+            if path.isfile(file_path):
+                return cls(file_path)
+        return None
+
+
+def build(assets_dir: str, sub_dirs: Iterable[str], file_path: str) -> Dict[str, int]:
+    """Pack the files of assets_dir/sub_dir, return the size of each asset by name."""
+    files = []
+    for sub_dir in sub_dirs:
+        for root, dirs, names in walk(path.join(assets_dir, sub_dir)):
+            dirs.sort()
+            for name in sorted(names):
+                full_path = path.join(root, name)
+                files.append((path.relpath(full_path, assets_dir).replace(path.sep, '/'), full_path))
+
+    names = [name.encode() for name, _ in files]
+    offset = HEADER.size + sum(ENTRY.size + len(name) for name in names)
+    sizes = {}
+    index = bytearray(HEADER.pack(MAGIC, VERSION, len(files)))
+    for (name, full_path), encoded in zip(files, names):
+        size = path.getsize(full_path)
+        index += ENTRY.pack(len(encoded), offset, size) + encoded
+        sizes[name] = size
+        offset += size
+
+    with open(file_path, 'wb') as pack:
+        pack.write(index)
+        for _, full_path in files:
+            with open(full_path, 'rb') as file:
+                pack.write(file.read())
+    return sizes
@@ -0,0 +1,117 @@
+from time import perf_counter
+from typing import Dict, List, Optional, Set, Union
+
+import pygame as pg
+
+from src.asset_manager import AssetManager, LazySound
+from src.const.settings import AUDIO, SOUNDS
+from src.systems import init_audio
+from src.utils import NoneSound
+
+
+class SoundEffect:
+    """A sound of SOUNDS played through the AudioManager, same play() as a Sound."""
+    def __init__(self, manager: 'AudioManager', name: str, sound: LazySound) -> None:
+        self.manager = manager
+        self.name = name
+        self.category = SOUNDS[name]['category']
+        self.sound = sound
+
+    def play(self) -> None:
+        self.manager.play(self)
+
+    def stop(self) -> None:
+        self.sound.stop()
+
+    def set_volume(self, vol: float) -> None:
+        self.sound.set_volume(vol)
+
+
+class AudioManager:
+    """
+    Every channel is reserved to a category of AUDIO['categories'], a sound takes a free channel of its
+    category or the least recently started one: the ball hits can not cut the score or button sounds.
+    A sound triggered again in the same frame is dropped.
+    Without audio, the effects are NoneSound and cost a no-op call.
+    """
+    CATEGORIES = AUDIO['categories']
+
+    def __init__(self, assets: AssetManager, enabled: bool = AUDIO['enabled'], buffer: int = AUDIO['buffer']) -> None:
+        self.assets = assets
+        self.enabled = enabled
+        self.buffer = buffer
+
+        self.channels: Optional[Dict[str, List[pg.mixer.Channel]]] = None
+        self.next_channel = {category: int(0) for category in self.CATEGORIES}
+        self.buffer_time = float(0)
+
+        self.played: Set[str] = set()
+        self.coalesced = int(0)
+        self.call_time = float(0)
+
+    def effect(self, name: str) -> Union[SoundEffect, NoneSound]:
+        if not self.enabled:
+            return NoneSound()
+        return SoundEffect(self, name, self.assets.sound(name))
+
+    def start(self) -> bool:
+        """Open the device and reserve the channels at the first play, False if there is no audio."""
+        if self.channels is not None:
+            return True
+        if not init_audio(self.buffer):
+            self.enabled = bool(False)
+            return False
+
+        total = sum(self.CATEGORIES.values())
+        pg.mixer.set_num_channels(total)
+        pg.mixer.set_reserved(total)
+
+        self.channels = {}
+        index = int(0)
+        for category, count in self.CATEGORIES.items():
+            self.channels[category] = [pg.mixer.Channel(index + offset) for offset in range(count)]
+            index += count
+
+        frequency = pg.mixer.get_init()[0]
+        self.buffer_time = self.buffer / frequency
+        return True
+
+    def channel(self, category: str) -> pg.mixer.Channel:
+        channels = self.channels[category]
+        for channel in channels:
+            if not channel.get_busy():
+                return channel
+
+        index = self.next_channel[category]
+        self.next_channel[category] = (index + 1) % len(channels)
+        return channels[index]
+
+    def play(self, effect: SoundEffect) -> None:
+        if effect.name in self.played:
+            self.coalesced += 1
+            return
+        self.played.add(effect.name)
+
+        start = perf_counter()
+        if not self.start():
+            return
+        self.channel(effect.category).play(effect.sound.get())
+        self.call_time = max(self.call_time, perf_counter() - start)
+
+    def begin_frame(self) -> None:
+        self.played.clear()
+        self.coalesced = 0
+        self.call_time = float(0)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Sounds played and coalesced in the frame. latency: the slowest play call of the frame, then the sound
+        waits for the buffer being mixed and plays after the one in the device, 2 buffers at most.
+        """
+        if not self.enabled:
+            return {}
+        return {
+            'sounds': len(self.played),
+            'coalesced': self.coalesced,
+            'audio latency ms': round((self.call_time + 2 * self.buffer_time) * 1000, 2),
+        }
@@ -1,8 +1,16 @@
-from typing import TypedDict, NewType, Tuple, Dict, List
+from typing import TypedDict, NewType, Tuple, Dict, List, Optional
 from pygame.font import Font
 
 UserEvent = NewType('UserEvent', int)
 CollisionValue = Tuple[bool, str, str]
+SimEvent = Tuple[str, Optional[str]]
+# Trajectory seen (dir_x, dir_y, active), predicted y, error offset, reaction delay left, target y.
+AIState = Tuple[Optional[Tuple[float, float, bool]], float, float, float, float]
+# Ball (x, y, dir_x, dir_y, velocity, active), paddles (y, score), winner index, counter, counter_time, RNG state, AI.
+MatchState = Tuple[
+    Tuple[float, float, float, float, float, bool], Tuple[Tuple[float, int], ...],
+    int, int, Optional[float], tuple, Optional[AIState]
+]
 ColorValue = NewType('ColorValue', Tuple[int, int, int, int])
 DataDict = Dict[str, List]
 FontsDict = Dict[str, Font]
@@ -19,6 +27,7 @@ class HUDData(TypedDict):
 class SoundData(TypedDict):
     file: str
     vol: float
+    category: str
 
 
 class SoundDataDict(TypedDict):
@@ -56,4 +65,121 @@ class CRSData(TypedDict):
     line_gap: int
     line_color: ColorValue
     min_alpha: int
-    max_alpha: int
\ No newline at end of file
+    max_alpha: int
+    mode: str
+    variants: int
+
+
+class PhysicsData(TypedDict):
+    step: float
+    max_steps: int
+
+
+class RendererData(TypedDict):
+    dirty_rects: bool
+    backend: str
+    window_size: Tuple[int, int]
+    fullscreen: bool
+    scale_quality: str
+    blit_audit: bool
+
+
+class TextCacheData(TypedDict):
+    max_entries: int
+    max_bytes: int
+
+
+class AssetsData(TypedDict):
+    workers: int
+    menu_sounds: List[str]
+    level_sounds: List[str]
+    pack: str
+
+
+class AudioData(TypedDict):
+    frequency: int
+    size: int
+    channels: int
+    buffer: int
+    enabled: bool
+    categories: Dict[str, int]
+
+
+class ProfilerData(TypedDict):
+    frames: int
+    overlay_refresh: float
+    overlay_pos: Tuple[int, int]
+
+
+class ReplayData(TypedDict):
+    keyframe_interval: int
+    compress_level: int
+
+
+class NetData(TypedDict):
+    port: int
+    input_history: int
+    max_backlog: int
+    max_pending: int
+    hello_interval: float
+    correction_threshold: float
+    stats_interval: float
+
+
+class RewindData(TypedDict):
+    steps: int
+
+
+class AILevel(TypedDict):
+    error: float
+    reaction: float
+
+
+class AIData(TypedDict):
+    difficulty: str
+    replan_distance: float
+    levels: Dict[str, AILevel]
+
+
+class MultiBallData(TypedDict):
+    balls: int
+    radius: int
+    velocity: int
+    max_angle: float
+    min_dir_x: float
+    max_score: int
+    start_pos_offset: int
+    start_spread_x: int
+    cell_size: int
+
+
+class EnvData(TypedDict):
+    frame_skip: int
+    max_steps: int
+    difficulty: str
+
+
+class PacingData(TypedDict):
+    play_fps: int
+    idle_fps: int
+    suspended_fps: int
+    idle_delay: float
+    spin: float
+    poll: float
+
+
+class BindingData(TypedDict):
+    up: str
+    down: str
+    joystick: Optional[int]
+    axis: Optional[int]
+    hat: Optional[int]
+    button_up: Optional[int]
+    button_down: Optional[int]
+
+
+class InputData(TypedDict):
+    bindings: Dict[str, BindingData]
+    deadzone: float
+    measure: bool
+    samples: int
@@ -1,10 +1,9 @@
-from .custom_typing import ColorValue, UserEvent, DataDict, FontData, SoundDataDict, ButtonSettings, HUDData, CRSData
+from .custom_typing import ColorValue, UserEvent, DataDict, FontData, SoundDataDict, ButtonSettings, HUDData, CRSData, PhysicsData, RendererData, TextCacheData, AssetsData, AudioData, ProfilerData, ReplayData, NetData, RewindData, AIData, MultiBallData, EnvData, PacingData, InputData
 
 from pygame import Rect
 from pygame.locals import USEREVENT
 
 BTN_CLICKED = UserEvent(USEREVENT + 1)
-BALL_OUT_SCREEN = UserEvent(USEREVENT + 2)
 
 FPS = int(120)
 GAME_NAME = 'Crazy Pong'
@@ -26,28 +25,59 @@ FONT: FontData = {
         'hud': 40,
         'score': 55,
         'title': 100,
+        'profiler': 18,
     }
 }
 
+AUDIO: AudioData = {
+    'frequency': 44100,
+    'size': -16,
+    'channels': 2,
+    'buffer': 512, # Samples per device buffer, a sound waits up to 2 of them: 23 ms at 44100 Hz.
+    'enabled': True,
+    'categories': {
+        # Channels reserved to each category of SOUNDS.
+        'sfx': 4,
+        'hud': 2,
+        'ui': 2,
+    },
+}
+
 SOUNDS: SoundDataDict = {
     'ball': {
         'file': "ball_hit.wav",
-        'vol': 0.06
+        'vol': 0.06,
+        'category': "sfx"
     },
     'score': {
         'file': "add_score.wav",
-        'vol': 0.07
+        'vol': 0.07,
+        'category': "hud"
     },
     'win': {
         'file': "game_win.wav",
-        'vol': 0.1
+        'vol': 0.1,
+        'category': "hud"
     },
     'button': {
         'file': "btn_click.wav",
-        'vol': 0.05
+        'vol': 0.05,
+        'category': "ui"
     }
 }
 
+PHYSICS: PhysicsData = {
+    'step': 1 / FPS,
+    'max_steps': 8, # Drop the remaining time after a stall rather than spiral.
+}
+
+ASSETS: AssetsData = {
+    'workers': 4,
+    'menu_sounds': ['button'], # Loaded before the first frame.
+    'level_sounds': ['ball', 'score', 'win'], # Loaded in background, waited for at the first game.
+    'pack': "assets.pak", # Built by src/tools/pack.py, read by the built games.
+}
+
 BALL = {
     'radius': 14,
     'boost': 5,
@@ -57,6 +87,18 @@ BALL = {
     'start_pos_offset': 100,
 }
 
+MULTIBALL: MultiBallData = {
+    'balls': 500,
+    'radius': 7,
+    'velocity': 350,
+    'max_angle': 45, # Degrees from the horizontal at spawn.
+    'min_dir_x': 0.3, # After a bounce between balls, no ball stays going up and down.
+    'max_score': 500,
+    'start_pos_offset': 40,
+    'start_spread_x': 250,
+    'cell_size': 16, # Balls diameter or more, a ball touches only the balls of its 3x3 cells.
+}
+
 PADDLE = {
     'velocity': 500,
     'width': 24,
@@ -66,6 +108,19 @@ PADDLE = {
     'max_score': 5,
 }
 
+AI: AIData = {
+    'difficulty': "normal",
+    'replan_distance': 16, # A new prediction further than this is a new trajectory, closer it is a wall bounce.
+    'levels': {
+        # error: max pixels added to the predicted y. reaction: seconds before following a new trajectory.
+        # The paddle reaches 94 pixels around its center: past it the AI misses.
+        'easy': {'error': 140, 'reaction': 0.35},
+        'normal': {'error': 100, 'reaction': 0.2},
+        'hard': {'error': 70, 'reaction': 0.1},
+        'perfect': {'error': 0, 'reaction': 0},
+    },
+}
+
 BUTTON_ANIMATE: ButtonSettings = {
     'text_offset': 1,
     'width_gap': 50,
@@ -104,6 +159,90 @@ CRS_EFFECT: CRSData = {
     'line_color': ColorValue((20, 20, 20, 255)),
     'min_alpha': 50,
     'max_alpha': 75,
+    'mode': "baked", # 'full' | 'baked' | 'scanline', see: python -m src.ui.screen_effect
+    'variants': 6, # Pre-baked flicker frames in 'baked' mode, a full screen surface each.
+}
+
+TEXT_CACHE: TextCacheData = {
+    'max_entries': 256,
+    'max_bytes': 8 * 1024 * 1024,
+}
+
+PROFILER: ProfilerData = {
+    'frames': 1200, # Ring buffer size, 10 seconds at FPS.
+    'overlay_refresh': 0.5,
+    'overlay_pos': (10, 10),
+}
+
+REPLAY: ReplayData = {
+    'keyframe_interval': 600, # Steps between two seek keyframes, 5 seconds at FPS.
+    'compress_level': 9,
+}
+
+REWIND: RewindData = {
+    'steps': 10 * FPS, # Ring buffer size, 10 seconds of physics steps, 69 bytes each.
+}
+
+NET: NetData = {
+    'port': 5000,
+    'input_history': 8, # Inputs repeated in each input packet, 16 bits.
+    'max_backlog': 4, # Client inputs buffered by the host before it skips the oldest.
+    'max_pending': 240, # Client inputs not applied by the host yet, kept to step again.
+    'hello_interval': 0.5,
+    'correction_threshold': 0.5, # Pixels between the prediction and the host state counted as a correction.
+    'stats_interval': 5.0,
+}
+
+ENV: EnvData = {
+    'frame_skip': 4, # Physics steps per agent step, the action is repeated.
+    'max_steps': 10000, # Agent steps before an episode is truncated.
+    'difficulty': "normal", # AI level of the opponent.
+}
+
+PACING: PacingData = {
+    'play_fps': FPS,
+    'idle_fps': 20, # Menu and win screen without input.
+    'suspended_fps': 5, # Window minimized or not focused, only the events are read.
+    'idle_delay': 2.0, # Seconds without input before the idle rate.
+    'spin': 0.002, # Seconds of busy wait before a play frame deadline, sleep() is not that precise.
+    'poll': 0.001, # Input latency measure: seconds between two input polls while waiting.
+}
+
+INPUT: InputData = {
+    'bindings': {
+        # Keys: names of pygame.key.key_code. joystick: index in connection order, None for none.
+        # axis, hat, button_up, button_down: controls of that joystick, None for none.
+        'left': {
+            'up': "r",
+            'down': "f",
+            'joystick': 0,
+            'axis': 1,
+            'hat': 0,
+            'button_up': None,
+            'button_down': None,
+        },
+        'right': {
+            'up': "up",
+            'down': "down",
+            'joystick': 1,
+            'axis': 1,
+            'hat': 0,
+            'button_up': None,
+            'button_down': None,
+        },
+    },
+    'deadzone': 0.5, # Axis position moving the paddle, out of 1.
+    'measure': False, # Input to flip latency percentiles in the F3 overlay, logged on quit.
+    'samples': 1000, # Latencies kept for the percentiles.
+}
+
+RENDERER: RendererData = {
+    'dirty_rects': False, # Push only the changed regions, the CRS effect stop flickering.
+    'backend': "surface", # 'surface': display.set_mode at SCREEN_RECT size. 'texture': SDL renderer, any window size.
+    'window_size': SCREEN_RECT.size, # Texture backend only, the frame is scaled to it.
+    'fullscreen': False, # Texture backend only, desktop resolution.
+    'scale_quality': "linear", # Texture backend scaling: 'nearest' or 'linear'.
+    'blit_audit': False, # Debug: log the blits converting their source pixels, by call site.
 }
 
 STARTING_MENU: DataDict = {
@@ -133,8 +272,12 @@ STARTING_MENU: DataDict = {
             (SCREEN_RECT.centerx + 175, SCREEN_RECT.centery)
         ],
         [
-            {'text': "QUIT", 'action': "quit"},
+            {'text': "CRAZY", 'action': "play", 'target_level': "crazy"},
             (SCREEN_RECT.centerx, SCREEN_RECT.centery + 100)
+        ],
+        [
+            {'text': "QUIT", 'action': "quit"},
+            (SCREEN_RECT.centerx, SCREEN_RECT.centery + 200)
         ]
     ]
 }
\ No newline at end of file
@@ -0,0 +1,192 @@
+from collections import deque
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+import pygame as pg
+from pygame.locals import (KEYDOWN, KEYUP, JOYAXISMOTION, JOYHATMOTION, JOYBUTTONDOWN, JOYBUTTONUP,
+                           JOYDEVICEADDED, JOYDEVICEREMOVED)
+
+from src.const.custom_typing import BindingData
+from src.const.settings import INPUT
+from src.core.simulation import INPUT_UP, INPUT_DOWN
+from src.events import EventDispatcher
+from src.profiler import percentile
+from src.systems import init_joysticks
+
+INPUT_EVENTS = (KEYDOWN, KEYUP, JOYAXISMOTION, JOYHATMOTION, JOYBUTTONDOWN, JOYBUTTONUP, JOYDEVICEADDED, JOYDEVICEREMOVED)
+
+
+class Binding:
+    """Keys and joystick controls moving a paddle."""
+    def __init__(self, data: BindingData) -> None:
+        self.key_up = pg.key.key_code(data['up'])
+        self.key_down = pg.key.key_code(data['down'])
+        self.joystick = data['joystick']
+        self.axis = data['axis']
+        self.hat = data['hat']
+        self.button_up = data['button_up']
+        self.button_down = data['button_down']
+
+
+class InputManager:
+    """
+    The input bits of each paddle side, kept up to date by the input events: nothing is sampled at the
+    physics step, poll() reads the events queued since the start of the frame just before it.
+    Measure mode: every input change is timed from its event to the flip of the first frame which
+    stepped the physics with it, the percentiles are shown by the profiler overlay.
+    The event time is when the game reads it, or event.time (perf_counter) for synthetic events.
+    """
+    DEADZONE = INPUT['deadzone']
+    SAMPLES = INPUT['samples']
+
+    def __init__(self, dispatcher: EventDispatcher, measure: bool = INPUT['measure']) -> None:
+        init_joysticks()
+        self.dispatcher = dispatcher
+        self.measure = measure
+        self.bindings = {side: Binding(data) for side, data in INPUT['bindings'].items()}
+
+        # Input bits of each source by side.
+        self.keys = {side: int(0) for side in self.bindings}
+        self.axes = {side: int(0) for side in self.bindings}
+        self.hats = {side: int(0) for side in self.bindings}
+        self.buttons = {side: int(0) for side in self.bindings}
+
+        self.joysticks: Dict[int, pg.joystick.JoystickType] = {}
+        # Joystick instance ids in connection order, a new joystick takes the slot of a removed one.
+        self.slots: List[Optional[int]] = []
+
+        self.pending: List[float] = [] # Times of the input changes not stepped yet.
+        self.stepped: List[float] = [] # Times of the input changes stepped in this frame.
+        self.latencies = deque(maxlen=self.SAMPLES)
+
+        handlers: Dict[int, Callable[[pg.event.Event], None]] = {
+            KEYDOWN: self.on_key,
+            KEYUP: self.on_key,
+            JOYAXISMOTION: self.on_axis,
+            JOYHATMOTION: self.on_hat,
+            JOYBUTTONDOWN: self.on_button,
+            JOYBUTTONUP: self.on_button,
+            JOYDEVICEADDED: self.on_device_added,
+            JOYDEVICEREMOVED: self.on_device_removed,
+        }
+        for event_type, handler in handlers.items():
+            dispatcher.subscribe(event_type, handler)
+
+    def command(self, side: str) -> int:
+        return self.keys[side] | self.axes[side] | self.hats[side] | self.buttons[side]
+
+    def set_bits(self, source: Dict[str, int], side: str, bits: int, event: pg.event.Event) -> None:
+        if source[side] == bits: return
+
+        previous = self.command(side)
+        source[side] = bits
+        if self.measure and self.command(side) != previous:
+            self.pending.append(getattr(event, 'time', None) or perf_counter())
+
+    def joystick_sides(self, instance_id: int) -> List[str]:
+        if instance_id not in self.slots:
+            return []
+        slot = self.slots.index(instance_id)
+        return [side for side, binding in self.bindings.items() if binding.joystick == slot]
+
+    def on_key(self, e: pg.event.Event) -> None:
+        for side, binding in self.bindings.items():
+            if e.key == binding.key_up:
+                bit = INPUT_UP
+            elif e.key == binding.key_down:
+                bit = INPUT_DOWN
+            else:
+                continue
+
+            bits = self.keys[side] | bit if e.type == KEYDOWN else self.keys[side] & ~bit
+            self.set_bits(self.keys, side, bits, e)
+
+    def on_axis(self, e: pg.event.Event) -> None:
+        for side in self.joystick_sides(e.instance_id):
+            if e.axis != self.bindings[side].axis:
+                continue
+
+            bits = INPUT_UP if e.value < -self.DEADZONE else INPUT_DOWN if e.value > self.DEADZONE else 0
+            self.set_bits(self.axes, side, bits, e)
+
+    def on_hat(self, e: pg.event.Event) -> None:
+        for side in self.joystick_sides(e.instance_id):
+            if e.hat != self.bindings[side].hat:
+                continue
+
+            # y is 1 up, -1 down.
+            bits = INPUT_UP if e.value[1] > 0 else INPUT_DOWN if e.value[1] < 0 else 0
+            self.set_bits(self.hats, side, bits, e)
+
+    def on_button(self, e: pg.event.Event) -> None:
+        for side in self.joystick_sides(e.instance_id):
+            binding = self.bindings[side]
+            if e.button == binding.button_up:
+                bit = INPUT_UP
+            elif e.button == binding.button_down:
+                bit = INPUT_DOWN
+            else:
+                continue
+
+            bits = self.buttons[side] | bit if e.type == JOYBUTTONDOWN else self.buttons[side] & ~bit
+            self.set_bits(self.buttons, side, bits, e)
+
+    def on_device_added(self, e: pg.event.Event) -> None:
+        joystick = pg.joystick.Joystick(e.device_index)
+        instance_id = joystick.get_instance_id()
+        self.joysticks[instance_id] = joystick
+        if instance_id in self.slots:
+            return
+
+        if None in self.slots:
+            self.slots[self.slots.index(None)] = instance_id
+        else:
+            self.slots.append(instance_id)
+
+    def on_device_removed(self, e: pg.event.Event) -> None:
+        for side in self.joystick_sides(e.instance_id):
+            for source in (self.axes, self.hats, self.buttons):
+                self.set_bits(source, side, 0, e)
+
+        self.joysticks.pop(e.instance_id, None)
+        if e.instance_id in self.slots:
+            self.slots[self.slots.index(e.instance_id)] = None
+
+    def poll(self) -> None:
+        """Handle the input events queued since the last read, the other events wait for the next frame."""
+        self.dispatcher.dispatch(pg.event.get(INPUT_EVENTS))
+
+    def latch(self) -> None:
+        """The physics steps now with the current inputs."""
+        self.stepped.extend(self.pending)
+        self.pending.clear()
+
+    def clear_pending(self) -> None:
+        """Inputs which will not move a paddle, like in the menu."""
+        self.pending.clear()
+
+    def presented(self) -> None:
+        """The frame stepped with the latched inputs has been flipped."""
+        if not self.stepped: return
+
+        now = perf_counter()
+        self.latencies.extend(now - time for time in self.stepped)
+        self.stepped.clear()
+
+    def percentiles(self) -> Dict[str, float]:
+        """Latencies in ms."""
+        values = sorted(self.latencies)
+        latencies = {f"p{int(ratio * 100)}": percentile(values, ratio) * 1000 for ratio in (0.5, 0.9, 0.99)}
+        latencies['max'] = values[-1] * 1000 if values else float(0)
+        return latencies
+
+    def stats(self) -> Dict[str, float]:
+        if not self.measure:
+            return {}
+        latencies = self.percentiles()
+        return {'input p50 ms': round(latencies['p50'], 2), 'input p99 ms': round(latencies['p99'], 2)}
+
+    def report(self) -> Optional[str]:
+        if not self.latencies:
+            return None
+        return f"{len(self.latencies)} inputs, " + ', '.join(f"{name} {value:.2f}" for name, value in self.percentiles().items()) + " ms"
@@ -0,0 +1,365 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.const.settings import AI, SCREEN_RECT
+from src.core.simulation import Match, SimAI, SimBall, SimPaddle, INPUT_UP, INPUT_DOWN
+
+# (hits, scorer, won) for each match: ball hit count, index of the paddle which scored (-1 if none), match won.
+BatchEvents = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class BatchMatch:
+    """
+    N matches stored as struct of arrays and stepped at once with NumPy.
+    Same rules as Match: walls, paddle sides and corners, speed_up boosts, countdown and scores.
+    Paddle index 0 is the left paddle, 1 the right paddle.
+    """
+    RADIUS = SimBall.RADIUS
+    RADIUS_SQ = SimBall.RADIUS_SQ
+    DEFAULT_VELOCITY = SimBall.DEFAULT_VELOCITY
+    MAX_VELOCITY = SimBall.MAX_VELOCITY
+    BOOST = SimBall.BOOST
+    BALL_MIN_X = SimBall.MIN_X
+    BALL_MAX_X = SimBall.MAX_X
+    BALL_MIN_Y = SimBall.MIN_Y
+    BALL_MAX_Y = SimBall.MAX_Y
+    START_OFFSET = SimBall.START_OFFSET
+    START_OFFSET_MAX = SimBall.START_OFFSET_MAX
+
+    H_WIDTH = SimPaddle.H_WIDTH
+    H_HEIGHT = SimPaddle.H_HEIGHT
+    PADDLE_VELOCITY = SimPaddle.VELOCITY
+    PADDLE_MIN_Y = SimPaddle.MIN_Y
+    PADDLE_MAX_Y = SimPaddle.MAX_Y
+    PADDLE_X = np.array([SimPaddle('left', 'player').x, SimPaddle('right', 'player').x])
+    MAX_SCORE = SimPaddle.MAX_SCORE
+
+    COUNTER_END = Match.COUNTER_STEP * Match.COUNTER_START
+    CENTER_X = SCREEN_RECT.centerx
+
+    AI_LINE_X = PADDLE_X[1] - H_WIDTH - RADIUS
+    AI_CENTER_Y = SimAI.CENTER_Y
+    AI_MIN_Y = SimAI.BALL_MIN_Y
+    AI_MAX_Y = SimAI.BALL_MAX_Y
+    AI_REPLAN_DISTANCE = SimAI.REPLAN_DISTANCE
+
+    def __init__(self, size: int, level_type: str = 'oneplayer', seed: Optional[int] = None,
+                 difficulty: str = AI['difficulty']) -> None:
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.index = np.arange(size)
+        # Same as SimAI, on the right paddle.
+        self.ai = level_type == 'oneplayer'
+        self.ai_error = SimAI.LEVELS[difficulty]['error']
+        self.ai_reaction = SimAI.LEVELS[difficulty]['reaction']
+
+        self.ball_x = np.empty(size)
+        self.ball_y = np.empty(size)
+        self.dir_x = np.empty(size)
+        self.dir_y = np.empty(size)
+        self.velocity = np.empty(size)
+        self.active = np.zeros(size, dtype=bool)
+
+        self.paddle_y = np.empty((size, 2))
+        self.scores = np.zeros((size, 2), dtype=np.int32)
+        self.winned = np.zeros(size, dtype=bool)
+
+        self.counting = np.zeros(size, dtype=bool)
+        self.counter_time = np.zeros(size)
+
+        self.ai_dir_x = np.full(size, np.nan)
+        self.ai_dir_y = np.full(size, np.nan)
+        self.ai_active = np.zeros(size, dtype=bool)
+        self.ai_predicted_y = np.full(size, self.AI_CENTER_Y)
+        self.ai_offset = np.zeros(size)
+        self.ai_delay = np.zeros(size)
+        self.ai_target_y = np.full(size, self.AI_CENTER_Y)
+
+        self.reset()
+
+    def random_direction(self, count: int) -> np.ndarray:
+        """Return -1 or 1 for each element"""
+        return self.rng.choice((-1.0, 1.0), count)
+
+    def reset_ball(self, mask: np.ndarray, full: np.ndarray) -> None:
+        """Same as SimBall.reset for every match in mask, full is a bool array too."""
+        count = int(np.count_nonzero(mask))
+        if not count: return
+
+        self.velocity[mask] = self.DEFAULT_VELOCITY
+        self.ball_x[mask] = self.CENTER_X
+        self.ball_y[mask] = self.rng.integers(self.START_OFFSET, self.START_OFFSET_MAX + 1, count)
+        self.active[mask] = False
+
+        self.dir_x[mask] = np.where(full[mask], self.random_direction(count), -self.dir_x[mask])
+        self.dir_y[mask] = self.random_direction(count)
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        """Restart the matches in mask (all by default), the countdown starts right away."""
+        if mask is None:
+            mask = np.ones(self.size, dtype=bool)
+
+        self.paddle_y[mask] = SCREEN_RECT.centery
+        self.scores[mask] = 0
+        self.winned[mask] = False
+        self.counting[mask] = True
+        self.counter_time[mask] = 0.0
+        self.reset_ball(mask, np.ones(self.size, dtype=bool))
+
+    def step_counter(self, dt: float) -> None:
+        counting = self.counting & ~self.winned
+        release = counting & (self.counter_time >= self.COUNTER_END)
+
+        self.active |= release
+        self.counting &= ~release
+        self.counter_time[counting & ~release] += dt
+
+    def ai_predict(self, mask: np.ndarray) -> np.ndarray:
+        """Same as SimAI.predict for the matches in mask."""
+        coming = mask & self.active & (self.dir_x > 0)
+        predicted_y = np.full(self.size, self.AI_CENTER_Y)
+        if not coming.any():
+            return predicted_y
+
+        travel = (self.AI_LINE_X - self.ball_x[coming]) / self.dir_x[coming]
+        span = self.AI_MAX_Y - self.AI_MIN_Y
+        folded = (self.ball_y[coming] + self.dir_y[coming] * travel - self.AI_MIN_Y) % (2 * span)
+        predicted_y[coming] = self.AI_MIN_Y + np.where(folded <= span, folded, 2 * span - folded)
+        return predicted_y
+
+    def ai_commands(self, dt: float) -> np.ndarray:
+        """Same as SimAI.command for the right paddles."""
+        changed = (self.dir_x != self.ai_dir_x) | (self.dir_y != self.ai_dir_y) | (self.active != self.ai_active)
+        if changed.any():
+            self.ai_dir_x[changed] = self.dir_x[changed]
+            self.ai_dir_y[changed] = self.dir_y[changed]
+            self.ai_active[changed] = self.active[changed]
+
+            predicted_y = self.ai_predict(changed)
+            replan = changed & (np.abs(predicted_y - self.ai_predicted_y) > self.AI_REPLAN_DISTANCE)
+            self.ai_delay[replan] = self.ai_reaction
+            if self.ai_error:
+                self.ai_offset[replan] = self.rng.uniform(-self.ai_error, self.ai_error, int(np.count_nonzero(replan)))
+            self.ai_predicted_y[changed] = predicted_y[changed]
+
+        waiting = self.ai_delay > 0
+        self.ai_delay[waiting] -= dt
+        self.ai_target_y = np.where(waiting, self.ai_target_y, self.ai_predicted_y + self.ai_offset)
+
+        dist = self.ai_target_y - self.paddle_y[:, 1]
+        return np.where(
+            np.abs(dist) <= self.PADDLE_VELOCITY * dt,
+            0,
+            np.where(dist > 0, INPUT_DOWN, INPUT_UP)
+        ).astype(np.uint8)
+
+    def step_paddles(self, dt: float, inputs: np.ndarray) -> None:
+        movement = self.PADDLE_VELOCITY * dt
+        y = self.paddle_y
+
+        y = np.where(inputs & INPUT_UP, np.maximum(self.PADDLE_MIN_Y, y - movement), y)
+        self.paddle_y = np.where(inputs & INPUT_DOWN, np.minimum(self.PADDLE_MAX_Y, y + movement), y)
+
+    def step_walls(self, moving: np.ndarray, hits: np.ndarray) -> np.ndarray:
+        """Bounce on top/bottom walls, return the index of the scoring paddle or -1."""
+        top = moving & (self.ball_y - self.RADIUS < self.BALL_MIN_Y)
+        self.ball_y[top] = self.RADIUS + self.BALL_MIN_Y
+        self.dir_y[top] *= -1
+
+        bottom = moving & (self.ball_y + self.RADIUS > self.BALL_MAX_Y)
+        self.ball_y[bottom] = self.BALL_MAX_Y - self.RADIUS
+        self.dir_y[bottom] *= -1
+
+        hits += top
+        hits += bottom
+
+        scorer = np.full(self.size, -1, dtype=np.int8)
+        scorer[moving & (self.ball_x + self.RADIUS > self.BALL_MAX_X)] = 0
+        scorer[moving & (self.ball_x - self.RADIUS < self.BALL_MIN_X)] = 1
+        return scorer
+
+    def add_points(self, scorer: np.ndarray) -> np.ndarray:
+        """Same as Match.add_point_to_paddle, return the matches won in this step."""
+        scored = scorer >= 0
+        if not scored.any():
+            return np.zeros(self.size, dtype=bool)
+
+        rows = self.index[scored]
+        self.scores[rows, scorer[scored]] += 1
+
+        won = scored & (self.scores.max(axis=1) >= self.MAX_SCORE)
+        self.winned |= won
+
+        restart = scored & ~won
+        self.counting |= restart
+        self.counter_time[restart] = 0.0
+
+        self.reset_ball(scored, won)
+        return won
+
+    def intercept(self, dist_x: np.ndarray, dist_y: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Same as Match.intercept_collision, return the (vertical, horizontal, corner) masks."""
+        abs_distx = np.abs(dist_x)
+        abs_disty = np.abs(dist_y)
+
+        # Too far of x or y axis to collide.
+        near = mask & (abs_distx <= self.H_WIDTH + self.RADIUS) & (abs_disty <= self.H_HEIGHT + self.RADIUS)
+
+        vertical = near & (abs_distx <= self.H_WIDTH)
+        horizontal = near & ~vertical & (abs_disty <= self.H_HEIGHT)
+        corner = near & ~vertical & ~horizontal & (
+            (abs_distx - self.H_WIDTH) ** 2 + (abs_disty - self.H_HEIGHT) ** 2 <= self.RADIUS_SQ
+        )
+        return vertical, horizontal, corner
+
+    def sweep(self, start_x: np.ndarray, start_y: np.ndarray, paddle_x: np.ndarray, paddle_y: np.ndarray,
+              mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Same as Match.sweep_collision, return the time of impact and the (vertical, horizontal, corner) masks."""
+        move_x = self.ball_x - start_x
+        move_y = self.ball_y - start_y
+
+        # Slabs of the paddle box grown by the ball radius.
+        t_enter = np.zeros(self.size)
+        t_exit = np.ones(self.size)
+        hit = mask.copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for start, move, center, reach in (
+                (start_x, move_x, paddle_x, self.H_WIDTH + self.RADIUS),
+                (start_y, move_y, paddle_y, self.H_HEIGHT + self.RADIUS)
+            ):
+                still = move == 0
+                hit &= ~(still & (np.abs(start - center) > reach))
+
+                t_near = np.where(still, -np.inf, (center - reach - start) / move)
+                t_far = np.where(still, np.inf, (center + reach - start) / move)
+                t_enter = np.maximum(t_enter, np.minimum(t_near, t_far))
+                t_exit = np.minimum(t_exit, np.maximum(t_near, t_far))
+        hit &= t_enter <= t_exit
+
+        dist_x = start_x + move_x * t_enter - paddle_x
+        dist_y = start_y + move_y * t_enter - paddle_y
+
+        vertical = hit & (np.abs(dist_x) <= self.H_WIDTH)
+        horizontal = hit & ~vertical & (np.abs(dist_y) <= self.H_HEIGHT)
+        corner = hit & ~vertical & ~horizontal
+
+        # Corner Collision: the grown box has rounded corners, solve against the corner circle.
+        offset_x = start_x - (paddle_x + np.where(dist_x > 0, self.H_WIDTH, -self.H_WIDTH))
+        offset_y = start_y - (paddle_y + np.where(dist_y > 0, self.H_HEIGHT, -self.H_HEIGHT))
+        a = move_x ** 2 + move_y ** 2
+        b = 2 * (offset_x * move_x + offset_y * move_y)
+        c = offset_x ** 2 + offset_y ** 2 - self.RADIUS_SQ
+        discriminant = b ** 2 - 4 * a * c
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_hit = (-b - np.sqrt(discriminant)) / (2 * a)
+        corner &= (a != 0) & (discriminant >= 0) & (t_enter <= t_hit) & (t_hit <= t_exit)
+
+        return np.where(corner, t_hit, t_enter), vertical, horizontal, corner
+
+    def step_paddle_collision(self, start_x: np.ndarray, start_y: np.ndarray, dt: float,
+                              moving: np.ndarray, hits: np.ndarray) -> None:
+        side = (self.ball_x >= self.CENTER_X).astype(np.intp)
+        paddle_x = self.PADDLE_X[side]
+        paddle_y = self.paddle_y[self.index, side]
+
+        # Already touching at the start of the step (paddle moved into the ball): discrete test.
+        overlap = np.logical_or.reduce(self.intercept(start_x - paddle_x, start_y - paddle_y, moving))
+        vertical, horizontal, corner = self.intercept(self.ball_x - paddle_x, self.ball_y - paddle_y, overlap)
+
+        # Otherwise move the ball back to the contact point.
+        t_hit, swept_vertical, swept_horizontal, swept_corner = self.sweep(
+            start_x, start_y, paddle_x, paddle_y, moving & ~overlap
+        )
+        swept = swept_vertical | swept_horizontal | swept_corner
+        if not (swept.any() or overlap.any()): return
+
+        self.ball_x = np.where(swept, start_x + (self.ball_x - start_x) * t_hit, self.ball_x)
+        self.ball_y = np.where(swept, start_y + (self.ball_y - start_y) * t_hit, self.ball_y)
+        vertical |= swept_vertical
+        horizontal |= swept_horizontal
+        corner |= swept_corner
+
+        dist_x = self.ball_x - paddle_x
+        dist_y = self.ball_y - paddle_y
+
+        # Vertical Collision: push the ball and the paddle apart.
+        top = vertical & (dist_y < 0)
+        bottom = vertical & ~top
+        ball_y = self.ball_y
+        ball_y[top] = np.maximum(paddle_y[top] - self.H_HEIGHT - self.RADIUS, self.RADIUS + self.BALL_MIN_Y)
+        ball_y[bottom] = np.minimum(paddle_y[bottom] + self.H_HEIGHT + self.RADIUS, self.BALL_MAX_Y - self.RADIUS)
+        paddle_y = np.where(top, ball_y + self.RADIUS + self.H_HEIGHT, paddle_y)
+        paddle_y = np.where(bottom, ball_y - self.RADIUS - self.H_HEIGHT, paddle_y)
+        self.paddle_y[self.index, side] = paddle_y
+
+        reflect_y = vertical & (((dist_y < 0) & (self.dir_y > 0)) | ((dist_y > 0) & (self.dir_y < 0)))
+        self.dir_y[reflect_y] *= -1
+
+        # Horizontal Collision.
+        left = horizontal & (dist_x < 0)
+        right = horizontal & ~left
+        self.ball_x[left] = np.maximum(paddle_x[left] - self.H_WIDTH - self.RADIUS, self.RADIUS + self.BALL_MIN_X)
+        self.ball_x[right] = np.minimum(paddle_x[right] + self.H_WIDTH + self.RADIUS, self.BALL_MAX_X - self.RADIUS)
+
+        reflect_x = horizontal & (((dist_x < 0) & (self.dir_x > 0)) | ((dist_x > 0) & (self.dir_x < 0)))
+        self.dir_x[reflect_x] *= -1
+        self.speed_up(reflect_x)
+
+        # Corner Collision: bounce back only if the ball moves toward the paddle.
+        toward = (
+            (((dist_x < 0) & (self.dir_x > 0)) | ((dist_x >= 0) & (self.dir_x < 0))) &
+            (((dist_y < 0) & (self.dir_y > 0)) | ((dist_y >= 0) & (self.dir_y < 0)))
+        )
+        flip = corner & toward
+        self.dir_x[flip] *= -1
+        self.dir_y[flip] *= -1
+
+        hits += reflect_y
+        hits += reflect_x
+        hits += corner
+
+        # Use the rest of the step after the bounce.
+        remaining = np.where(swept, (1 - t_hit) * dt, 0)
+        self.ball_x += self.velocity * self.dir_x * remaining
+        self.ball_y += self.velocity * self.dir_y * remaining
+
+    def speed_up(self, mask: np.ndarray) -> None:
+        velocity = self.velocity
+        boost = mask & (velocity < self.MAX_VELOCITY - self.BOOST)
+        step = mask & (self.MAX_VELOCITY - self.BOOST < velocity) & (velocity < self.MAX_VELOCITY)
+        velocity[boost] += self.BOOST
+        velocity[step] += 1
+
+    def step(self, dt: float, inputs: Optional[np.ndarray] = None) -> BatchEvents:
+        """
+        Advance every match by dt seconds.
+            inputs: (N, 2) array of INPUT_UP / INPUT_DOWN bits, ignored for AI paddles.
+        """
+        if inputs is None:
+            inputs = np.zeros((self.size, 2), dtype=np.uint8)
+
+        hits = np.zeros(self.size, dtype=np.int32)
+
+        self.step_counter(dt)
+        if self.ai:
+            inputs = inputs.copy()
+            inputs[:, 1] = self.ai_commands(dt)
+        self.step_paddles(dt, inputs)
+
+        moving = self.active.copy()
+        start_x = self.ball_x.copy()
+        start_y = self.ball_y.copy()
+        magnitude = np.hypot(self.dir_x, self.dir_y)
+        magnitude[magnitude == 0] = 1
+        self.dir_x /= magnitude
+        self.dir_y /= magnitude
+        self.ball_x += np.where(moving, self.velocity * self.dir_x * dt, 0)
+        self.ball_y += np.where(moving, self.velocity * self.dir_y * dt, 0)
+
+        self.step_paddle_collision(start_x, start_y, dt, moving, hits)
+
+        scorer = self.step_walls(moving, hits)
+        won = self.add_points(scorer)
+
+        return hits, scorer, won
@@ -0,0 +1,246 @@
+"""
+Reinforcement learning environments with the Gymnasium API, without depending on it:
+reset(seed) -> (observation, info), step(action) -> (observation, reward, terminated, truncated, info).
+The agent plays the left paddle against the AI. Actions: 0 stay, 1 up, 2 down (the input bits).
+Reward: +1 when the agent scores, -1 when the AI does. An episode is a match, first to PADDLE['max_score'].
+"""
+from random import Random
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.const.settings import ENV, FPS, PHYSICS, SCREEN_RECT
+from src.core.batch import BatchMatch
+from src.core.simulation import Match, SimBall, SimPaddle, POINT_SCORED, INPUT_UP, INPUT_DOWN
+
+ACTIONS = (0, INPUT_UP, INPUT_DOWN)
+OBSERVATION = ('ball_x', 'ball_y', 'dir_x', 'dir_y', 'velocity', 'paddle_y', 'opponent_y', 'ball_active')
+# Positions divided by the screen size and velocity by the max velocity, everything about in [-1, 1].
+SCALE = np.array([SCREEN_RECT.width, SCREEN_RECT.height, 1, 1, SimBall.MAX_VELOCITY,
+                  SCREEN_RECT.height, SCREEN_RECT.height, 1], dtype=np.float32)
+
+
+class EnvRenderer:
+    """Draw a match with the Ball and Paddle sprites of the game, on a window or an offscreen surface."""
+    def __init__(self, render_mode: str, fps: float) -> None:
+        # The sprites need pygame display and fonts: only imported to render.
+        import pygame as pg
+        from src.const.settings import BG_CLR, FONT, FONT_CLR, MIDDLE_LINE_W
+        from src.entities import Ball, Paddle, Score
+        from src.systems import init_video, init_fonts
+        from src.utils import load_font
+
+        init_video()
+        init_fonts()
+        if not hasattr(Score, 'FONT'):
+            # One font: loaded here, no asset loading threads left running.
+            Score.FONT = load_font(FONT['family'], FONT['sizes']['score'])
+
+        self.pg = pg
+        self.render_mode = render_mode
+        self.fps = fps
+        self.clock = pg.time.Clock()
+        if render_mode == 'human':
+            self.surface = pg.display.set_mode(SCREEN_RECT.size)
+        else:
+            self.surface = pg.Surface(SCREEN_RECT.size)
+
+        self.background = pg.Surface(SCREEN_RECT.size)
+        self.background.fill(BG_CLR)
+        pg.draw.rect(self.background, FONT_CLR, (
+            SCREEN_RECT.centerx - MIDDLE_LINE_W // 2, 0, MIDDLE_LINE_W, SCREEN_RECT.height
+        ))
+
+        self.ball_grp = pg.sprite.GroupSingle()
+        self.paddles_grp = pg.sprite.Group()
+        self.ball = Ball(self.ball_grp)
+        self.paddle_type = Paddle
+        self.paddles = None
+
+    def render(self, ball: SimBall, paddles: Tuple[SimPaddle, SimPaddle]) -> Optional[np.ndarray]:
+        """An RGB array (height, width, 3) in 'rgb_array' mode, the window is updated in 'human' mode."""
+        if self.paddles is None:
+            self.paddles = [
+                self.paddle_type(paddles[0], SCREEN_RECT.centerx // 2, self.paddles_grp),
+                self.paddle_type(paddles[1], SCREEN_RECT.centerx // 2 * 3, self.paddles_grp),
+            ]
+
+        for paddle, state in zip(self.paddles, paddles):
+            paddle.state = state
+            paddle.sync(state.y)
+        self.ball.sync(ball.x, ball.y)
+
+        self.surface.blit(self.background, (0, 0))
+        self.paddles_grp.draw(self.surface)
+        self.ball_grp.draw(self.surface)
+
+        if self.render_mode == 'human':
+            self.pg.event.pump()
+            self.pg.display.flip()
+            self.clock.tick(self.fps)
+            return None
+        return self.pg.surfarray.array3d(self.surface).transpose(1, 0, 2)
+
+    def close(self) -> None:
+        if self.render_mode == 'human':
+            self.pg.display.quit()
+
+
+class PongEnv:
+    """One match on Match, the action is repeated frame_skip physics steps."""
+    metadata = {'render_modes': ['human', 'rgb_array'], 'render_fps': FPS // ENV['frame_skip']}
+    STEP = PHYSICS['step']
+
+    def __init__(self, frame_skip: int = ENV['frame_skip'], max_steps: int = ENV['max_steps'],
+                 difficulty: str = ENV['difficulty'], render_mode: Optional[str] = None) -> None:
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.difficulty = difficulty
+        self.render_mode = render_mode
+
+        self.match = Match('oneplayer', difficulty=difficulty)
+        self.steps = int(0)
+        self.renderer: Optional[EnvRenderer] = None
+
+    def observe(self) -> np.ndarray:
+        ball = self.match.ball
+        left, right = self.match.paddles
+        observation = np.array(
+            (ball.x, ball.y, ball.dir_x, ball.dir_y, ball.velocity, left.y, right.y, ball.active), dtype=np.float32
+        )
+        return observation / SCALE
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, Dict]:
+        if seed is not None:
+            self.match = Match('oneplayer', Random(seed), self.difficulty)
+        self.match.reset()
+        self.steps = 0
+        return self.observe(), {}
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict]:
+        match = self.match
+        command = ACTIONS[action]
+        reward = float(0)
+
+        for _ in range(self.frame_skip):
+            for event_type, side in match.step(self.STEP, (command, 0)):
+                if event_type == POINT_SCORED:
+                    reward += 1 if side == 'left' else -1
+            if match.winned:
+                break
+
+        self.steps += 1
+        truncated = not match.winned and self.steps >= self.max_steps
+        if self.render_mode == 'human':
+            self.render()
+        return self.observe(), reward, match.winned, truncated, {'score': [paddle.score for paddle in match.paddles]}
+
+    def render(self) -> Optional[np.ndarray]:
+        if self.render_mode is None:
+            return None
+        if self.renderer is None:
+            self.renderer = EnvRenderer(self.render_mode, FPS / self.frame_skip)
+        return self.renderer.render(self.match.ball, self.match.paddles)
+
+    def close(self) -> None:
+        if self.renderer is not None:
+            self.renderer.close()
+            self.renderer = None
+
+
+class VecPongEnv:
+    """
+    num_envs matches on BatchMatch stepped in one call, an action per match.
+    A finished match is reset at once: the returned observation is the first one of the next episode,
+    the last one is in info['final_observation'] for the finished rows (info['_final_observation']).
+    """
+    metadata = PongEnv.metadata
+    STEP = PHYSICS['step']
+
+    def __init__(self, num_envs: int, frame_skip: int = ENV['frame_skip'], max_steps: int = ENV['max_steps'],
+                 difficulty: str = ENV['difficulty'], seed: Optional[int] = None,
+                 render_mode: Optional[str] = None) -> None:
+        self.num_envs = num_envs
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.difficulty = difficulty
+        self.render_mode = render_mode
+
+        self.batch = BatchMatch(num_envs, 'oneplayer', seed, difficulty)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.inputs = np.zeros((num_envs, 2), dtype=np.uint8)
+        self.observation = np.empty((num_envs, len(OBSERVATION)), dtype=np.float32)
+
+        self.renderer: Optional[EnvRenderer] = None
+        # Views of the first match for the renderer.
+        self.view_ball: Optional[SimBall] = None
+        self.view_paddles: Optional[Tuple[SimPaddle, SimPaddle]] = None
+
+    def observe(self) -> np.ndarray:
+        batch = self.batch
+        observation = self.observation
+        observation[:, 0] = batch.ball_x
+        observation[:, 1] = batch.ball_y
+        observation[:, 2] = batch.dir_x
+        observation[:, 3] = batch.dir_y
+        observation[:, 4] = batch.velocity
+        observation[:, 5:7] = batch.paddle_y
+        observation[:, 7] = batch.active
+        return observation / SCALE
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, Dict]:
+        if seed is not None:
+            self.batch = BatchMatch(self.num_envs, 'oneplayer', seed, self.difficulty)
+        else:
+            self.batch.reset()
+        self.steps[:] = 0
+        return self.observe(), {}
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict]:
+        batch = self.batch
+        self.inputs[:, 0] = actions
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+
+        for _ in range(self.frame_skip):
+            _, scorer, _ = batch.step(self.STEP, self.inputs)
+            # A won match does not score any more until it is reset.
+            rewards += np.where(scorer == 0, 1, np.where(scorer == 1, -1, 0))
+
+        self.steps += 1
+        terminated = batch.winned.copy()
+        truncated = ~terminated & (self.steps >= self.max_steps)
+        observation = self.observe()
+        info = {'score': batch.scores.copy()}
+
+        done = terminated | truncated
+        if done.any():
+            info['final_observation'] = observation.copy()
+            info['_final_observation'] = done
+            batch.reset(done)
+            self.steps[done] = 0
+            observation = self.observe()
+
+        if self.render_mode == 'human':
+            self.render()
+        return observation, rewards, terminated, truncated, info
+
+    def render(self) -> Optional[np.ndarray]:
+        """The first match only."""
+        if self.render_mode is None:
+            return None
+        if self.renderer is None:
+            self.renderer = EnvRenderer(self.render_mode, FPS / self.frame_skip)
+            self.view_ball = SimBall(Random())
+            self.view_paddles = (SimPaddle('left', 'player'), SimPaddle('right', 'ai'))
+
+        batch = self.batch
+        self.view_ball.x, self.view_ball.y = batch.ball_x[0], batch.ball_y[0]
+        for index, paddle in enumerate(self.view_paddles):
+            paddle.y = batch.paddle_y[0, index]
+            paddle.score = int(batch.scores[0, index])
+        return self.renderer.render(self.view_ball, self.view_paddles)
+
+    def close(self) -> None:
+        if self.renderer is not None:
+            self.renderer.close()
+            self.renderer = None
@@ -0,0 +1,279 @@
+from math import pi
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.const.custom_typing import SimEvent
+from src.const.settings import MULTIBALL, SCREEN_RECT
+from src.core.simulation import Match, SimPaddle, BALL_HIT, POINT_SCORED, MATCH_WON, COUNTER_CHANGED
+
+
+class MultiBallMatch:
+    """
+    'crazy' two players match: many balls bouncing off the walls, the paddles and each other.
+    The balls are NumPy arrays. The ball pairs to test come from a uniform grid: balls sorted by cell,
+    each cell tested against itself and 4 of its neighbors, so every close pair is tested once.
+    A ball out of the screen gives a point to the other side and comes back at the center.
+    Same interface as Match for Level.
+    """
+    COUNTER_START = Match.COUNTER_START
+    COUNTER_STEP = Match.COUNTER_STEP
+
+    RADIUS = MULTIBALL['radius']
+    DIAMETER_SQ = (RADIUS * 2) ** 2
+    VELOCITY = MULTIBALL['velocity']
+    MAX_ANGLE = MULTIBALL['max_angle'] * pi / 180
+    MIN_DIR_X = MULTIBALL['min_dir_x']
+    MAX_SCORE = MULTIBALL['max_score']
+    START_OFFSET = MULTIBALL['start_pos_offset']
+    SPREAD_X = MULTIBALL['start_spread_x']
+
+    MIN_Y = RADIUS
+    MAX_Y = SCREEN_RECT.height - RADIUS
+    MIN_X = -RADIUS
+    MAX_X = SCREEN_RECT.width + RADIUS
+    CENTER_X = SCREEN_RECT.centerx
+
+    CELL = MULTIBALL['cell_size']
+    COLUMNS = SCREEN_RECT.width // CELL + 1
+    ROWS = SCREEN_RECT.height // CELL + 1
+    # Half of the 3x3 neighborhood: each pair of cells is visited once.
+    NEIGHBORS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+    def __init__(self, count: int = MULTIBALL['balls'], seed: Optional[int] = None) -> None:
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        self.index = np.arange(count)
+
+        self.paddles = [SimPaddle('left', 'player'), SimPaddle('right', 'player')]
+        self.ai = None
+
+        self.x = np.empty(count)
+        self.y = np.empty(count)
+        self.vx = np.empty(count)
+        self.vy = np.empty(count)
+        self.active = bool(False)
+
+        self.winner: Optional[SimPaddle] = None
+        self.counter = int(-1)
+        self.counter_time: Optional[float] = None
+        self.narrow_tests = int(0)
+
+        self.spawn(np.ones(count, dtype=bool), self.SPREAD_X)
+
+    @property
+    def winned(self) -> bool:
+        return self.winner is not None
+
+    def counter_active(self) -> bool:
+        return self.counter_time is not None
+
+    def spawn(self, mask: np.ndarray, spread_x: float = 0) -> None:
+        """Put the balls in mask around the center, toward a random side."""
+        count = int(np.count_nonzero(mask))
+        if not count: return
+
+        angle = self.rng.uniform(-self.MAX_ANGLE, self.MAX_ANGLE, count)
+        side = self.rng.choice((-1.0, 1.0), count)
+        self.x[mask] = self.CENTER_X + self.rng.uniform(-spread_x, spread_x, count)
+        self.y[mask] = self.rng.uniform(self.START_OFFSET, SCREEN_RECT.height - self.START_OFFSET, count)
+        self.vx[mask] = np.cos(angle) * self.VELOCITY * side
+        self.vy[mask] = np.sin(angle) * self.VELOCITY
+
+    def start(self) -> None:
+        self.counter_time = float(0)
+        self.counter = self.COUNTER_START
+
+    def reset(self) -> None:
+        for paddle in self.paddles:
+            paddle.reset()
+
+        self.winner = None
+        self.active = bool(False)
+        self.spawn(np.ones(self.count, dtype=bool), self.SPREAD_X)
+        self.start()
+
+    def check_counter(self, dt: float, events: List[SimEvent]) -> None:
+        """Same as Match.check_counter, only at the start: the balls come back without countdown."""
+        if self.counter_time >= self.COUNTER_STEP * self.COUNTER_START:
+            self.active = bool(True)
+            self.counter_time = None
+            self.counter = -1
+            events.append((COUNTER_CHANGED, None))
+            return
+
+        value = self.COUNTER_START - int(self.counter_time // self.COUNTER_STEP)
+        if value != self.counter:
+            self.counter = value
+            events.append((COUNTER_CHANGED, None))
+
+        self.counter_time += dt
+
+    def step_walls(self) -> int:
+        top = self.y < self.MIN_Y
+        bottom = self.y > self.MAX_Y
+        self.y[top] = self.MIN_Y
+        self.vy[top] = np.abs(self.vy[top])
+        self.y[bottom] = self.MAX_Y
+        self.vy[bottom] = -np.abs(self.vy[bottom])
+        return int(np.count_nonzero(top) + np.count_nonzero(bottom))
+
+    def step_paddle(self, paddle: SimPaddle) -> int:
+        """Push the balls touching the paddle out of it, away from its center."""
+        x, y = self.x, self.y
+        near_x = np.clip(x, paddle.left, paddle.right)
+        near_y = np.clip(y, paddle.top, paddle.bottom)
+        hit = (x - near_x) ** 2 + (y - near_y) ** 2 < self.RADIUS ** 2
+        if not hit.any():
+            return 0
+
+        # Side: inside the paddle height, sent back horizontally.
+        side = hit & (y >= paddle.top) & (y <= paddle.bottom)
+        before = side & (x < paddle.x)
+        after = side & ~before
+        x[before] = paddle.left - self.RADIUS
+        x[after] = paddle.right + self.RADIUS
+        self.vx[before] = -np.abs(self.vx[before])
+        self.vx[after] = np.abs(self.vx[after])
+
+        # Top, bottom and corners.
+        edge = hit & ~side
+        above = edge & (y < paddle.y)
+        below = edge & ~above
+        y[above] = paddle.top - self.RADIUS
+        y[below] = paddle.bottom + self.RADIUS
+        self.vy[above] = -np.abs(self.vy[above])
+        self.vy[below] = np.abs(self.vy[below])
+
+        return int(np.count_nonzero(hit))
+
+    def find_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Broad phase: every pair of balls in the same or neighbor cells."""
+        cell_x = np.clip((self.x // self.CELL).astype(np.intp), 0, self.COLUMNS - 1)
+        cell_y = np.clip((self.y // self.CELL).astype(np.intp), 0, self.ROWS - 1)
+
+        cell_keys = cell_x * self.ROWS + cell_y
+        order = np.argsort(cell_keys, kind='stable')
+        sorted_keys = cell_keys[order]
+
+        firsts, seconds = [], []
+        for offset_x, offset_y in self.NEIGHBORS:
+            other_x = cell_x + offset_x
+            other_y = cell_y + offset_y
+            valid = (other_x < self.COLUMNS) & (other_y >= 0) & (other_y < self.ROWS)
+            keys = other_x * self.ROWS + other_y
+
+            # Range of the balls of the neighbor cell in the sorted balls.
+            start = np.searchsorted(sorted_keys, keys, 'left')
+            counts = np.where(valid, np.searchsorted(sorted_keys, keys, 'right') - start, 0)
+            total = int(counts.sum())
+            if not total:
+                continue
+
+            first = np.repeat(self.index, counts)
+            position = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            second = order[np.repeat(start, counts) + position]
+
+            if offset_x == 0 and offset_y == 0:
+                keep = first < second
+                first, second = first[keep], second[keep]
+            firsts.append(first)
+            seconds.append(second)
+
+        if not firsts:
+            return self.index[:0], self.index[:0]
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+    def step_balls(self) -> int:
+        """Narrow phase and elastic bounce of the touching balls, equal masses."""
+        first, second = self.find_pairs()
+        self.narrow_tests = len(first)
+
+        dist_x = self.x[second] - self.x[first]
+        dist_y = self.y[second] - self.y[first]
+        dist_sq = dist_x ** 2 + dist_y ** 2
+        touching = (dist_sq < self.DIAMETER_SQ) & (dist_sq > 0)
+        if not touching.any():
+            return 0
+
+        first, second = first[touching], second[touching]
+        dist = np.sqrt(dist_sq[touching])
+        normal_x = dist_x[touching] / dist
+        normal_y = dist_y[touching] / dist
+
+        # Exchange the velocities along the normal, if the balls are getting closer.
+        closing = (self.vx[second] - self.vx[first]) * normal_x + (self.vy[second] - self.vy[first]) * normal_y
+        closing = np.minimum(closing, 0)
+        np.add.at(self.vx, first, closing * normal_x)
+        np.add.at(self.vy, first, closing * normal_y)
+        np.add.at(self.vx, second, -closing * normal_x)
+        np.add.at(self.vy, second, -closing * normal_y)
+
+        # Push them apart, half each.
+        push = (self.RADIUS * 2 - dist) / 2
+        np.add.at(self.x, first, -push * normal_x)
+        np.add.at(self.y, first, -push * normal_y)
+        np.add.at(self.x, second, push * normal_x)
+        np.add.at(self.y, second, push * normal_y)
+
+        # Keep the speed constant and the balls going toward a paddle.
+        bounced = np.unique(np.concatenate((first, second)))
+        self.normalize(bounced)
+        return len(first)
+
+    def normalize(self, balls: np.ndarray) -> None:
+        vx, vy = self.vx[balls], self.vy[balls]
+        speed = np.hypot(vx, vy)
+        speed[speed == 0] = 1
+        dir_x = vx / speed
+        dir_x = np.where(np.abs(dir_x) < self.MIN_DIR_X, np.where(dir_x < 0, -self.MIN_DIR_X, self.MIN_DIR_X), dir_x)
+        dir_y = np.where(vy < 0, -1.0, 1.0) * np.sqrt(1 - dir_x ** 2)
+        self.vx[balls] = dir_x * self.VELOCITY
+        self.vy[balls] = dir_y * self.VELOCITY
+
+    def add_points(self, events: List[SimEvent]) -> None:
+        out_left = self.x < self.MIN_X
+        out_right = self.x > self.MAX_X
+        points = (int(np.count_nonzero(out_right)), int(np.count_nonzero(out_left)))
+        if not points[0] and not points[1]:
+            return
+
+        for paddle, scored in zip(self.paddles, points):
+            if scored:
+                paddle.score = min(paddle.score + scored, self.MAX_SCORE)
+                events.append((POINT_SCORED, paddle.side))
+
+        for paddle in self.paddles:
+            if self.winner is None and paddle.score >= self.MAX_SCORE:
+                self.winner = paddle
+                self.active = bool(False)
+                events.append((MATCH_WON, paddle.side))
+
+        self.spawn(out_left | out_right)
+
+    def step(self, dt: float, inputs: Sequence[int] = (0, 0)) -> List[SimEvent]:
+        """Same as Match.step, a single hit event per kind and step to keep the sounds low."""
+        events: List[SimEvent] = []
+
+        if not self.winned and self.counter_active():
+            self.check_counter(dt, events)
+
+        for paddle, command in zip(self.paddles, inputs):
+            paddle.move(dt, command)
+
+        if not self.active:
+            self.narrow_tests = 0
+            return events
+
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+
+        if self.step_paddle(self.paddles[0]) + self.step_paddle(self.paddles[1]):
+            events.append((BALL_HIT, 'paddle'))
+        if self.step_balls():
+            events.append((BALL_HIT, 'ball'))
+        if self.step_walls():
+            events.append((BALL_HIT, 'wall'))
+
+        self.add_points(events)
+        return events
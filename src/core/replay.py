@@ -0,0 +1,173 @@
+"""
+Match recording as a seed and one input byte per physics step, enough to step the same match again.
+File: header, reset steps, then the zlib compressed inputs. Hour-long sessions are a few KB.
+"""
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+from random import Random, getrandbits
+from typing import List, Sequence
+
+from src.const.custom_typing import MatchState, SimEvent
+from src.const.settings import AI, PHYSICS, REPLAY
+from src.core.simulation import Match, BALL_HIT, COUNTER_CHANGED
+
+MAGIC = b'CPRP'
+VERSION = 2
+LEVEL_TYPES = ('oneplayer', 'twoplayer')
+DIFFICULTIES = tuple(AI['levels'])
+# Magic, version, level type, AI difficulty, seed, step duration, steps count, resets count.
+HEADER = struct.Struct('<4sBBBQdII')
+
+# The input bits of a paddle fit in 2 bits, both paddles in a byte.
+INPUT_BITS = 2
+INPUT_MASK = (1 << INPUT_BITS) - 1
+
+
+def pack_inputs(inputs: Sequence[int]) -> int:
+    return (inputs[0] & INPUT_MASK) | (inputs[1] & INPUT_MASK) << INPUT_BITS
+
+
+def unpack_inputs(value: int) -> List[int]:
+    return [value & INPUT_MASK, value >> INPUT_BITS & INPUT_MASK]
+
+
+class Replay:
+    """
+    Recorded match: its seed, the inputs byte of each step, and the steps before which the match was reset.
+    """
+    def __init__(self, level_type: str, seed: int, step: float = PHYSICS['step'], difficulty: str = AI['difficulty']) -> None:
+        self.level_type = level_type
+        self.seed = seed
+        self.step = step
+        self.difficulty = difficulty
+
+        self.inputs = array('B')
+        self.resets = array('I')
+
+    def __len__(self) -> int:
+        return len(self.inputs)
+
+    def new_match(self) -> Match:
+        """Match as created by the recorder, not started."""
+        return Match(self.level_type, Random(self.seed), self.difficulty)
+
+    def save(self, file_path: str) -> None:
+        header = HEADER.pack(
+            MAGIC, VERSION, LEVEL_TYPES.index(self.level_type), DIFFICULTIES.index(self.difficulty),
+            self.seed, self.step, len(self.inputs), len(self.resets)
+        )
+        with open(file_path, 'wb') as file:
+            file.write(header)
+            file.write(self.resets.tobytes())
+            file.write(zlib.compress(self.inputs.tobytes(), REPLAY['compress_level']))
+
+    @classmethod
+    def load(cls, file_path: str) -> 'Replay':
+        with open(file_path, 'rb') as file:
+            data = file.read()
+
+        magic, version, level_type, difficulty, seed, step, steps, resets = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file_path} is not a replay of version {VERSION}")
+
+        replay = cls(LEVEL_TYPES[level_type], seed, step, DIFFICULTIES[difficulty])
+        offset = HEADER.size
+        replay.resets.frombytes(data[offset:offset + resets * replay.resets.itemsize])
+        offset += resets * replay.resets.itemsize
+        replay.inputs.frombytes(zlib.decompress(data[offset:]))
+
+        if len(replay.inputs) != steps:
+            raise ValueError(f"{file_path} is truncated: {len(replay.inputs)} of {steps} steps")
+        return replay
+
+
+class ReplayRecorder:
+    """Own a seeded match and record the inputs of each step."""
+    def __init__(self, level_type: str, seed: int = None, difficulty: str = AI['difficulty']) -> None:
+        self.replay = Replay(level_type, seed if seed is not None else getrandbits(63), difficulty=difficulty)
+        self.match = self.replay.new_match()
+
+    def step(self, dt: float, inputs: Sequence[int]) -> List[SimEvent]:
+        self.replay.inputs.append(pack_inputs(inputs))
+        return self.match.step(dt, inputs)
+
+    def reset(self) -> None:
+        self.replay.resets.append(len(self.replay.inputs))
+        self.match.reset()
+
+    def save(self, file_path: str) -> None:
+        self.replay.save(file_path)
+
+
+class ReplayPlayer:
+    """
+    Step a new match with the recorded inputs, ignoring the given ones.
+    A keyframe is kept every REPLAY['keyframe_interval'] steps played: seek bisects them and
+    steps the match from the closest one, at most an interval of steps.
+    """
+    INTERVAL = REPLAY['keyframe_interval']
+
+    def __init__(self, replay: Replay) -> None:
+        self.replay = replay
+        self.match = replay.new_match()
+        # Started as Level.start does, before the first step.
+        self.match.start()
+        self.frame = int(0)
+
+        self.keyframe_frames: List[int] = []
+        self.keyframes: List[MatchState] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.frame >= len(self.replay)
+
+    def reset(self) -> None:
+        """The resets are played from the recording."""
+
+    def keep_keyframe(self) -> None:
+        if self.frame % self.INTERVAL == 0 and (not self.keyframe_frames or self.frame > self.keyframe_frames[-1]):
+            self.keyframe_frames.append(self.frame)
+            self.keyframes.append(self.match.snapshot())
+
+    def step(self, dt: float = None, inputs: Sequence[int] = None) -> List[SimEvent]:
+        if self.finished:
+            return []
+
+        self.keep_keyframe()
+
+        events: List[SimEvent] = []
+        replay = self.replay
+        # The recorded resets happened between two steps.
+        index = bisect_right(replay.resets, self.frame - 1)
+        while index < len(replay.resets) and replay.resets[index] == self.frame:
+            self.match.reset()
+            events.append((COUNTER_CHANGED, None))
+            index += 1
+
+        events.extend(self.match.step(replay.step, unpack_inputs(replay.inputs[self.frame])))
+        self.frame += 1
+        return events
+
+    def seek(self, frame: int) -> None:
+        """
+        Restore the closest keyframe before frame then step to it.
+        Every played step is after the keyframe of step 0, frames not played yet are stepped to.
+        """
+        frame = max(0, min(frame, len(self.replay)))
+
+        index = bisect_right(self.keyframe_frames, frame) - 1
+        if index >= 0 and (frame < self.frame or self.keyframe_frames[index] > self.frame):
+            self.match.restore(self.keyframes[index])
+            self.frame = self.keyframe_frames[index]
+
+        while self.frame < frame:
+            self.step()
+
+    def run_headless(self) -> int:
+        """Play the remaining steps as fast as possible, return the ball hits."""
+        hits = int(0)
+        while not self.finished:
+            hits += sum(1 for event_type, _ in self.step() if event_type == BALL_HIT)
+        return hits
@@ -0,0 +1,39 @@
+from src.const.settings import REWIND
+from src.core.simulation import Match, STATE
+
+
+class RewindBuffer:
+    """
+    The last REWIND['steps'] match states, one STATE record per physics step in a preallocated ring.
+    save before each step, restore steps the match back by one step.
+    The RNG is not saved: after a rewind the next serves are drawn again.
+    """
+    RECORD = STATE.size
+
+    def __init__(self, steps: int = REWIND['steps']) -> None:
+        self.steps = steps
+        self.buffer = bytearray(self.RECORD * steps)
+        self.head = int(0) # Next record to write.
+        self.count = int(0)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self) -> None:
+        self.head = int(0)
+        self.count = int(0)
+
+    def save(self, match: Match) -> None:
+        match.pack_into(self.buffer, self.head * self.RECORD)
+        self.head = (self.head + 1) % self.steps
+        self.count = min(self.count + 1, self.steps)
+
+    def restore(self, match: Match) -> bool:
+        """Restore the last saved state and drop it, False if the buffer is empty."""
+        if not self.count:
+            return False
+
+        self.head = (self.head - 1) % self.steps
+        self.count -= 1
+        match.unpack_from(self.buffer, self.head * self.RECORD)
+        return True
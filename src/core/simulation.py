@@ -0,0 +1,576 @@
+from math import hypot, sqrt
+from random import Random
+from struct import Struct
+from typing import List, Optional, Sequence, Tuple
+
+from src.const.custom_typing import AIState, CollisionValue, MatchState, SimEvent
+from src.const.settings import AI, BALL, PADDLE, SCREEN_RECT
+
+# Paddle input bits.
+INPUT_UP = 1
+INPUT_DOWN = 2
+
+# Events returned by Match.step.
+BALL_HIT = 'ball_hit'
+POINT_SCORED = 'point_scored'
+MATCH_WON = 'match_won'
+COUNTER_CHANGED = 'counter_changed'
+
+# Match state without the RNG, see Match.pack_into.
+# Ball x, y, dir_x, dir_y, velocity, active, paddles y and score, winner index, counter, counter time (-1 if inactive).
+STATE = Struct('<5d?2d2Bbbd')
+
+
+class SimBall:
+    """Ball state and movement, without any pygame object."""
+    DEFAULT_VELOCITY = BALL['velocity']
+    MAX_VELOCITY = BALL['max_vel']
+    BOOST = BALL['boost']
+    RADIUS = BALL['radius']
+    RADIUS_SQ = RADIUS ** 2
+
+    MIN_X = -BALL['max_out']
+    MAX_X = SCREEN_RECT.width + BALL['max_out']
+    MIN_Y = int(0)
+    MAX_Y = SCREEN_RECT.height
+    START_OFFSET = BALL['start_pos_offset']
+    START_OFFSET_MAX = SCREEN_RECT.height - START_OFFSET
+
+    def __init__(self, rng: Random) -> None:
+        self.rng = rng
+        self.active = bool(False)
+        self.velocity = self.DEFAULT_VELOCITY
+
+        self.x, self.y = self.get_random_position()
+        self.dir_x = self.get_random_direction()
+        self.dir_y = self.get_random_direction()
+
+    def reset(self, full: bool = False) -> None:
+        self.velocity = self.DEFAULT_VELOCITY
+        self.x, self.y = self.get_random_position()
+        self.active = bool(False)
+
+        if not full:
+            self.dir_x *= -1
+            self.dir_y = self.get_random_direction()
+        else:
+            self.dir_x = self.get_random_direction()
+            self.dir_y = self.get_random_direction()
+
+    def speed_up(self) -> None:
+        if self.velocity < self.MAX_VELOCITY - self.BOOST:
+            self.velocity += self.BOOST
+            return
+
+        if self.MAX_VELOCITY - self.BOOST < self.velocity < self.MAX_VELOCITY:
+            self.velocity += 1
+
+    def get_random_direction(self) -> int:
+        """Return -1 or 1"""
+        return self.rng.choice((-1, 1))
+
+    def get_random_position(self):
+        return (
+            float(SCREEN_RECT.centerx),
+            float(self.rng.randint(self.START_OFFSET, self.START_OFFSET_MAX))
+        )
+
+    def move(self, dt: float) -> None:
+        magnitude = hypot(self.dir_x, self.dir_y)
+        if magnitude != 0:
+            self.dir_x /= magnitude
+            self.dir_y /= magnitude
+
+        self.x += self.velocity * self.dir_x * dt
+        self.y += self.velocity * self.dir_y * dt
+
+    def check_wall_collision(self, events: List[SimEvent]) -> Optional[str]:
+        """Bounce on top/bottom walls, return the side which scores if the ball is out."""
+        # Top.
+        if self.y - self.RADIUS < self.MIN_Y:
+            self.y = self.RADIUS + self.MIN_Y
+            self.dir_y *= -1
+            events.append((BALL_HIT, 'wall'))
+
+        # Bottom.
+        if self.y + self.RADIUS > self.MAX_Y:
+            self.y = self.MAX_Y - self.RADIUS
+            self.dir_y *= -1
+            events.append((BALL_HIT, 'wall'))
+
+        # Left.
+        if self.x - self.RADIUS < self.MIN_X:
+            return 'right'
+
+        # Right.
+        if self.x + self.RADIUS > self.MAX_X:
+            return 'left'
+
+        return None
+
+    def paddle_collision(self, side: str, corner: str, dist_x: float, dist_y: float,
+                         paddle: 'SimPaddle', events: List[SimEvent]) -> None:
+        if side:
+            if side in ['top', 'bottom']:
+                if side == 'top':
+                    self.y = max(paddle.top - self.RADIUS, self.RADIUS + self.MIN_Y)
+                    paddle.y = self.y + self.RADIUS + paddle.H_HEIGHT
+                else:
+                    self.y = min(paddle.bottom + self.RADIUS, self.MAX_Y - self.RADIUS)
+                    paddle.y = self.y - self.RADIUS - paddle.H_HEIGHT
+
+                # Reflect the movement of the ball only if its movement vector points in a direction "against" the ball
+                if (dist_y < 0 and self.dir_y > 0) or (dist_y > 0 and self.dir_y < 0):
+                    self.dir_y *= -1
+                    events.append((BALL_HIT, 'paddle'))
+
+            if side in ['left', 'right']:
+                if side == 'left':
+                    self.x = max(paddle.left - self.RADIUS, self.RADIUS + self.MIN_X)
+                else:
+                    self.x = min(paddle.right + self.RADIUS, self.MAX_X - self.RADIUS)
+
+                # Reflect the movement of the ball only if its movement vector points in a direction "against" the ball
+                if (dist_x < 0 and self.dir_x > 0) or (dist_x > 0 and self.dir_x < 0):
+                    self.dir_x *= -1
+                    events.append((BALL_HIT, 'paddle'))
+                    self.speed_up()
+
+        if corner:
+            events.append((BALL_HIT, 'paddle'))
+
+            if corner == 'topleft' and self.dir_y > 0 and self.dir_x > 0:
+                self.dir_x *= -1
+                self.dir_y *= -1
+            elif corner == 'bottomleft' and self.dir_y < 0 and self.dir_x > 0:
+                self.dir_x *= -1
+                self.dir_y *= -1
+            elif corner == 'topright' and self.dir_y > 0 and self.dir_x < 0:
+                self.dir_x *= -1
+                self.dir_y *= -1
+            elif corner == 'bottomright' and self.dir_y < 0 and self.dir_x < 0:
+                self.dir_x *= -1
+                self.dir_y *= -1
+
+
+class SimPaddle:
+    """Paddle state and movement, without any pygame object."""
+    MAX_SCORE = PADDLE['max_score']
+    OFFSET_X = PADDLE['offset_x']
+    VELOCITY = PADDLE['velocity']
+    WIDTH = PADDLE['width']
+    HEIGHT = PADDLE['height']
+    H_WIDTH = WIDTH // 2
+    H_HEIGHT = HEIGHT // 2
+
+    MIN_Y = (H_HEIGHT) + PADDLE['offset_y']
+    MAX_Y = SCREEN_RECT.height - (H_HEIGHT) - (PADDLE['offset_y'] - 1)
+
+    def __init__(self, side: str, paddle_type: str) -> None:
+        self.side = side
+        self.type = paddle_type
+        self.score = int(0)
+
+        if side == 'left':
+            self.x = float(self.H_WIDTH + self.OFFSET_X)
+        else:
+            self.x = float(SCREEN_RECT.width - self.H_WIDTH - self.OFFSET_X)
+        self.y = float(SCREEN_RECT.centery)
+
+    @property
+    def top(self) -> float:
+        return self.y - self.H_HEIGHT
+
+    @property
+    def bottom(self) -> float:
+        return self.y + self.H_HEIGHT
+
+    @property
+    def left(self) -> float:
+        return self.x - self.H_WIDTH
+
+    @property
+    def right(self) -> float:
+        return self.x + self.H_WIDTH
+
+    def winned(self) -> bool:
+        return self.score >= self.MAX_SCORE
+
+    def reset(self) -> None:
+        self.y = float(SCREEN_RECT.centery)
+        self.score = int(0)
+
+    def move(self, dt: float, command: int) -> None:
+        """The AI paddles get their command from SimAI."""
+        # Move and clamp the paddle inside the screen.
+        if command & INPUT_UP:
+            self.y = max(self.MIN_Y, self.y - (self.VELOCITY * dt))
+        if command & INPUT_DOWN:
+            self.y = min(self.MAX_Y, self.y + (self.VELOCITY * dt))
+
+
+def fold(value: float, low: float, high: float) -> float:
+    """Position of a point moving value - low past low, bouncing between low and high."""
+    span = high - low
+    value = (value - low) % (2 * span)
+    return low + (value if value <= span else 2 * span - value)
+
+
+class SimAI:
+    """
+    Move a paddle toward the y where the ball will cross its line, the wall bounces folded in closed form.
+    The crossing only depends on the ball position and direction: it is computed again when the direction
+    changes, every paddle, wall hit or reset. Difficulty adds a random error to the crossing
+    and a reaction delay before following a new trajectory.
+    """
+    LEVELS = AI['levels']
+    REPLAN_DISTANCE = AI['replan_distance']
+    CENTER_Y = float(SCREEN_RECT.centery)
+    BALL_MIN_Y = SimBall.MIN_Y + SimBall.RADIUS
+    BALL_MAX_Y = SimBall.MAX_Y - SimBall.RADIUS
+
+    def __init__(self, paddle: SimPaddle, rng: Random, difficulty: str = AI['difficulty']) -> None:
+        self.paddle = paddle
+        self.rng = rng
+        self.error = self.LEVELS[difficulty]['error']
+        self.reaction = self.LEVELS[difficulty]['reaction']
+
+        # Line crossed by the ball center when it touches the paddle face, and the x direction toward it.
+        if paddle.side == 'left':
+            self.line_x = paddle.right + SimBall.RADIUS
+            self.toward = -1
+        else:
+            self.line_x = paddle.left - SimBall.RADIUS
+            self.toward = 1
+
+        self.trajectory: Optional[Tuple[float, float, bool]] = None
+        self.predicted_y = self.CENTER_Y
+        self.offset = float(0)
+        self.delay = float(0)
+        self.target_y = self.CENTER_Y
+        self.predictions = int(0) # Shown by the profiler overlay, once per ball direction change toward the paddle.
+
+    def predict(self, ball: SimBall) -> float:
+        """y of the ball center on the paddle line, the screen center while the ball goes away."""
+        if not ball.active or ball.dir_x * self.toward <= 0:
+            return self.CENTER_Y
+
+        self.predictions += 1
+        # The velocity does not change the crossing point, only when it is reached.
+        travel = (self.line_x - ball.x) / ball.dir_x
+        return fold(ball.y + ball.dir_y * travel, self.BALL_MIN_Y, self.BALL_MAX_Y)
+
+    def update(self, ball: SimBall, dt: float) -> None:
+        trajectory = (ball.dir_x, ball.dir_y, ball.active)
+        if trajectory != self.trajectory:
+            self.trajectory = trajectory
+            predicted_y = self.predict(ball)
+
+            # A wall bounce keeps the crossing, only the wall clamp moves it a little.
+            if abs(predicted_y - self.predicted_y) > self.REPLAN_DISTANCE:
+                self.delay = self.reaction
+                self.offset = self.rng.uniform(-self.error, self.error) if self.error else float(0)
+            self.predicted_y = predicted_y
+
+        if self.delay > 0:
+            self.delay -= dt
+        else:
+            self.target_y = self.predicted_y + self.offset
+
+    def command(self, ball: SimBall, dt: float) -> int:
+        """Input bits of this step, nothing if the target is closer than a step."""
+        self.update(ball, dt)
+
+        dist = self.target_y - self.paddle.y
+        if abs(dist) <= self.paddle.VELOCITY * dt:
+            return int(0)
+        return INPUT_DOWN if dist > 0 else INPUT_UP
+
+    def invalidate(self) -> None:
+        """Predict again at the next step, after the ball was moved from outside."""
+        self.trajectory = None
+
+    def get_state(self) -> AIState:
+        return self.trajectory, self.predicted_y, self.offset, self.delay, self.target_y
+
+    def set_state(self, state: AIState) -> None:
+        self.trajectory, self.predicted_y, self.offset, self.delay, self.target_y = state
+
+
+class Match:
+    """
+    Headless Pong match: ball, paddles, score, countdown and win detection.
+    Stepped with explicit inputs and a dt, returns the events of the step.
+    """
+    COUNTER_START = 3
+    COUNTER_STEP = 0.7 # Seconds per counter value.
+    CENTER_X = SCREEN_RECT.centerx
+
+    def __init__(self, level_type: str, rng: Optional[Random] = None, difficulty: str = AI['difficulty']) -> None:
+        self.rng = rng if rng is not None else Random()
+
+        self.ball = SimBall(self.rng)
+        self.paddles = [
+            SimPaddle('left', 'player'),
+            SimPaddle('right', 'ai' if level_type == 'oneplayer' else 'player')
+        ]
+        self.ai = SimAI(self.paddles[1], self.rng, difficulty) if level_type == 'oneplayer' else None
+
+        self.winner: Optional[SimPaddle] = None
+        self.counter = int(-1)
+        self.counter_time: Optional[float] = None
+
+    @property
+    def winned(self) -> bool:
+        return self.winner is not None
+
+    def counter_active(self) -> bool:
+        return self.counter_time is not None
+
+    def start(self) -> None:
+        self.counter_time = float(0)
+        self.counter = self.COUNTER_START
+
+    def reset(self) -> None:
+        for paddle in self.paddles:
+            paddle.reset()
+
+        self.winner = None
+        self.ball.reset(True)
+        self.start()
+
+    def snapshot(self) -> MatchState:
+        """Whole match state, RNG included, stepping a restored match gives the same steps."""
+        ball = self.ball
+        return (
+            (ball.x, ball.y, ball.dir_x, ball.dir_y, ball.velocity, ball.active),
+            tuple((paddle.y, paddle.score) for paddle in self.paddles),
+            self.paddles.index(self.winner) if self.winner is not None else -1,
+            self.counter,
+            self.counter_time,
+            self.rng.getstate(),
+            self.ai.get_state() if self.ai is not None else None
+        )
+
+    def restore(self, state: MatchState) -> None:
+        ball_state, paddles_state, winner, self.counter, self.counter_time, rng_state, ai_state = state
+
+        ball = self.ball
+        ball.x, ball.y, ball.dir_x, ball.dir_y, ball.velocity, ball.active = ball_state
+        for paddle, (pos_y, score) in zip(self.paddles, paddles_state):
+            paddle.y = pos_y
+            paddle.score = score
+
+        self.winner = self.paddles[winner] if winner != -1 else None
+        self.rng.setstate(rng_state)
+        if self.ai is not None:
+            self.ai.set_state(ai_state)
+
+    def pack_into(self, buffer: bytearray, offset: int = 0) -> None:
+        """Write the state in STATE layout, everything but the RNG."""
+        ball = self.ball
+        left, right = self.paddles
+        STATE.pack_into(
+            buffer, offset,
+            ball.x, ball.y, ball.dir_x, ball.dir_y, ball.velocity, ball.active,
+            left.y, right.y, left.score, right.score,
+            self.paddles.index(self.winner) if self.winner is not None else -1,
+            self.counter,
+            self.counter_time if self.counter_time is not None else -1
+        )
+
+    def unpack_from(self, buffer: bytes, offset: int = 0) -> None:
+        ball = self.ball
+        left, right = self.paddles
+        (
+            ball.x, ball.y, ball.dir_x, ball.dir_y, ball.velocity, ball.active,
+            left.y, right.y, left.score, right.score,
+            winner, self.counter, counter_time
+        ) = STATE.unpack_from(buffer, offset)
+
+        self.winner = self.paddles[winner] if winner != -1 else None
+        self.counter_time = counter_time if counter_time >= 0 else None
+        if self.ai is not None:
+            self.ai.invalidate()
+
+    def set_counter(self, value: int, events: List[SimEvent]) -> None:
+        self.counter = value
+        events.append((COUNTER_CHANGED, None))
+
+    def check_counter(self, dt: float, events: List[SimEvent]) -> None:
+        if self.counter_time >= self.COUNTER_STEP * self.COUNTER_START:
+            self.ball.active = bool(True)
+            self.counter_time = None
+            self.set_counter(-1, events)
+            return
+
+        value = self.COUNTER_START - int(self.counter_time // self.COUNTER_STEP)
+        if value != self.counter:
+            self.set_counter(value, events)
+
+        self.counter_time += dt
+
+    def add_point_to_paddle(self, target: str, events: List[SimEvent]) -> None:
+        """target is the side of the paddle targetted"""
+        for paddle in self.paddles:
+            if paddle.side == target:
+                paddle.score += 1
+                events.append((POINT_SCORED, paddle.side))
+
+                if paddle.winned():
+                    self.winner = paddle
+                    events.append((MATCH_WON, paddle.side))
+                else:
+                    self.counter_time = float(0)
+                    self.set_counter(self.COUNTER_START, events)
+
+                self.ball.reset(self.winned)
+                break
+
+    def intercept_collision(self, dist_x: float, dist_y: float, ball: SimBall, paddle: SimPaddle) -> CollisionValue:
+        abs_distx = abs(dist_x)
+        abs_disty = abs(dist_y)
+
+        # Too far of x or y axis to collide.
+        if abs_distx > paddle.H_WIDTH + ball.RADIUS or abs_disty > paddle.H_HEIGHT + ball.RADIUS:
+            return False, None, None
+
+        # Vertical Collision.
+        if abs_distx <= paddle.H_WIDTH:
+            return True, None, 'top' if dist_y < 0 else 'bottom'
+
+        # Horizontal Collision.
+        if abs_disty <= paddle.H_HEIGHT:
+            return True, None, 'left' if dist_x < 0 else 'right'
+
+        # Corner Collision.
+        corner_dist_sq = (abs_distx - paddle.H_WIDTH) ** 2 + (abs_disty - paddle.H_HEIGHT) ** 2
+        if corner_dist_sq <= ball.RADIUS_SQ:
+            if dist_x < 0:
+                return True, 'topleft' if dist_y < 0 else 'bottomleft', None
+            else:
+                return True, 'topright' if dist_y < 0 else 'bottomright', None
+
+        return False, None, None
+
+    def sweep_collision(self, start_x: float, start_y: float, ball: SimBall,
+                        paddle: SimPaddle) -> Optional[Tuple[float, Optional[str], Optional[str]]]:
+        """
+        Swept circle vs paddle box from (start_x, start_y) to the ball position.
+        Return (time of impact in 0..1, corner, side) or None, the ball may cross the paddle in one step.
+        """
+        move_x = ball.x - start_x
+        move_y = ball.y - start_y
+        reach_x = paddle.H_WIDTH + ball.RADIUS
+        reach_y = paddle.H_HEIGHT + ball.RADIUS
+
+        # Slabs of the paddle box grown by the ball radius.
+        t_enter = float(0)
+        t_exit = float(1)
+        for start, move, center, reach in ((start_x, move_x, paddle.x, reach_x), (start_y, move_y, paddle.y, reach_y)):
+            if move == 0:
+                if abs(start - center) > reach:
+                    return None
+                continue
+
+            t_near = (center - reach - start) / move
+            t_far = (center + reach - start) / move
+            if t_near > t_far:
+                t_near, t_far = t_far, t_near
+
+            t_enter = max(t_enter, t_near)
+            t_exit = min(t_exit, t_far)
+            if t_enter > t_exit:
+                return None
+
+        dist_x = start_x + move_x * t_enter - paddle.x
+        dist_y = start_y + move_y * t_enter - paddle.y
+
+        # Vertical Collision.
+        if abs(dist_x) <= paddle.H_WIDTH:
+            return t_enter, None, 'top' if dist_y < 0 else 'bottom'
+
+        # Horizontal Collision.
+        if abs(dist_y) <= paddle.H_HEIGHT:
+            return t_enter, None, 'left' if dist_x < 0 else 'right'
+
+        # Corner Collision: the grown box has rounded corners, solve against the corner circle.
+        corner_x = paddle.x + (paddle.H_WIDTH if dist_x > 0 else -paddle.H_WIDTH)
+        corner_y = paddle.y + (paddle.H_HEIGHT if dist_y > 0 else -paddle.H_HEIGHT)
+        offset_x = start_x - corner_x
+        offset_y = start_y - corner_y
+
+        a = move_x ** 2 + move_y ** 2
+        b = 2 * (offset_x * move_x + offset_y * move_y)
+        c = offset_x ** 2 + offset_y ** 2 - ball.RADIUS_SQ
+        discriminant = b ** 2 - 4 * a * c
+        if a == 0 or discriminant < 0:
+            return None
+
+        t_hit = (-b - sqrt(discriminant)) / (2 * a)
+        if not t_enter <= t_hit <= t_exit:
+            return None
+
+        if dist_x < 0:
+            return t_hit, 'topleft' if dist_y < 0 else 'bottomleft', None
+        return t_hit, 'topright' if dist_y < 0 else 'bottomright', None
+
+    def paddle_collision(self, start_x: float, start_y: float, dt: float, events: List[SimEvent]) -> None:
+        ball = self.ball
+        paddle = self.paddles[0] if ball.x < self.CENTER_X else self.paddles[1]
+
+        dist_x = start_x - paddle.x
+        dist_y = start_y - paddle.y
+        overlap, _, _ = self.intercept_collision(dist_x, dist_y, ball, paddle)
+
+        # Already touching at the start of the step (paddle moved into the ball): discrete test.
+        if overlap:
+            dist_x = ball.x - paddle.x
+            dist_y = ball.y - paddle.y
+            collision, corner, side = self.intercept_collision(dist_x, dist_y, ball, paddle)
+            if collision:
+                ball.paddle_collision(side, corner, dist_x, dist_y, paddle, events)
+            return
+
+        sweep = self.sweep_collision(start_x, start_y, ball, paddle)
+        if sweep is None:
+            return
+
+        # Move the ball back to the contact point, bounce and use the rest of the step.
+        t_hit, corner, side = sweep
+        ball.x = start_x + (ball.x - start_x) * t_hit
+        ball.y = start_y + (ball.y - start_y) * t_hit
+        ball.paddle_collision(side, corner, ball.x - paddle.x, ball.y - paddle.y, paddle, events)
+
+        remaining = (1 - t_hit) * dt
+        ball.x += ball.velocity * ball.dir_x * remaining
+        ball.y += ball.velocity * ball.dir_y * remaining
+
+    def step(self, dt: float, inputs: Sequence[int] = (0, 0)) -> List[SimEvent]:
+        """
+        Advance the match by dt seconds.
+            inputs: INPUT_UP / INPUT_DOWN bits for each paddle (left, right), ignored for the AI paddle.
+        """
+        events: List[SimEvent] = []
+
+        if not self.winned and self.counter_active():
+            self.check_counter(dt, events)
+
+        if self.ai is not None:
+            inputs = (inputs[0], self.ai.command(self.ball, dt))
+
+        for paddle, command in zip(self.paddles, inputs):
+            paddle.move(dt, command)
+
+        if self.ball.active:
+            ball = self.ball
+            start_x, start_y = ball.x, ball.y
+            ball.move(dt)
+
+            self.paddle_collision(start_x, start_y, dt, events)
+
+            target = ball.check_wall_collision(events)
+            if target is not None:
+                self.add_point_to_paddle(target, events)
+
+        return events
@@ -0,0 +1,63 @@
+"""
+AI strategies for headless matches: a factory called with (paddle, rng) returning an object
+with command(ball, dt) -> input bits, like SimAI.
+Strategies outside of this module are given as 'package.module:factory'.
+"""
+from importlib import import_module
+from random import Random
+from typing import Callable, Dict, Protocol
+
+from src.const.settings import AI
+from src.core.simulation import SimAI, SimBall, SimPaddle, INPUT_UP, INPUT_DOWN
+
+
+class Strategy(Protocol):
+    def command(self, ball: SimBall, dt: float) -> int: ...
+
+
+StrategyFactory = Callable[[SimPaddle, Random], Strategy]
+
+
+class ChaseAI:
+    """The first AI: follow the ball y every step, wall bounces ignored."""
+    def __init__(self, paddle: SimPaddle, rng: Random) -> None:
+        self.paddle = paddle
+
+    def command(self, ball: SimBall, dt: float) -> int:
+        dist = ball.y - self.paddle.y
+        if abs(dist) <= self.paddle.VELOCITY * dt:
+            return int(0)
+        return INPUT_DOWN if dist > 0 else INPUT_UP
+
+
+class IdleAI:
+    """Stay at the center, the baseline."""
+    def __init__(self, paddle: SimPaddle, rng: Random) -> None:
+        pass
+
+    def command(self, ball: SimBall, dt: float) -> int:
+        return int(0)
+
+
+def predictive(difficulty: str) -> StrategyFactory:
+    def factory(paddle: SimPaddle, rng: Random) -> SimAI:
+        return SimAI(paddle, rng, difficulty)
+    return factory
+
+
+STRATEGIES: Dict[str, StrategyFactory] = {
+    'idle': IdleAI,
+    'chase': ChaseAI,
+    **{f"predict-{difficulty}": predictive(difficulty) for difficulty in AI['levels']},
+}
+
+
+def load_strategy(name: str) -> StrategyFactory:
+    """A name of STRATEGIES or 'package.module:factory'."""
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+
+    module, _, attribute = name.partition(':')
+    if not attribute:
+        raise ValueError(f"Unknown strategy {name!r}, expected one of {', '.join(STRATEGIES)} or module:factory")
+    return getattr(import_module(module), attribute)
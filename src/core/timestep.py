@@ -0,0 +1,31 @@
+from src.const.settings import PHYSICS
+
+
+class FixedStep:
+    """
+    Accumulate the frame time and give the number of fixed physics steps to run.
+    alpha is the fraction of a step left in the accumulator, used to interpolate the rendering.
+    """
+    STEP = PHYSICS['step']
+    MAX_STEPS = PHYSICS['max_steps']
+
+    def __init__(self) -> None:
+        self.accumulator = float(0)
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulator / self.STEP
+
+    def reset(self) -> None:
+        self.accumulator = float(0)
+
+    def advance(self, frame_dt: float) -> int:
+        self.accumulator += frame_dt
+
+        steps = int(self.accumulator // self.STEP)
+        self.accumulator -= steps * self.STEP
+
+        if steps > self.MAX_STEPS:
+            steps = self.MAX_STEPS
+
+        return steps
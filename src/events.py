@@ -0,0 +1,57 @@
+from collections import defaultdict
+from time import perf_counter
+from typing import Any, Callable, DefaultDict, Dict, Hashable, Iterable, List
+
+import pygame as pg
+
+EventHandler = Callable[[Any], None]
+
+
+class EventDispatcher:
+    """
+    Handlers by event type. The SDL events of the frame are dispatched as pygame Events,
+    the game events are emitted with their data and handled at once, in the same frame.
+    Count the events dispatched in the frame and the time spent in their handlers.
+    """
+    def __init__(self) -> None:
+        self.handlers: DefaultDict[Hashable, List[EventHandler]] = defaultdict(list)
+        self.depth = int(0) # Events emitted by a handler are timed with it.
+        self.count = int(0)
+        self.time = float(0)
+
+    def subscribe(self, event_type: Hashable, handler: EventHandler) -> None:
+        self.handlers[event_type].append(handler)
+
+    def unsubscribe(self, event_type: Hashable, handler: EventHandler) -> None:
+        self.handlers[event_type].remove(handler)
+
+    def emit(self, event_type: Hashable, data: Any = None) -> None:
+        handlers = self.handlers.get(event_type)
+        if not handlers: return
+
+        self.count += 1
+        self.depth += 1
+        start = perf_counter()
+        try:
+            for handler in handlers:
+                handler(data)
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.time += perf_counter() - start
+
+    def dispatch(self, events: Iterable[pg.event.Event]) -> None:
+        for event in events:
+            self.emit(event.type, event)
+
+    def allow_subscribed(self) -> None:
+        """Only the SDL events with a handler reach the queue, the others are dropped by SDL."""
+        pg.event.set_blocked(None)
+        pg.event.set_allowed([event_type for event_type in self.handlers if isinstance(event_type, int)])
+
+    def begin_frame(self) -> None:
+        self.count = 0
+        self.time = float(0)
+
+    def stats(self) -> Dict[str, float]:
+        return {'events': self.count, 'events ms': round(self.time * 1000, 3)}
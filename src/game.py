@@ -1,21 +1,34 @@
 import pygame as pg
-from pygame.locals import QUIT, MOUSEBUTTONDOWN, K_ESCAPE, K_BACKSPACE
+from pygame.locals import QUIT, MOUSEBUTTONDOWN, K_ESCAPE, K_BACKSPACE, K_F3
 
-from time import time
+from os import path
+from time import perf_counter
 from sys import exit
+import logging
+from typing import Dict, List, Tuple, Union
 
 from src.const.settings import *
-
-pg.mixer.pre_init(44100, -16, 2, 512)
-pg.init()
-pg.mixer.set_num_channels(64)
-pg.display.set_caption(GAME_NAME)
-
+from src.systems import STARTUP, init_video, init_fonts, quit_all
 from src.entities import Ball, Score
-from src.utils import load_font, load_img, load_sound
+from src.asset_manager import AssetManager
+from src.audio import AudioManager
 from src.ui.menu import StartingMenu
+from src.ui.button import ButtonAnimate, ButtonList
 from .ui.screen_effect import CRS
-from src.level import Level
+from .ui.dirty_renderer import DirtyRenderer
+from .ui.display import SurfaceDisplay, TextureDisplay, new_surface
+from .ui.blit_audit import BlitAudit, AuditDisplay, audited
+from .ui.text_cache import SHARED_TEXT_CACHE
+from src.level import Level, CrazyLevel
+from src.core.timestep import FixedStep
+from src.core.replay import Replay, ReplayRecorder, ReplayPlayer
+from src.net.session import NetPeer
+from src.profiler import FrameProfiler
+from src.events import EventDispatcher
+from src.controls import InputManager
+from src.pacing import FramePacer, SUSPENDED
+
+logger = logging.getLogger(__name__)
 
 
 class CrazyPong():
@@ -25,19 +38,66 @@ class CrazyPong():
     background: pg.Surface
     starting_menu: StartingMenu
     level:Level = None
-
-    def __init__(self) -> None:
-
-        self.clock = pg.time.Clock()
-        self.display_surf = pg.display.set_mode(SCREEN_RECT.size)
+    dirty_renderer: DirtyRenderer = None
+
+    def __init__(self, show_startup_times: bool = False, profile_csv: str = None,
+                 record: str = None, replay: str = None, replay_speed: int = 1, net: NetPeer = None,
+                 difficulty: str = AI['difficulty'], backend: str = RENDERER['backend'],
+                 window_size: Tuple[int, int] = RENDERER['window_size'], fullscreen: bool = RENDERER['fullscreen'],
+                 audio: bool = AUDIO['enabled'], audio_buffer: int = AUDIO['buffer'],
+                 blit_audit: bool = RENDERER['blit_audit'], input_latency: bool = INPUT['measure']) -> None:
+        """
+        show_startup_times: print the startup phases after the first frame.
+        profile_csv: file where the frame profiler buffer is written on quit.
+        record: file name of the replays, each game is written to its own FILE-N when it is left.
+        replay: replay file played instead of the menu, replay_speed physics steps per step of time.
+        net: NetHost or NetClient, a network game is played instead of the menu.
+        difficulty: AI level of the one player games.
+        backend: 'surface' or 'texture', see src/ui/display.py. window_size and fullscreen: texture backend only.
+        audio: False to play without any sound, audio_buffer: samples per audio device buffer.
+        blit_audit: log the blits converting their source pixels, see src/ui/blit_audit.py.
+        input_latency: measure the latency from the input events to the flip, see src/controls.py.
+        """
+        init_video()
+        init_fonts()
+
+        self.events = EventDispatcher()
+        self.controls = InputManager(self.events, input_latency)
+        self.pacer = FramePacer(self.controls.poll if input_latency else None)
+        self.timestep = FixedStep()
+        self.profiler = FrameProfiler()
+        self.profile_csv = profile_csv
+        if backend == 'texture':
+            self.display = TextureDisplay(window_size, fullscreen)
+        else:
+            self.display = SurfaceDisplay()
+        self.blit_audit = None
+        if blit_audit:
+            self.blit_audit = BlitAudit()
+            self.display = AuditDisplay(self.display, self.blit_audit)
+        self.display_surf = self.display.surface
 
         self.paddles_grp = pg.sprite.Group()
         self.ball_grp = pg.sprite.GroupSingle()
 
         self.state = str('menu')
+        self.level_assets_loaded = bool(False)
+        self.shown_buttons = None
+        self.show_startup_times = show_startup_times
+        self.record = record
+        self.record_file: str = None
+        self.replay = replay
+        self.replay_speed = replay_speed
+        self.net = net
+        self.difficulty = difficulty
+        self.audio_enabled = audio
+        self.audio_buffer = audio_buffer
+
+        self.subscribe_events()
+        STARTUP.mark('init')
 
     def create_background(self):
-        tmp_surf = pg.Surface(self.display_surf.get_size())
+        tmp_surf = new_surface(self.display_surf.get_size())
         tmp_surf.fill(BG_CLR)
 
         pg.draw.rect(tmp_surf, FONT_CLR, (
@@ -50,48 +110,69 @@ class CrazyPong():
     
     def load(self):
         self.background = self.create_background()
-        pg.display.flip()
+        self.display.flip()
 
-        fonts = {}
-        for name, size in FONT['sizes'].items():
-            fonts[name] = load_font(FONT['family'], size)
+        self.assets = AssetManager()
+        self.audio = AudioManager(self.assets, self.audio_enabled, self.audio_buffer)
+        self.assets.prefetch(ASSETS['menu_sounds'], [CRS_EFFECT['file']])
+        self.assets.prefetch(ASSETS['level_sounds'])
 
-        sounds = {}
-        for sound, data in SOUNDS.items():
-            sounds[sound] = load_sound(data['file'], data['vol'])
+        # Menu assets.
+        self.crs_effect = CRS(self.assets.image(CRS_EFFECT['file'], convert_a=True))
+        if RENDERER['dirty_rects']:
+            self.dirty_renderer = DirtyRenderer(self.background, self.crs_effect, self.display)
+            if self.blit_audit is not None:
+                self.dirty_renderer.scene = audited(self.dirty_renderer.scene, self.blit_audit)
 
-        self.crs_effect = CRS(load_img(CRS_EFFECT['file'], convert_a=True))
+        ButtonAnimate.FONT = self.assets.font('default')
+        ButtonAnimate.CLICK_SOUND = self.audio.effect('button')
+        ButtonAnimate.DISPATCHER = self.events
 
-        from src.ui.button import ButtonAnimate
-        ButtonAnimate.FONT = fonts['default']
-        ButtonAnimate.CLICK_SOUND = sounds['button']
+        self.starting_menu = StartingMenu({name: self.assets.font(name) for name in ('default', 'title')})
+        FrameProfiler.FONT = self.assets.font('profiler')
 
-        Level.TXT_FONT = fonts['win_msg']
-        Level.COUNTER_FONT = fonts['counter']
-        Level.BUTTONS = [ButtonAnimate(button[0], button[1]) for button in HUD['buttons']]
-        Level.SCORE_SOUND = sounds['score']
-        Level.WIN_SOUND = sounds['win']
-        del ButtonAnimate
+        self.ball = Ball(self.ball_grp)
 
-        Score.FONT = fonts['score']
+    def load_level_assets(self) -> None:
+        """Level only assets, read in background since load and waited for at the first game."""
+        if self.level_assets_loaded: return
 
-        self.starting_menu = StartingMenu(fonts)
+        Level.TXT_FONT = self.assets.font('win_msg')
+        Level.COUNTER_FONT = self.assets.font('counter')
+        Level.BUTTONS = [ButtonAnimate(button[0], button[1]) for button in HUD['buttons']]
+        Level.CONTROLS = self.controls
+        Level.SCORE_SOUND = self.audio.effect('score')
+        Level.WIN_SOUND = self.audio.effect('win')
 
-        Ball.HIT_SOUND = sounds['ball']
-        self.ball = Ball(self.ball_grp)
+        Score.FONT = self.assets.font('score')
+        Ball.HIT_SOUND = self.audio.effect('ball')
+
+        self.level_assets_loaded = bool(True)
     
     def set_state(self, new_state: str) -> None:
         if self.state == new_state or type(new_state) != str:
             return
         
         self.state = new_state
+        self.controls.clear_pending()
+
+        if self.dirty_renderer is not None:
+            self.dirty_renderer.invalidate()
         
         if new_state == 'quit':
             self.quit()
     
-    def set_game_type(self, type_target: str) -> None:
-        self.level = Level(type_target, self.ball, self.ball_grp)
+    def set_game_type(self, type_target: str, driver: Union[ReplayPlayer, NetPeer] = None) -> None:
+        self.load_level_assets()
+        if type_target == 'crazy':
+            self.level = CrazyLevel(self.ball, self.ball_grp)
+        else:
+            if driver is None and self.record:
+                driver = ReplayRecorder(type_target, difficulty=self.difficulty)
+                self.record_file = self.next_record_file()
+            self.level = Level(type_target, self.ball, self.ball_grp, driver=driver, difficulty=self.difficulty)
         self.set_state('play')
+        self.timestep.reset()
         self.reset_mouse_cursor()
         self.level.start()
     
@@ -99,71 +180,232 @@ class CrazyPong():
         if pg.mouse.get_cursor()[0] == pg.SYSTEM_CURSOR_HAND:
             pg.mouse.set_cursor(pg.SYSTEM_CURSOR_ARROW)
 
+    def next_record_file(self) -> str:
+        """FILE-N with the first N not used yet, the replays of the previous games and sessions are kept."""
+        base, extension = path.splitext(self.record)
+        index = int(1)
+        while path.exists(f"{base}-{index}{extension}"):
+            index += 1
+        return f"{base}-{index}{extension}"
+
+    def save_recording(self) -> None:
+        if self.level is not None and isinstance(self.level.driver, ReplayRecorder):
+            self.level.driver.save(self.record_file)
+            logger.info("Replay of %d steps written to %s", len(self.level.driver.replay), self.record_file)
+
+    def close_net(self) -> None:
+        if self.net is not None:
+            self.net.close()
+            self.net = None
+
     def quit_current_game(self, play_sound: bool) -> None:
         if play_sound:
             self.starting_menu.buttons[0].CLICK_SOUND.play()
 
+        self.save_recording()
+        if self.level.driver is self.net:
+            self.close_net()
         self.level.destroy()
         self.set_state('menu')
         self.level = None
 
     def quit(self) -> None:
-        pg.mixer.stop()
-        pg.mixer.quit()
-
-        pg.display.quit()
-        pg.quit()
+        logger.info("Frame pacing: %s", self.pacer.report())
+        if self.controls.measure:
+            logger.info("Input to flip latency: %s", self.controls.report() or 'no input')
+        if self.blit_audit is not None:
+            logger.info("Slow blits: %s", '\n'.join([''] + self.blit_audit.report()) or 'none')
+        if self.profile_csv:
+            self.profiler.dump_csv(self.profile_csv)
+        self.save_recording()
+        self.close_net()
+
+        self.assets.shutdown()
+        quit_all()
         exit()
     
+    def subscribe_events(self) -> None:
+        """Handlers of the SDL events and the game events, every other SDL event is blocked."""
+        events = self.events
+        events.subscribe(QUIT, self.on_quit)
+        events.subscribe(pg.WINDOWEXPOSED, self.on_window_exposed)
+        events.subscribe(pg.KEYDOWN, self.on_key_down)
+        events.subscribe(MOUSEBUTTONDOWN, self.on_mouse_button_down)
+        events.subscribe(pg.MOUSEMOTION, self.on_mouse_motion)
+        events.subscribe(BTN_CLICKED, self.on_button_clicked)
+        for event_type in (pg.KEYDOWN, MOUSEBUTTONDOWN, pg.MOUSEMOTION, pg.JOYAXISMOTION, pg.JOYHATMOTION, pg.JOYBUTTONDOWN):
+            events.subscribe(event_type, self.on_input)
+        events.subscribe(pg.WINDOWFOCUSGAINED, lambda e: self.pacer.set_focus(True))
+        events.subscribe(pg.WINDOWFOCUSLOST, lambda e: self.pacer.set_focus(False))
+        events.subscribe(pg.WINDOWMINIMIZED, lambda e: self.pacer.set_minimized(True))
+        events.subscribe(pg.WINDOWRESTORED, lambda e: self.pacer.set_minimized(False))
+        events.allow_subscribed()
+
+    def on_quit(self, e: pg.event.Event) -> None:
+        self.set_state('quit')
+
+    def on_window_exposed(self, e: pg.event.Event) -> None:
+        if self.dirty_renderer is not None:
+            self.dirty_renderer.invalidate()
+
+    def on_input(self, e: pg.event.Event) -> None:
+        self.pacer.activity()
+
+    def on_key_down(self, e: pg.event.Event) -> None:
+        if e.key == K_F3:
+            self.profiler.toggle_overlay()
+        elif self.level is not None and (e.key == K_ESCAPE or e.key == K_BACKSPACE):
+            self.quit_current_game(True)
+
+    def on_mouse_motion(self, e: pg.event.Event) -> None:
+        self.update_hover()
+
+    def on_mouse_button_down(self, e: pg.event.Event) -> None:
+        if e.button != 1: return
+
+        if self.level is not None and self.level.winned:
+            self.level.handle_btn_click()
+        elif self.state == 'menu':
+            self.starting_menu.handle_btn_click()
+
+    def on_button_clicked(self, data: Dict[str, str]) -> None:
+        match data['action']:
+            case 'quit':
+                self.set_state('quit')
+            case 'play':
+                self.set_game_type(data['target_level'])
+            case 'restart':
+                self.level.reset()
+                self.reset_mouse_cursor()
+            case 'backmenu':
+                self.quit_current_game(False)
+                self.reset_mouse_cursor()
+
+    def visible_buttons(self) -> ButtonList:
+        if self.state == 'menu':
+            return self.starting_menu.buttons
+        if self.state == 'play' and self.level.winned:
+            return self.level.BUTTONS
+        return []
+
+    def update_hover(self) -> None:
+        """Hover of the visible buttons, when the mouse moves or they appear."""
+        mouse_pos = self.display.mouse_pos()
+        for button in self.visible_buttons():
+            button.check_hover(mouse_pos)
+
+    def idle(self) -> bool:
+        """Nothing moves without an input: the frame rate can drop."""
+        return self.state == 'menu' or (self.state == 'play' and self.level.winned)
+
+    def check_clicks(self) -> None:
+        """Buttons at the end of their click animation emit BTN_CLICKED, handled before the render."""
+        if self.state == 'menu':
+            self.starting_menu.check_clicks()
+        elif self.state == 'play' and self.level.winned:
+            self.level.check_clicks()
+
+    def render(self, steps: int, inputs: List[int] = None) -> None:
+        """inputs: paddles inputs for scripted games, read from the keyboard if None."""
+        profiler = self.profiler
+        self.audio.begin_frame()
+        counters = self.events.stats()
+        counters.update(self.pacer.counters())
+
+        # The input events queued since the start of the frame, right before the physics.
+        self.controls.poll()
+        if self.state == 'play':
+            if isinstance(self.level.driver, ReplayPlayer):
+                steps *= self.replay_speed
+            if steps:
+                self.controls.latch()
+            self.level.update(self.timestep, steps, inputs)
+            counters.update(self.level.stats())
+        counters.update(self.audio.stats())
+        counters.update(self.controls.stats())
+        counters.update(SHARED_TEXT_CACHE.counters())
+        if self.blit_audit is not None:
+            counters.update(self.blit_audit.stats())
+            self.blit_audit.begin_frame()
+        profiler.set_counters(counters)
+        profiler.mark('physics')
+
+        if self.dirty_renderer is not None:
+            surface = self.dirty_renderer.begin()
+        else:
+            surface = self.display_surf
+            surface.blit(self.background, (0, 0))
+
+        buttons = self.visible_buttons()
+        if buttons != self.shown_buttons:
+            self.shown_buttons = buttons
+            self.update_hover()
+
+        if self.state == 'menu':
+            self.starting_menu.render(surface)
+        elif self.state == 'play':
+            self.level.render_frame(surface)
+
+        overlay_rect = profiler.render(surface)
+        profiler.mark('render')
+
+        if self.dirty_renderer is not None:
+            rects = self.starting_menu.dirty_rects() if self.state == 'menu' else self.level.dirty_rects()
+            if overlay_rect is not None:
+                rects.append(overlay_rect)
+
+            self.dirty_renderer.compose(self.display_surf, rects)
+            profiler.mark('crs')
+            self.dirty_renderer.flip()
+        else:
+            self.crs_effect.render(self.display_surf)
+            profiler.mark('crs')
+            self.display.flip()
+
+        self.controls.presented()
+        profiler.mark('flip')
+
     def run(self) -> None:
         self.load()
-        last_dt = time()
+        STARTUP.mark('asset load')
+
+        if self.replay:
+            replay = Replay.load(self.replay)
+            self.set_game_type(replay.level_type, ReplayPlayer(replay))
+        elif self.net is not None:
+            self.net.open()
+            self.set_game_type('twoplayer', self.net)
+        last_dt = perf_counter()
+        first_frame = bool(True)
+        self.pacer.start()
 
         while True:
-            current_time = time()
+            self.profiler.begin_frame()
+            current_time = perf_counter()
             dt = current_time - last_dt
             last_dt = current_time
 
-            # Event loop.
-            for e in pg.event.get():
-                if e.type == QUIT:
-                    self.set_state('quit')
-
-                if self.level is not None:
-                    if e.type == BALL_OUT_SCREEN:
-                        self.level.add_point_to_paddle(e.target)
-                    
-                    if self.level.winned and e.type == MOUSEBUTTONDOWN and e.button == 1:
-                        self.level.handle_btn_click()
-
-                    if e.type == pg.KEYDOWN and (e.key == K_ESCAPE or e.key == K_BACKSPACE):
-                        self.quit_current_game(True)
-                        break
-
-                if self.state == 'menu' and e.type == MOUSEBUTTONDOWN and e.button == 1:
-                    self.starting_menu.handle_btn_click()
-
-                if e.type == BTN_CLICKED:
-                    match e.action:
-                        case 'quit':
-                            self.set_state('quit')
-                        case 'play':
-                            self.set_game_type(e.target_level)
-                        case 'restart':
-                            self.level.reset()
-                            self.reset_mouse_cursor()
-                        case 'backmenu':
-                            self.quit_current_game(False)
-                            self.reset_mouse_cursor()
-                    
-            self.display_surf.blit(self.background, (0, 0))
-
-            if self.state == 'menu':
-                self.starting_menu.render(self.display_surf)
-            elif self.state == 'play':
-                self.level.run(self.display_surf, dt)
-
-            self.crs_effect.render(self.display_surf)
-
-            pg.display.flip()
-            self.clock.tick(self.FPS)
+            self.events.begin_frame()
+            self.events.dispatch(pg.event.get())
+            self.check_clicks()
+            self.profiler.mark('events')
+
+            # A network game keeps stepping, the peer is still playing.
+            if self.pacer.update_mode(self.idle(), self.net is None) == SUSPENDED:
+                # Nothing is rendered and the time spent there is not simulated.
+                self.pacer.wait()
+                last_dt = perf_counter()
+                continue
+
+            self.render(self.timestep.advance(dt))
+
+            if first_frame:
+                STARTUP.mark('first flip')
+                logger.info("First interactive frame %.1f ms after start", STARTUP.total() * 1000)
+                if self.show_startup_times:
+                    print(STARTUP.report())
+                first_frame = bool(False)
+
+            self.pacer.wait()
+            self.profiler.mark('wait')
+            self.profiler.end_frame()
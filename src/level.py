@@ -1,21 +1,33 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from itertools import repeat
+from typing import TYPE_CHECKING, Dict, List, Union
 
 if TYPE_CHECKING:
     from src.entities import Ball
+    from src.net.session import NetHost, NetClient
+    from src.controls import InputManager
 
-from pygame import Surface, sprite, time, mouse, draw, key
+from pygame import Surface, Rect, sprite, draw, key
 from pygame.font import Font
 from pygame.mixer import Sound
-
-from src.const.custom_typing import CollisionValue
-from src.const.settings import SCREEN_RECT, FONT_CLR, BG_CLR, HUD
+from pygame.locals import K_F5
+
+from src.const.custom_typing import SimEvent
+from src.const.settings import SCREEN_RECT, FONT_CLR, BG_CLR, OBJ_CLR, HUD, AI
+from src.core.replay import ReplayRecorder, ReplayPlayer
+from src.core.rewind import RewindBuffer
+from src.core.multiball import MultiBallMatch
+from src.core.simulation import Match, BALL_HIT, POINT_SCORED, MATCH_WON, COUNTER_CHANGED
+from src.core.timestep import FixedStep
 from src.ui.button import ButtonList
+from src.ui.display import new_surface
+from src.ui.text_cache import SHARED_TEXT_CACHE
 from .utils import Text
 from src.entities import Paddle
 
 
 class Level:
+    """Render a Match and feed it with the inputs of the paddles bindings."""
     WIN_TXT_POS = (
         SCREEN_RECT.centerx,
         SCREEN_RECT.height // 2 - HUD['winner_msg_offset']
@@ -26,45 +38,67 @@ class Level:
     SCREEN_W_QUART = SCREEN_RECT.centerx // 2
     FONT_COLOR = FONT_CLR
     BG_COLOR = BG_CLR
+    K_REWIND = K_F5
+    REWIND = bool(True)
 
     TXT_FONT: Font
     COUNTER_FONT: Font
     SCORE_SOUND: Sound
     WIN_SOUND: Sound
     BUTTONS: ButtonList
-
-    def __init__(self, level_type: str, ball: Ball, ball_grp: sprite.GroupSingle) -> None:
+    CONTROLS: InputManager
+
+    def __init__(self, level_type: str, ball: Ball, ball_grp: sprite.GroupSingle, match: Match = None,
+                 driver: Union[ReplayRecorder, ReplayPlayer, NetHost, NetClient] = None,
+                 difficulty: str = AI['difficulty']) -> None:
+        """
+        driver: owns the match and steps it instead of Match.step, to record it, play a recording
+        or play over the network.
+        difficulty: AI level of a new match.
+        """
         self.paddles_grp = sprite.Group()
         self.ball_grp = ball_grp
 
-        self.winned = bool(False)
         self.started = bool(False)
-        self.counter = int(-1)
-        self.reset_time = int(0)
+        self.driver = driver
+
+        if driver is not None:
+            self.match = driver.match
+        else:
+            self.match = match if match is not None else Match(level_type, difficulty=difficulty)
 
+        # A driven match follows its recording or the host, it can not go back.
+        self.rewind = RewindBuffer() if self.REWIND and driver is None else None
         self.ball = ball
         self.paddles = [
-            Paddle('left', 'player', self.SCREEN_W_QUART, self.paddles_grp),
-            Paddle('right', 'ai' if level_type == 'oneplayer' else 'player', self.SCREEN_W_QUART * 3, self.paddles_grp)
+            Paddle(self.match.paddles[0], self.SCREEN_W_QUART, self.paddles_grp),
+            Paddle(self.match.paddles[1], self.SCREEN_W_QUART * 3, self.paddles_grp)
         ]
+        self.store_positions()
+        self.sync()
 
-    def reset(self) -> None:
-        for paddle in self.paddles:
-            paddle.reset()
+    @property
+    def winned(self) -> bool:
+        return self.match.winned
 
-        self.winned = bool(False)
-
-        self.reset_time = time.get_ticks()
+    def reset(self) -> None:
+        if self.driver is not None:
+            self.driver.reset()
+        else:
+            self.match.reset()
 
-        self.ball.reset(True)
+        if self.rewind is not None:
+            self.rewind.clear()
+        self.update_counter(self.match.counter)
+        self.store_positions()
+        self.sync()
 
     def start(self) -> None:
         self.started = not self.started
-        self.reset_time = time.get_ticks()
+        self.match.start()
+        self.update_counter(self.match.counter)
 
     def destroy(self) -> None:
-        self.ball.reset(True)
-
         for paddle in self.paddles:
             paddle.destroy()
 
@@ -74,126 +108,200 @@ class Level:
                 button.click()
                 break
 
+    def check_clicks(self) -> None:
+        for button in self.BUTTONS:
+            button.check_click()
+
     def counter_active(self) -> bool:
-        return self.reset_time != 0
-    
-    def update_counter(self, value: int) -> None:
-        self.counter = value
+        return self.match.counter_active()
 
-        self.counter_txt = self.COUNTER_FONT.render(str(self.counter), True, self.FONT_COLOR)
+    def update_counter(self, value: int) -> None:
+        self.counter_txt = SHARED_TEXT_CACHE.render_number(self.COUNTER_FONT, value, self.FONT_COLOR)
         self.counter_rect = self.counter_txt.get_rect(midbottom=self.COUNTER_POS)
 
         self.counter_bg = self.counter_rect.copy()
         self.counter_bg.move_ip(0, -self.COUNT_BG_OFFSET)
 
-    def check_counter(self) -> None:
-        reset_time = time.get_ticks() - self.reset_time
-
-        if reset_time <= 700 and self.counter != 3:
-            self.update_counter(3)
-        elif 700 < reset_time <= 1400 and self.counter != 2:
-            self.update_counter(2)
-        elif 1400 < reset_time <= 2100 and self.counter != 1:
-            self.update_counter(1)
-        elif reset_time >= 2100:
-            self.ball.set_active(True)
-            self.reset_time = int(0)
-            self.update_counter(-1)
-
-    def add_point_to_paddle(self, target: str) -> None:
-        """target is the side of the paddle targetted"""
-        if type(target) != str: return
+    def create_win_text(self) -> None:
+        winner = self.match.winner
+        self.win_text = Text(
+            self.TXT_FONT,
+            "The AI is the winner" if winner.type == 'ai' else f"The player {winner.side} is the winner",
+            self.WIN_TXT_POS,
+            'center',
+            bg=True,
+            bg_offset_y= 3
+        )
+
+    def handle_events(self, events: List[SimEvent]) -> None:
+        for event_type, target in events:
+            if event_type == BALL_HIT:
+                self.ball.play_sfx()
+            elif event_type == POINT_SCORED:
+                # The ball has been teleported, do not interpolate it.
+                self.store_positions()
+                if not self.match.winned:
+                    self.SCORE_SOUND.play()
+            elif event_type == MATCH_WON:
+                self.create_win_text()
+                self.WIN_SOUND.play()
+            elif event_type == COUNTER_CHANGED:
+                self.update_counter(self.match.counter)
+
+    def store_positions(self) -> None:
+        """Keep the positions before a step to interpolate the rendering."""
+        self.previous_positions = (
+            self.match.ball.x,
+            self.match.ball.y,
+            [paddle.y for paddle in self.match.paddles]
+        )
+
+    def sync(self, alpha: float = 1.0) -> None:
+        """Move the sprites between the previous and current positions."""
+        ball = self.match.ball
+        prev_x, prev_y, prev_paddles = self.previous_positions
+
+        for paddle, prev_paddle_y in zip(self.paddles, prev_paddles):
+            paddle.sync(prev_paddle_y + (paddle.state.y - prev_paddle_y) * alpha)
+
+        self.ball.sync(prev_x + (ball.x - prev_x) * alpha, prev_y + (ball.y - prev_y) * alpha)
+
+    def dirty_rects(self) -> List[Rect]:
+        """Regions drawn by render_frame which can change between two frames."""
+        rects = [sprite.rect for sprite in self.paddles_grp]
 
-        for paddle in self.paddles:
-            if paddle.side == target:
-                paddle.score.add_point()
-                winned = paddle.winned()
+        if self.winned:
+            rects.append(self.win_text.rect)
+            rects.extend(button.get_rect() for button in self.BUTTONS)
+            return rects
 
-                if not winned:
-                    self.reset_time = time.get_ticks()
-                    self.SCORE_SOUND.play()
+        if self.counter_active():
+            rects.append(self.counter_bg.union(self.counter_rect))
 
-                if winned:
-                    self.winned = winned
-                    self.win_text = Text(
-                        self.TXT_FONT,
-                        "The AI is the winner" if paddle.type == 'ai' else f"The player {paddle.side} is the winner",
-                        self.WIN_TXT_POS,
-                        'center',
-                        bg=True,
-                        bg_offset_y= 3
-                    )
-
-                    self.WIN_SOUND.play()
-                
-                self.ball.reset(self.winned)
-                break
+        rects.append(self.ball.rect)
+        return rects
 
-    def intercept_collision(self, dist_x: int, dist_y: int, ball: 'Ball', paddle: Paddle) -> CollisionValue:
-        abs_distx = abs(dist_x) # abs(self.ball.rect.centerx - paddle.rect.centerx)
-        abs_disty = abs(dist_y) # abs(self.ball.rect.centery - paddle.rect.centery)
-        
-        # Too far of x or y axis to collide.
-        if abs_distx > paddle.H_WIDTH + ball.RADIUS or abs_disty > paddle.H_HEIGHT + ball.RADIUS:
-            return False, None, None
-        
-        # Vertical Collision.
-        if abs_distx <= paddle.H_WIDTH:
-            return True, None, 'top' if dist_y < 0 else 'bottom'
-        
-        # Horizontal Collision.
-        if abs_disty <= paddle.H_HEIGHT:
-            return True, None, 'left' if dist_x < 0 else 'right'
-        
-        # Corner Collision.
-        corner_dist_sq = (abs_distx - paddle.H_WIDTH) ** 2 + (abs_disty - paddle.H_HEIGHT) ** 2
-        if corner_dist_sq <= ball.RADIUS_SQ:
-            if ball.rect.centerx < paddle.rect.centerx:
-                return True, 'topleft' if ball.rect.centery < paddle.rect.centery else 'bottomleft', None
-            else:
-                return True, 'topright' if ball.rect.centery < paddle.rect.centery else 'bottomright', None
-
-        return False, None, None
-    
     def render_frame(self, display_surf: Surface) -> None:
         self.paddles_grp.draw(display_surf)
 
         if self.winned:
             display_surf.blit(self.win_text.surf, self.win_text.rect)
-            mouse_pos = mouse.get_pos()
             for button in self.BUTTONS:
-                button.render(display_surf, mouse_pos)
+                button.render(display_surf)
             return
-        
+
         if self.counter_active():
             draw.rect(display_surf, self.BG_COLOR, self.counter_bg)
             self.ball_grp.draw(display_surf)
             display_surf.blit(self.counter_txt, self.counter_rect)
             return
-        
+
         self.ball_grp.draw(display_surf)
 
-    def run(self, display_surf: Surface, dt: float) -> None:
-        if not self.winned:
-            if self.counter_active():
-                self.check_counter()
-        
-        keys = key.get_pressed()
-        self.paddles_grp.update(dt, keys, self.ball)
+    def step_match(self, dt: float, inputs: List[int]) -> List[SimEvent]:
+        return self.match.step(dt, inputs)
 
-        if self.ball.active:
-            self.ball.update(dt)
+    def rewind_step(self) -> None:
+        """Step the match back, the HUD follows the restored state."""
+        counter, winned = self.match.counter, self.match.winned
+        if not self.rewind.restore(self.match):
+            return
+
+        if self.match.counter != counter:
+            self.update_counter(self.match.counter)
+        if self.match.winned and not winned:
+            self.create_win_text()
+
+    def update(self, timestep: FixedStep, steps: int, inputs: List[int] = None) -> None:
+        """
+        Run the physics steps of this frame and place the sprites, interpolated by timestep.alpha.
+        The match goes back one step per step while K_REWIND is held.
+            inputs: paddles inputs, from CONTROLS if None.
+        """
+        rewinding = bool(False)
+        if inputs is None:
+            inputs = [paddle.get_input(self.CONTROLS) for paddle in self.paddles]
+            rewinding = self.rewind is not None and key.get_pressed()[self.K_REWIND]
+
+        step = self.step_match if self.driver is None else self.driver.step
+        for _ in range(steps):
+            self.store_positions()
+
+            if rewinding:
+                self.rewind_step()
+                continue
+
+            if self.rewind is not None:
+                self.rewind.save(self.match)
+            self.handle_events(step(timestep.STEP, inputs))
+
+        self.sync(timestep.alpha)
+
+    def stats(self) -> Dict[str, float]:
+        """Counters of the last frame, shown by the profiler overlay. The AI trajectory predictions since the start."""
+        if self.match.ai is None:
+            return {}
+        return {'ai predictions': self.match.ai.predictions}
+
+
+class CrazyLevel(Level):
+    """Render a MultiBallMatch: every ball is blitted from one image."""
+    RADIUS = MultiBallMatch.RADIUS
+    # A state is a few KB of balls, the rewind keeps the one ball matches.
+    REWIND = bool(False)
+
+    match: MultiBallMatch
+
+    def __init__(self, ball: Ball, ball_grp: sprite.GroupSingle, match: MultiBallMatch = None) -> None:
+        self.ball_image = new_surface((self.RADIUS * 2, self.RADIUS * 2), alpha=True)
+        draw.circle(self.ball_image, OBJ_CLR, (self.RADIUS, self.RADIUS), self.RADIUS)
+        self.narrow_tests = int(0)
+
+        Level.__init__(self, 'crazy', ball, ball_grp, match if match is not None else MultiBallMatch())
+
+    def store_positions(self) -> None:
+        self.previous_positions = (
+            self.match.x.copy(),
+            self.match.y.copy(),
+            [paddle.y for paddle in self.match.paddles]
+        )
+
+    def sync(self, alpha: float = 1.0) -> None:
+        prev_x, prev_y, prev_paddles = self.previous_positions
+        for paddle, prev_paddle_y in zip(self.paddles, prev_paddles):
+            paddle.sync(prev_paddle_y + (paddle.state.y - prev_paddle_y) * alpha)
+
+        # Top left corners, balls teleported by a point are not interpolated.
+        x = prev_x + (self.match.x - prev_x) * alpha - self.RADIUS
+        y = prev_y + (self.match.y - prev_y) * alpha - self.RADIUS
+        self.ball_positions = list(zip(x.astype(int).tolist(), y.astype(int).tolist()))
+
+    def dirty_rects(self) -> List[Rect]:
+        """The balls are everywhere."""
+        return [SCREEN_RECT.copy()]
+
+    def render_frame(self, display_surf: Surface) -> None:
+        self.paddles_grp.draw(display_surf)
+        display_surf.fblits(zip(repeat(self.ball_image), self.ball_positions))
 
-            if self.ball.pos.x < SCREEN_RECT.centerx:
-                paddle = self.paddles[0]
-            else:
-                paddle = self.paddles[1]
+        if self.winned:
+            display_surf.blit(self.win_text.surf, self.win_text.rect)
+            for button in self.BUTTONS:
+                button.render(display_surf)
+            return
+
+        if self.counter_active():
+            draw.rect(display_surf, self.BG_COLOR, self.counter_bg)
+            display_surf.blit(self.counter_txt, self.counter_rect)
 
-            dist_x = self.ball.rect.centerx - paddle.rect.centerx
-            dist_y = self.ball.rect.centery - paddle.rect.centery
+    def update(self, timestep: FixedStep, steps: int, inputs: List[int] = None) -> None:
+        self.narrow_tests = int(0)
+        Level.update(self, timestep, steps, inputs)
 
-            collision, corner, side = self.intercept_collision(dist_x, dist_y, self.ball, paddle)
-            if collision:
-                self.ball.paddle_collision(side, corner, dist_x, dist_y, paddle)
+    def step_match(self, dt: float, inputs: List[int]) -> List[SimEvent]:
+        events = self.match.step(dt, inputs)
+        self.narrow_tests += self.match.narrow_tests
+        return events
 
-        self.render_frame(display_surf)
\ No newline at end of file
+    def stats(self) -> Dict[str, float]:
+        return {'balls': self.match.count, 'narrow tests': self.narrow_tests}
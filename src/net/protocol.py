@@ -0,0 +1,43 @@
+"""
+UDP packets of the network mode, little-endian, first byte is the packet type.
+The host owns the match (left paddle), the client sends the inputs of the right paddle.
+"""
+from struct import Struct
+from typing import Iterable, List, Tuple
+
+from src.const.settings import NET
+from src.core.simulation import STATE
+
+VERSION = 1
+
+HELLO = 1
+WELCOME = 2
+INPUT = 3
+STATE_UPDATE = 4
+BYE = 5
+
+# Type, version.
+HANDSHAKE = Struct('<BB')
+# Type, sequence of the newest input, client send time, inputs history.
+INPUT_PACKET = Struct('<BIdH')
+# Type, host step, last input sequence applied, echoed client send time, host paddle input, then the match STATE.
+STATE_HEADER = Struct('<BIIdB')
+STATE_PACKET_SIZE = STATE_HEADER.size + STATE.size
+
+# 2 bits per input, the newest in the low bits: each packet repeats the previous inputs to survive losses.
+HISTORY = NET['input_history']
+INPUT_BITS = 2
+INPUT_MASK = (1 << INPUT_BITS) - 1
+
+
+def pack_history(commands: Iterable[int]) -> int:
+    """commands: the inputs, oldest first, only the last HISTORY are kept."""
+    history = int(0)
+    for command in commands:
+        history = (history << INPUT_BITS) | (command & INPUT_MASK)
+    return history & ((1 << (HISTORY * INPUT_BITS)) - 1)
+
+
+def unpack_history(seq: int, history: int) -> List[Tuple[int, int]]:
+    """(sequence, input) of the packed inputs, newest first."""
+    return [(seq - index, (history >> (index * INPUT_BITS)) & INPUT_MASK) for index in range(HISTORY) if seq - index > 0]
@@ -0,0 +1,356 @@
+"""
+Network two players mode over asyncio UDP. The event loop runs on a background thread, the game
+thread sends packets and polls the received ones once per physics step.
+NetHost and NetClient are Level drivers: they own the match and step it instead of Match.step.
+"""
+import asyncio
+import logging
+from collections import deque
+from math import hypot
+from random import Random
+from threading import Thread
+from time import perf_counter
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from src.const.custom_typing import SimEvent
+from src.const.settings import NET
+from src.core.simulation import Match, BALL_HIT, POINT_SCORED, MATCH_WON, COUNTER_CHANGED
+from .protocol import (
+    VERSION, HELLO, WELCOME, INPUT, STATE_UPDATE, BYE,
+    HANDSHAKE, INPUT_PACKET, STATE_HEADER, STATE_PACKET_SIZE, HISTORY, pack_history, unpack_history
+)
+
+logger = logging.getLogger(__name__)
+
+Address = Tuple[str, int]
+
+
+class LossyLink:
+    """Delay and drop the sent packets, to try the prediction on localhost."""
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, loss: float = 0.0, seed: int = None) -> None:
+        """latency and jitter in seconds, one way. loss: ratio of dropped packets."""
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = Random(seed)
+        self.dropped = int(0)
+
+    def send(self, loop: asyncio.AbstractEventLoop, transport: asyncio.DatagramTransport, data: bytes, addr: Address) -> None:
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter) if self.jitter else self.latency
+        if delay > 0:
+            loop.call_later(delay, self.send_now, transport, data, addr)
+        else:
+            self.send_now(transport, data, addr)
+
+    @staticmethod
+    def send_now(transport: asyncio.DatagramTransport, data: bytes, addr: Address) -> None:
+        if not transport.is_closing():
+            transport.sendto(data, addr)
+
+
+class Receiver(asyncio.DatagramProtocol):
+    def __init__(self, received: Deque[Tuple[bytes, Address]]) -> None:
+        self.received = received
+
+    def datagram_received(self, data: bytes, addr: Address) -> None:
+        self.received.append((data, addr))
+
+
+class NetPeer:
+    """UDP endpoint on its own asyncio loop, the received packets wait in a deque until poll."""
+    STATS_INTERVAL = NET['stats_interval']
+
+    def __init__(self, local_addr: Address, link: LossyLink = None) -> None:
+        self.local_addr = local_addr
+        self.link = link if link is not None else LossyLink()
+        self.received: Deque[Tuple[bytes, Address]] = deque()
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = Thread(target=self.run_loop, name='netplay', daemon=True)
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.stats_time = perf_counter()
+
+    @property
+    def address(self) -> Address:
+        return self.transport.get_extra_info('sockname')
+
+    def run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def open(self) -> None:
+        self.thread.start()
+        endpoint = self.loop.create_datagram_endpoint(lambda: Receiver(self.received), local_addr=self.local_addr)
+        self.transport, _ = asyncio.run_coroutine_threadsafe(endpoint, self.loop).result()
+
+    def send(self, data: bytes, addr: Address) -> None:
+        self.loop.call_soon_threadsafe(self.link.send, self.loop, self.transport, data, addr)
+
+    def poll(self) -> List[Tuple[bytes, Address]]:
+        packets = []
+        while self.received:
+            packets.append(self.received.popleft())
+        return packets
+
+    def stats(self) -> Dict[str, float]:
+        return {'dropped': self.link.dropped}
+
+    def format_stats(self) -> str:
+        return ', '.join(f"{name} {round(value, 1)}" for name, value in self.stats().items())
+
+    def log_stats(self) -> None:
+        """Every STATS_INTERVAL seconds."""
+        now = perf_counter()
+        if now - self.stats_time >= self.STATS_INTERVAL:
+            self.stats_time = now
+            logger.info(self.format_stats())
+
+    def close(self, peer: Optional[Address]) -> None:
+        if self.transport is None: return
+
+        if peer is not None:
+            self.loop.call_soon_threadsafe(self.link.send_now, self.transport, bytes((BYE,)), peer)
+        self.loop.call_soon_threadsafe(self.transport.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(1)
+        self.transport = None
+        logger.info("Closed, %s", self.format_stats())
+
+
+class NetHost(NetPeer):
+    """
+    Authoritative match, left paddle. Every step applies the next input of the client in sequence
+    order, or repeats its last one if it did not arrive, then sends the whole match state.
+    """
+    MAX_BACKLOG = NET['max_backlog']
+
+    def __init__(self, port: int = NET['port'], link: LossyLink = None) -> None:
+        NetPeer.__init__(self, ('0.0.0.0', port), link)
+        self.match = Match('twoplayer')
+        self.peer: Optional[Address] = None
+
+        self.frame = int(0)
+        self.remote_inputs: Dict[int, int] = {}
+        self.next_seq = int(1)
+        self.applied_seq = int(0)
+        self.remote_input = int(0)
+        self.echo_time = float(0)
+        self.newest_seq = int(0)
+
+        self.missed_inputs = int(0)
+        self.state_packet = bytearray(STATE_PACKET_SIZE)
+
+    def handle_packets(self) -> None:
+        for data, addr in self.poll():
+            kind = data[0]
+
+            if kind == HELLO:
+                if self.peer is None and HANDSHAKE.unpack(data)[1] == VERSION:
+                    self.peer = addr
+                    logger.info("Client %s:%d joined", *addr)
+                if addr == self.peer:
+                    self.send(HANDSHAKE.pack(WELCOME, VERSION), addr)
+
+            elif addr != self.peer:
+                continue
+
+            elif kind == INPUT:
+                _, seq, sent_time, history = INPUT_PACKET.unpack(data)
+                if seq > self.newest_seq:
+                    self.newest_seq = seq
+                    self.echo_time = sent_time
+
+                for input_seq, command in unpack_history(seq, history):
+                    if input_seq >= self.next_seq:
+                        self.remote_inputs[input_seq] = command
+
+            elif kind == BYE:
+                logger.info("Client %s:%d left", *addr)
+                self.peer = None
+
+    def next_remote_input(self) -> int:
+        # Buffered inputs are latency: skip the oldest when the client is too far ahead.
+        if self.newest_seq - self.next_seq >= self.MAX_BACKLOG:
+            self.next_seq = self.newest_seq - self.MAX_BACKLOG + 1
+            for seq in [seq for seq in self.remote_inputs if seq < self.next_seq]:
+                del self.remote_inputs[seq]
+
+        if self.next_seq in self.remote_inputs:
+            self.remote_input = self.remote_inputs.pop(self.next_seq)
+            self.applied_seq = self.next_seq
+            self.next_seq += 1
+        else:
+            self.missed_inputs += 1
+
+        return self.remote_input
+
+    def send_state(self, local_input: int) -> None:
+        STATE_HEADER.pack_into(
+            self.state_packet, 0, STATE_UPDATE, self.frame, self.applied_seq, self.echo_time, local_input
+        )
+        self.match.pack_into(self.state_packet, STATE_HEADER.size)
+        self.send(bytes(self.state_packet), self.peer)
+
+    def step(self, dt: float, inputs: Sequence[int]) -> List[SimEvent]:
+        """The local player uses the keys of either paddle."""
+        self.handle_packets()
+        if self.peer is None:
+            # Waiting for a client.
+            return []
+
+        local_input = inputs[0] | inputs[1]
+        events = self.match.step(dt, [local_input, self.next_remote_input()])
+        self.frame += 1
+
+        self.send_state(local_input)
+        self.log_stats()
+        return events
+
+    def reset(self) -> None:
+        self.match.reset()
+
+    def stats(self) -> Dict[str, float]:
+        return {'steps': self.frame, 'missed inputs': self.missed_inputs, 'dropped': self.link.dropped}
+
+    def close(self) -> None:
+        NetPeer.close(self, self.peer)
+
+
+class NetClient(NetPeer):
+    """
+    Right paddle. Steps its own copy of the match with its inputs at once, the host paddle repeating
+    its last known input. Each new host state is restored, then the inputs the host has not applied yet
+    are stepped again on top of it.
+    """
+    HELLO_INTERVAL = NET['hello_interval']
+    MAX_PENDING = NET['max_pending']
+    CORRECTION = NET['correction_threshold']
+    RTT_SMOOTHING = 0.1
+
+    def __init__(self, host: Address, link: LossyLink = None) -> None:
+        NetPeer.__init__(self, ('0.0.0.0', 0), link)
+        self.host = host
+        self.match = Match('twoplayer')
+        self.connected = bool(False)
+        self.hello_time = float(0)
+
+        self.seq = int(0)
+        self.history: Deque[int] = deque(maxlen=HISTORY)
+        self.pending: Deque[Tuple[int, int]] = deque(maxlen=self.MAX_PENDING)
+        self.remote_input = int(0)
+        self.last_state_frame = int(0)
+        # Scores, winner and counter of the last host state, before the pending inputs are stepped on top of it.
+        self.host_result = self.result()
+
+        self.rtt: Optional[float] = None
+        self.corrections = int(0)
+        self.states = int(0)
+
+    def handle_packets(self) -> Optional[bytes]:
+        """Return the newest host state received, the older ones are useless."""
+        latest = None
+
+        for data, addr in self.poll():
+            kind = data[0]
+
+            if kind == WELCOME:
+                if not self.connected:
+                    logger.info("Joined %s:%d", *addr)
+                self.connected = bool(True)
+
+            elif kind == STATE_UPDATE and len(data) == STATE_PACKET_SIZE:
+                self.states += 1
+                frame = STATE_HEADER.unpack_from(data)[1]
+                if frame > self.last_state_frame:
+                    self.last_state_frame = frame
+                    latest = data
+
+            elif kind == BYE:
+                logger.info("Host left")
+                self.connected = bool(False)
+
+        return latest
+
+    def send_hello(self) -> None:
+        now = perf_counter()
+        if now - self.hello_time >= self.HELLO_INTERVAL:
+            self.hello_time = now
+            self.send(HANDSHAKE.pack(HELLO, VERSION), self.host)
+
+    def result(self) -> Tuple[Tuple[int, ...], Optional[str], int]:
+        match = self.match
+        winner = match.winner.side if match.winner is not None else None
+        return tuple(paddle.score for paddle in match.paddles), winner, match.counter
+
+    def reconcile(self, data: bytes, dt: float) -> None:
+        _, _, applied_seq, echo_time, self.remote_input = STATE_HEADER.unpack_from(data)
+
+        if echo_time:
+            sample = perf_counter() - echo_time
+            self.rtt = sample if self.rtt is None else self.rtt + (sample - self.rtt) * self.RTT_SMOOTHING
+
+        while self.pending and self.pending[0][0] <= applied_seq:
+            self.pending.popleft()
+
+        self.match.unpack_from(data, STATE_HEADER.size)
+        self.host_result = self.result()
+        for _, command in self.pending:
+            self.match.step(dt, [self.remote_input, command])
+
+    def step(self, dt: float, inputs: Sequence[int]) -> List[SimEvent]:
+        """The local player uses the keys of either paddle."""
+        latest = self.handle_packets()
+        if not self.connected:
+            self.send_hello()
+            return []
+
+        local_input = inputs[0] | inputs[1]
+        self.seq += 1
+        self.history.append(local_input)
+        self.pending.append((self.seq, local_input))
+        self.send(INPUT_PACKET.pack(INPUT, self.seq, perf_counter(), pack_history(self.history)), self.host)
+
+        # Prediction: only the hits are played at once, the score and the countdown are the host ones.
+        match = self.match
+        events = [event for event in match.step(dt, [self.remote_input, local_input]) if event[0] == BALL_HIT]
+        if latest is None:
+            return events
+
+        scores, winner, counter = self.host_result
+        predicted = (match.paddles[1].y, match.ball.x, match.ball.y)
+
+        self.reconcile(latest, dt)
+
+        if abs(match.paddles[1].y - predicted[0]) > self.CORRECTION \
+                or hypot(match.ball.x - predicted[1], match.ball.y - predicted[2]) > self.CORRECTION:
+            self.corrections += 1
+
+        host_scores, host_winner, host_counter = self.host_result
+        for paddle, score, host_score in zip(match.paddles, scores, host_scores):
+            if host_score > score:
+                events.append((POINT_SCORED, paddle.side))
+        if host_winner is not None and winner is None:
+            events.append((MATCH_WON, host_winner))
+        if host_counter != counter:
+            events.append((COUNTER_CHANGED, None))
+
+        self.log_stats()
+        return events
+
+    def reset(self) -> None:
+        """The host restarts the match."""
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'rtt ms': self.rtt * 1000 if self.rtt is not None else float(0),
+            'corrections': self.corrections,
+            'states': self.states,
+            'dropped': self.link.dropped,
+        }
+
+    def close(self) -> None:
+        NetPeer.close(self, self.host if self.connected else None)
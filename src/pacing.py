@@ -0,0 +1,147 @@
+import logging
+from time import perf_counter, process_time, sleep
+from typing import Callable, Dict, Optional
+
+from src.const.settings import PACING
+
+logger = logging.getLogger(__name__)
+
+PLAY = 'play'
+IDLE = 'idle'
+SUSPENDED = 'suspended'
+
+
+class ModeStats:
+    """Frames, wall time, CPU time and squared frame time error spent in a pacing mode."""
+    def __init__(self) -> None:
+        self.frames = int(0)
+        self.wall = float(0)
+        self.cpu = float(0)
+        self.error_sq = float(0)
+
+    def add(self, wall: float, cpu: float, target: float) -> None:
+        self.frames += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.error_sq += (wall - target) ** 2
+
+    @property
+    def cpu_usage(self) -> float:
+        """Percent of one core."""
+        return self.cpu / self.wall * 100 if self.wall else float(0)
+
+    @property
+    def jitter(self) -> float:
+        """Root mean square of the frame time error, in ms."""
+        return (self.error_sq / self.frames) ** 0.5 * 1000 if self.frames else float(0)
+
+
+class FramePacer:
+    """
+    End each frame at the frame rate of the current mode:
+        play: sleep until SPIN seconds before the deadline then busy wait, the deadlines follow each other
+            so the frame time does not drift.
+        idle: menu or win screen without any input for IDLE_DELAY seconds, plain sleep at IDLE_FPS.
+        suspended: window minimized or not focused, plain sleep at SUSPENDED_FPS, nothing is rendered.
+    """
+    PLAY_FPS = PACING['play_fps']
+    IDLE_FPS = PACING['idle_fps']
+    SUSPENDED_FPS = PACING['suspended_fps']
+    IDLE_DELAY = PACING['idle_delay']
+    SPIN = PACING['spin']
+    POLL = PACING['poll']
+
+    def __init__(self, poll: Optional[Callable[[], None]] = None) -> None:
+        """poll: called every POLL seconds while waiting in play, to timestamp the inputs as they arrive."""
+        self.mode = PLAY
+        self.focused = bool(True)
+        self.minimized = bool(False)
+        self.poll = poll
+
+        self.stats = {mode: ModeStats() for mode in (PLAY, IDLE, SUSPENDED)}
+        self.start()
+
+    def start(self) -> None:
+        """The first frame starts now, the time before it is not measured."""
+        self.deadline = perf_counter()
+        self.last_activity = self.deadline
+        self.frame_start = self.deadline
+        self.frame_cpu = process_time()
+
+    def activity(self) -> None:
+        """An input: back to the play rate at once."""
+        self.last_activity = perf_counter()
+        if self.mode == IDLE:
+            self.mode = PLAY
+
+    def set_focus(self, focused: bool) -> None:
+        self.focused = focused
+        self.activity()
+
+    def set_minimized(self, minimized: bool) -> None:
+        self.minimized = minimized
+        self.activity()
+
+    def update_mode(self, idle_allowed: bool, suspend_allowed: bool = True) -> str:
+        """
+        idle_allowed: nothing moves on the screen without an input, like the menu.
+        suspend_allowed: False to keep running unfocused, like a network game.
+        """
+        if suspend_allowed and (self.minimized or not self.focused):
+            mode = SUSPENDED
+        elif idle_allowed and perf_counter() - self.last_activity >= self.IDLE_DELAY:
+            mode = IDLE
+        else:
+            mode = PLAY
+
+        if mode != self.mode:
+            logger.debug("Frame pacing %s", mode)
+            self.mode = mode
+        return mode
+
+    def target(self) -> float:
+        if self.mode == PLAY:
+            return 1 / self.PLAY_FPS
+        return 1 / (self.IDLE_FPS if self.mode == IDLE else self.SUSPENDED_FPS)
+
+    def wait(self) -> None:
+        """Wait for the end of the frame, then start the next one."""
+        target = self.target()
+        self.deadline += target
+        now = perf_counter()
+
+        # Late by a whole frame: start again from now rather than run the missed frames at once.
+        if self.deadline < now - target:
+            self.deadline = now
+
+        remaining = self.deadline - now
+        if self.mode == PLAY and self.poll is not None:
+            while now < self.deadline:
+                self.poll()
+                now = perf_counter()
+                if self.deadline - now > self.SPIN:
+                    sleep(min(self.POLL, self.deadline - now - self.SPIN))
+                    now = perf_counter()
+        elif self.mode == PLAY:
+            if remaining > self.SPIN:
+                sleep(remaining - self.SPIN)
+            while perf_counter() < self.deadline:
+                pass
+        elif remaining > 0:
+            sleep(remaining)
+
+        end = perf_counter()
+        cpu = process_time()
+        self.stats[self.mode].add(end - self.frame_start, cpu - self.frame_cpu, target)
+        self.frame_start = end
+        self.frame_cpu = cpu
+
+    def counters(self) -> Dict[str, float]:
+        stats = self.stats[self.mode]
+        return {f"{self.mode} cpu %": round(stats.cpu_usage, 1), f"{self.mode} jitter ms": round(stats.jitter, 3)}
+
+    def report(self) -> str:
+        return ', '.join(
+            f"{mode} {stats.frames} frames {stats.cpu_usage:.1f}% cpu {stats.jitter:.3f} ms jitter"
+            for mode, stats in self.stats.items() if stats.frames
+        )
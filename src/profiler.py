@@ -0,0 +1,137 @@
+import csv
+from array import array
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from pygame import Surface, Rect
+from pygame.font import Font
+
+from src.const.settings import PROFILER, FONT_CLR, BG_CLR
+from src.ui.display import new_surface
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    """Nearest rank percentile of sorted values."""
+    if not values:
+        return float(0)
+    return values[min(len(values) - 1, int(ratio * len(values)))]
+
+
+class FrameProfiler:
+    """
+    Time the phases of each frame into a fixed-size ring buffer.
+    Call mark(phase) at the end of each phase, in PHASES order, then end_frame().
+    """
+    PHASES = ('events', 'physics', 'render', 'crs', 'flip', 'wait')
+    COLUMNS = PHASES + ('frame',)
+    REFRESH = PROFILER['overlay_refresh']
+    POS = PROFILER['overlay_pos']
+
+    FONT: Font
+
+    def __init__(self, size: int = PROFILER['frames']) -> None:
+        self.size = size
+        self.index = {phase: column for column, phase in enumerate(self.COLUMNS)}
+        self.current = array('d', bytes(8 * len(self.COLUMNS)))
+        self.samples = array('d', bytes(8 * len(self.COLUMNS) * size))
+        self.frames = int(0)
+
+        self.counters: Dict[str, float] = {}
+
+        self.show_overlay = bool(False)
+        self.overlay: Optional[Surface] = None
+        self.overlay_time = float(0)
+
+        self.last = perf_counter()
+        self.frame_start = self.last
+
+    @property
+    def filled(self) -> int:
+        return min(self.frames, self.size)
+
+    def begin_frame(self) -> None:
+        self.last = perf_counter()
+        self.frame_start = self.last
+        for column in range(len(self.COLUMNS)):
+            self.current[column] = 0
+
+    def mark(self, phase: str) -> None:
+        """Add the time since the last mark to phase."""
+        now = perf_counter()
+        self.current[self.index[phase]] += now - self.last
+        self.last = now
+
+    def end_frame(self) -> None:
+        self.current[-1] = self.last - self.frame_start
+
+        row = (self.frames % self.size) * len(self.COLUMNS)
+        self.samples[row:row + len(self.COLUMNS)] = self.current
+        self.frames += 1
+
+    def set_counters(self, counters: Dict[str, float]) -> None:
+        """Values of the last frame shown under the timings, like a ball count."""
+        self.counters = counters
+
+    def column(self, name: str) -> List[float]:
+        column = self.index[name]
+        width = len(self.COLUMNS)
+        return [self.samples[row * width + column] for row in range(self.filled)]
+
+    def percentiles(self) -> Dict[str, Tuple[float, float]]:
+        """(p50, p99) in ms of every phase and of the whole frame."""
+        stats = {}
+        for name in self.COLUMNS:
+            values = sorted(self.column(name))
+            stats[name] = (percentile(values, 0.5) * 1000, percentile(values, 0.99) * 1000)
+        return stats
+
+    def toggle_overlay(self) -> None:
+        self.show_overlay = not self.show_overlay
+        self.overlay_time = float(0)
+
+    def update_overlay(self) -> None:
+        """Render the percentiles again, REFRESH times per second at most."""
+        now = perf_counter()
+        if self.overlay is not None and now - self.overlay_time < self.REFRESH:
+            return
+        self.overlay_time = now
+
+        # The numbers change every refresh: rendered directly, not through the shared text cache.
+        rows = [('ms', 'p50', 'p99')]
+        rows.extend((name, f"{p50:.2f}", f"{p99:.2f}") for name, (p50, p99) in self.percentiles().items())
+        rows.extend((name, f"{value:g}", '') for name, value in self.counters.items())
+        cells = [[self.FONT.render(text, True, FONT_CLR) for text in row] for row in rows]
+
+        gap = self.FONT.size(' ')[0] * 2
+        widths = [max(row[column].get_width() for row in cells) for column in range(3)]
+        line_height = self.FONT.get_linesize()
+
+        self.overlay = new_surface((sum(widths) + gap * 2, line_height * len(cells)))
+        self.overlay.fill(BG_CLR)
+        for line, row in enumerate(cells):
+            x = int(0)
+            for column, cell in enumerate(row):
+                # Name on the left, numbers aligned on the right.
+                offset = 0 if column == 0 else widths[column] - cell.get_width()
+                self.overlay.blit(cell, (x + offset, line * line_height))
+                x += widths[column] + gap
+
+    def render(self, display_surf: Surface) -> Optional[Rect]:
+        """Draw the overlay if shown, return its rect."""
+        if not self.show_overlay:
+            return None
+
+        self.update_overlay()
+        return display_surf.blit(self.overlay, self.POS)
+
+    def dump_csv(self, file_path: str) -> None:
+        """Write the buffered frames, oldest first, in seconds."""
+        width = len(self.COLUMNS)
+        first = self.frames % self.size if self.frames > self.size else 0
+
+        with open(file_path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.COLUMNS)
+            for offset in range(self.filled):
+                row = ((first + offset) % self.size) * width
+                writer.writerow(self.samples[row:row + width])
@@ -0,0 +1,81 @@
+"""
+Explicit pygame subsystems initialization, nothing is started at import.
+Import this module first to time the whole startup.
+"""
+from time import perf_counter
+from typing import List, Tuple
+
+START_TIME = perf_counter()
+
+import pygame as pg
+
+from src.const.settings import AUDIO, GAME_NAME
+
+
+class StartupTimer:
+    """Time the startup phases since this module was imported."""
+    def __init__(self) -> None:
+        self.last = START_TIME
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        """End the current phase."""
+        now = perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def total(self) -> float:
+        return self.last - START_TIME
+
+    def report(self) -> str:
+        lines = [f"{phase:<12}{duration * 1000:8.1f} ms" for phase, duration in self.phases]
+        lines.append(f"{'total':<12}{self.total() * 1000:8.1f} ms")
+        return '\n'.join(lines)
+
+
+STARTUP = StartupTimer()
+audio_unavailable = bool(False)
+
+
+def init_video() -> None:
+    if not pg.display.get_init():
+        pg.display.init()
+        pg.display.set_caption(GAME_NAME)
+
+
+def init_joysticks() -> None:
+    """The connected joysticks are announced by JOYDEVICEADDED events."""
+    if not pg.joystick.get_init():
+        pg.joystick.init()
+
+
+def init_fonts() -> None:
+    if not pg.font.get_init():
+        pg.font.init()
+
+
+def init_audio(buffer: int = AUDIO['buffer']) -> bool:
+    """Start the audio device, called by the first sound needed. Return False if there is no audio."""
+    global audio_unavailable
+
+    if pg.mixer.get_init():
+        return True
+    if audio_unavailable:
+        return False
+
+    try:
+        pg.mixer.init(AUDIO['frequency'], AUDIO['size'], AUDIO['channels'], buffer)
+    except pg.error:
+        audio_unavailable = bool(True)
+        return False
+
+    return True
+
+
+def quit_all() -> None:
+    if pg.mixer.get_init():
+        pg.mixer.stop()
+        pg.mixer.quit()
+
+    pg.display.quit()
+    pg.quit()
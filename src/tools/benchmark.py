@@ -0,0 +1,206 @@
+"""
+Headless benchmark of the game loop, the physics and the rendering, with SDL dummy drivers.
+    python -m src.tools.benchmark [scenario ...] [--frames N] [--output FILE] [--compare FILE]
+"""
+import os
+
+# Before any pygame subsystem starts.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import json
+import platform
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+import pygame as pg
+
+from src.const.settings import CRS_EFFECT, FPS, RENDERER
+from src.core.multiball import MultiBallMatch
+from src.core.simulation import Match, INPUT_UP, INPUT_DOWN
+from src.game import CrazyPong
+from src.profiler import percentile
+
+FRAME_DT = 1 / FPS
+DEAD_ZONE = 10
+
+# Frame durations and the mean of the level counters.
+ScenarioResult = Tuple[List[float], Dict[str, float]]
+
+
+def follow_ball(match: Match) -> List[int]:
+    """Scripted players: move toward the ball to keep the rally going."""
+    inputs = []
+    for paddle in match.paddles:
+        if isinstance(match, MultiBallMatch):
+            # Toward the middle of the balls of its half.
+            half = match.x < match.CENTER_X if paddle.side == 'left' else match.x >= match.CENTER_X
+            dist = match.y[half].mean() - paddle.y if half.any() else 0
+        else:
+            dist = match.ball.y - paddle.y
+
+        if dist < -DEAD_ZONE:
+            inputs.append(INPUT_UP)
+        elif dist > DEAD_ZONE:
+            inputs.append(INPUT_DOWN)
+        else:
+            inputs.append(0)
+    return inputs
+
+
+def skip_counter(match: Match) -> None:
+    match.counter_time = Match.COUNTER_STEP * Match.COUNTER_START
+
+
+def run_frames(game: CrazyPong, frames: int, scripted: bool) -> ScenarioResult:
+    """Time game.render for each frame, at a fixed frame time and without waiting."""
+    durations = []
+    counters: Dict[str, float] = {}
+    for _ in range(frames):
+        start = perf_counter()
+        steps = game.timestep.advance(FRAME_DT)
+        game.render(steps, follow_ball(game.level.match) if scripted else None)
+        durations.append(perf_counter() - start)
+
+        for name, value in game.profiler.counters.items():
+            counters[name] = counters.get(name, 0) + value / frames
+    return durations, counters
+
+
+def menu_idle(game: CrazyPong, frames: int) -> ScenarioResult:
+    return run_frames(game, frames, False)
+
+
+def rally(level_type: str) -> Callable[[CrazyPong, int], ScenarioResult]:
+    def scenario(game: CrazyPong, frames: int) -> ScenarioResult:
+        game.set_game_type(level_type)
+        skip_counter(game.level.match)
+        result = run_frames(game, frames, True)
+        game.quit_current_game(False)
+        return result
+    return scenario
+
+
+def win_screen(game: CrazyPong, frames: int) -> ScenarioResult:
+    game.set_game_type('oneplayer')
+    match = game.level.match
+    match.winner = match.paddles[1]
+    match.ball.reset(True)
+    game.level.create_win_text()
+
+    result = run_frames(game, frames, True)
+    game.quit_current_game(False)
+    return result
+
+
+def physics(game: CrazyPong, frames: int) -> ScenarioResult:
+    """Headless Match steps only, one step per frame."""
+    match = Match('twoplayer', Random(0))
+    match.start()
+
+    durations = []
+    for _ in range(frames):
+        start = perf_counter()
+        match.step(FRAME_DT, follow_ball(match))
+        durations.append(perf_counter() - start)
+
+        if match.winned:
+            match.reset()
+    return durations, {}
+
+
+SCENARIOS: Dict[str, Callable[[CrazyPong, int], ScenarioResult]] = {
+    'menu_idle': menu_idle,
+    'oneplayer_rally': rally('oneplayer'),
+    'twoplayer_rally': rally('twoplayer'),
+    'crazy_rally': rally('crazy'),
+    'win_screen': win_screen,
+    'physics': physics,
+}
+
+
+def summarize(durations: List[float], counters: Dict[str, float]) -> Dict[str, float]:
+    """Frame time stats, and the per frame mean of the level counters."""
+    values = sorted(durations)
+    total = sum(values)
+    stats = {
+        'frames': len(values),
+        'fps': len(values) / total if total else float(0),
+        'mean_ms': total / len(values) * 1000,
+        'p50_ms': percentile(values, 0.5) * 1000,
+        'p90_ms': percentile(values, 0.9) * 1000,
+        'p99_ms': percentile(values, 0.99) * 1000,
+        'max_ms': values[-1] * 1000,
+    }
+    stats.update((f"{name.replace(' ', '_')}_mean", value) for name, value in counters.items())
+    return stats
+
+
+def run(names: List[str], frames: int) -> Dict:
+    game = CrazyPong()
+    game.load()
+
+    results = {}
+    for name in names:
+        game.set_state('menu')
+        results[name] = summarize(*SCENARIOS[name](game, frames))
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pg.version.ver,
+            'sdl': '.'.join(str(part) for part in pg.get_sdl_version()),
+            'platform': platform.platform(),
+            'video_driver': os.environ['SDL_VIDEODRIVER'],
+            'crs_mode': CRS_EFFECT['mode'],
+            'dirty_rects': RENDERER['dirty_rects'],
+        },
+        'scenarios': results,
+    }
+
+
+def print_results(report: Dict, previous: Dict = None) -> None:
+    print(f"{'scenario':<18}{'fps':>10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}" + (f"{'vs old':>9}" if previous else ''))
+
+    for name, stats in report['scenarios'].items():
+        line = f"{name:<18}{stats['fps']:10.0f}{stats['p50_ms']:9.3f}{stats['p99_ms']:9.3f}{stats['max_ms']:9.3f}"
+
+        old = previous['scenarios'].get(name) if previous else None
+        if old:
+            line += f"{(stats['fps'] / old['fps'] - 1) * 100:+8.1f}%"
+        print(line)
+
+        counters = [f"{key[:-5].replace('_', ' ')} {value:.0f}" for key, value in stats.items() if key.endswith('_mean')]
+        if counters:
+            print(' ' * 18 + ', '.join(counters))
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Headless benchmark of Crazy Pong.")
+    parser.add_argument('scenarios', nargs='*', metavar='scenario', help=f"{', '.join(SCENARIOS)}, all if none given")
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--output', metavar='FILE', help="save the results as JSON")
+    parser.add_argument('--compare', metavar='FILE', help="JSON results of a previous run")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    report = run(args.scenarios or list(SCENARIOS), args.frames)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+    print_results(report, previous)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Input to flip latency of the game loop, with SDL dummy drivers: a thread presses and releases the left
+paddle up key at random times, each key event carries its send time, the game measures until the flip.
+The thread needs the GIL to send: the events arrive while the game sleeps, not while it renders.
+    python -m src.tools.input_latency [--seconds S] [--level oneplayer|twoplayer|crazy] [--dirty-rects]
+"""
+import os
+
+# Before any pygame subsystem starts.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import threading
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+
+import pygame as pg
+
+from src.const.settings import INPUT, RENDERER
+from src.game import CrazyPong
+
+
+class KeyPresser:
+    """Toggle the left paddle up key every 30 to 120 ms from a thread, like a player."""
+    def __init__(self, seed: int, delay: float = 0.5) -> None:
+        self.rng = Random(seed)
+        self.sent = int(0)
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.press_keys, daemon=True)
+        # Started once the game is running.
+        self.timer = threading.Timer(delay, self.thread.start)
+
+    def press_keys(self) -> None:
+        key = pg.key.key_code(INPUT['bindings']['left']['up'])
+        while not self.stop.wait(self.rng.uniform(0.03, 0.12)):
+            event_type = pg.KEYDOWN if self.sent % 2 == 0 else pg.KEYUP
+            try:
+                pg.event.post(pg.event.Event(event_type, key=key, time=perf_counter()))
+            except pg.error:
+                # The video system is gone.
+                return
+            self.sent += 1
+
+    def start(self) -> None:
+        self.timer.start()
+
+    def close(self) -> None:
+        self.timer.cancel()
+        self.stop.set()
+        for thread in (self.timer, self.thread):
+            if thread.ident is not None:
+                thread.join()
+
+
+class LatencyGame(CrazyPong):
+    """Start in a level instead of the menu, the keys are pressed until the game quits."""
+    def __init__(self, level_type: str, presser: KeyPresser) -> None:
+        CrazyPong.__init__(self, input_latency=True)
+        self.level_type = level_type
+        self.presser = presser
+
+    def load(self) -> None:
+        CrazyPong.load(self)
+        self.set_game_type(self.level_type)
+
+    def quit(self) -> None:
+        # No event posted once pygame is shut down.
+        self.presser.close()
+        CrazyPong.quit(self)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Measure the input to flip latency of Crazy Pong headless.")
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--level', choices=('oneplayer', 'twoplayer', 'crazy'), default='twoplayer')
+    parser.add_argument('--dirty-rects', action='store_true', help="push only the changed regions")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    RENDERER['dirty_rects'] = args.dirty_rects
+    presser = KeyPresser(args.seed)
+    game = LatencyGame(args.level, presser)
+
+    # Stopped by the QUIT event.
+    pg.time.set_timer(pg.QUIT, int(args.seconds * 1000), 1)
+    presser.start()
+
+    try:
+        game.run()
+    except SystemExit:
+        pass
+    presser.close()
+
+    print(f"{args.level}, {presser.sent} key events sent in {args.seconds:g} s")
+    print(f"input to flip: {game.controls.report() or 'no input measured'}")
+    print(f"frame pacing: {game.pacer.report()}")
+
+
+if __name__ == '__main__':
+    main()
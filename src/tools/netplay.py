@@ -0,0 +1,68 @@
+"""
+Headless network peer with a scripted paddle, to try the network mode with two processes on localhost.
+    python -m src.tools.netplay host [--port PORT] [--seconds S] [--latency MS] [--jitter MS] [--loss RATIO]
+    python -m src.tools.netplay client [--address ADDRESS] [--port PORT] ...
+"""
+import logging
+from argparse import ArgumentParser
+from time import perf_counter, sleep
+
+from src.const.settings import NET
+from src.core.simulation import INPUT_UP, INPUT_DOWN
+from src.core.timestep import FixedStep
+from src.net.session import LossyLink, NetHost, NetClient, NetPeer
+
+DEAD_ZONE = 10
+
+
+def scripted_input(net: NetPeer, side: int) -> int:
+    """Follow the ball, as seen by this peer."""
+    match = net.match
+    dist = match.ball.y - match.paddles[side].y
+    if dist < -DEAD_ZONE:
+        return INPUT_UP
+    if dist > DEAD_ZONE:
+        return INPUT_DOWN
+    return 0
+
+
+def run(net: NetPeer, side: int, seconds: float) -> None:
+    """Step in real time, at the fixed physics step."""
+    timestep = FixedStep()
+    net.open()
+    net.match.start()
+
+    start = last = perf_counter()
+    while last - start < seconds:
+        now = perf_counter()
+        for _ in range(timestep.advance(now - last)):
+            command = scripted_input(net, side)
+            net.step(timestep.STEP, [command, 0])
+        last = now
+        sleep(timestep.STEP / 4)
+
+    net.close()
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Headless Crazy Pong network peer.")
+    parser.add_argument('role', choices=('host', 'client'))
+    parser.add_argument('--address', default='127.0.0.1', help="host address, for the client")
+    parser.add_argument('--port', type=int, default=NET['port'])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--latency', type=float, default=0, metavar='MS', help="delay the sent packets, one way")
+    parser.add_argument('--jitter', type=float, default=0, metavar='MS')
+    parser.add_argument('--loss', type=float, default=0, metavar='RATIO')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(name)s: %(message)s')
+    link = LossyLink(args.latency / 1000, args.jitter / 1000, args.loss)
+
+    if args.role == 'host':
+        run(NetHost(args.port, link), 0, args.seconds)
+    else:
+        run(NetClient((args.address, args.port), link), 1, args.seconds)
+
+
+if __name__ == '__main__':
+    main()
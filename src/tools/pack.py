@@ -0,0 +1,38 @@
+"""
+Build the asset pack of the fonts, sounds and images, read by the built games instead of the loose files.
+    python -m src.tools.pack [--output FILE]
+Ship the pack next to the executable of a one-file build: it is mapped in place, not extracted.
+"""
+from argparse import ArgumentParser
+from os import makedirs, path
+from time import perf_counter
+
+from src.asset_pack import AssetPack, build
+from src.const.settings import ASSETS
+from src.utils import ASSETS_DIR, MAIN_PATH
+
+SUB_DIRS = ('fonts', 'sounds', 'graphics')
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Pack the Crazy Pong assets into one file.")
+    parser.add_argument('--output', default=path.join(MAIN_PATH, 'dist', ASSETS['pack']), metavar='FILE')
+    args = parser.parse_args()
+
+    makedirs(path.dirname(path.abspath(args.output)), exist_ok=True)
+    sizes = build(ASSETS_DIR, SUB_DIRS, args.output)
+    for name, size in sizes.items():
+        print(f"{name:<32} {size:>9} B")
+
+    # Read it back like the game does.
+    start = perf_counter()
+    pack = AssetPack(args.output)
+    for name, size in sizes.items():
+        if len(pack.view(name)) != size:
+            raise ValueError(f"{name} is {len(pack.view(name))} B in the pack instead of {size} B")
+    print(f"{len(sizes)} assets, {path.getsize(args.output)} B written to {args.output}, "
+          f"mapped in {(perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Play a replay file headless at maximum speed, or stop at a step to inspect the match state.
+    python -m src.tools.replay FILE [--seek STEP]
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+from src.core.replay import Replay, ReplayPlayer
+
+
+def print_state(player: ReplayPlayer) -> None:
+    match = player.match
+    ball = match.ball
+    print(f"step {player.frame}: score {match.paddles[0].score}-{match.paddles[1].score}, counter {match.counter}")
+    print(f"  ball x {ball.x:.3f} y {ball.y:.3f} dir ({ball.dir_x:.5f}, {ball.dir_y:.5f}) "
+          f"velocity {ball.velocity} active {ball.active}")
+    for paddle in match.paddles:
+        print(f"  paddle {paddle.side} y {paddle.y:.3f}")
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Play a Crazy Pong replay headless.")
+    parser.add_argument('file')
+    parser.add_argument('--seek', type=int, metavar='STEP', help="stop before this step and print the match state")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.file)
+    player = ReplayPlayer(replay)
+    print(f"{replay.level_type}, seed {replay.seed}, {len(replay)} steps "
+          f"({len(replay) * replay.step:.0f} s), {len(replay.resets)} resets")
+
+    start = perf_counter()
+    if args.seek is not None:
+        player.seek(args.seek)
+    else:
+        hits = player.run_headless()
+        print(f"{hits} ball hits")
+    print(f"played in {perf_counter() - start:.3f} s")
+
+    print_state(player)
+
+
+if __name__ == '__main__':
+    main()
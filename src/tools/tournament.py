@@ -0,0 +1,217 @@
+"""
+Headless AI tournament: round-robin or Swiss between AI strategies, first to PADDLE['max_score'],
+the games spread over all the CPU cores.
+    python -m src.tools.tournament [strategy ...] [--format round-robin|swiss] [--games N] [--rounds N]
+                                   [--workers N] [--seed N] [--output FILE]
+"""
+import json
+import os
+from argparse import ArgumentParser
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from random import Random
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.const.settings import PHYSICS
+from src.core.simulation import Match, BALL_HIT, POINT_SCORED
+from src.core.strategies import STRATEGIES, load_strategy
+from src.profiler import percentile
+
+STEP = PHYSICS['step']
+MAX_SECONDS = 600 # Simulated seconds before a game is a draw.
+ELO_START = 1500
+ELO_K = 16
+
+# Left strategy, right strategy, seed, max steps.
+GameTask = Tuple[str, str, int, int]
+
+
+def play_game(task: GameTask) -> Dict:
+    """One match at maximum speed. winner: 0 left, 1 right, None for a draw. rallies: paddle hits of each point."""
+    left, right, seed, max_steps = task
+    match = Match('twoplayer', Random(seed))
+    controllers = [load_strategy(name)(paddle, match.rng) for name, paddle in zip((left, right), match.paddles)]
+    match.start()
+
+    rallies = []
+    hits = int(0)
+    steps = int(0)
+    while not match.winned and steps < max_steps:
+        inputs = [controller.command(match.ball, STEP) for controller in controllers]
+        for kind, value in match.step(STEP, inputs):
+            if kind == BALL_HIT and value == 'paddle':
+                hits += 1
+            elif kind == POINT_SCORED:
+                rallies.append(hits)
+                hits = 0
+        steps += 1
+
+    return {
+        'players': [left, right],
+        'seed': seed,
+        'winner': match.paddles.index(match.winner) if match.winned else None,
+        'score': [paddle.score for paddle in match.paddles],
+        'rallies': rallies,
+        'seconds': steps * STEP,
+    }
+
+
+class Tournament:
+    """Standings and Elo ratings, updated game after game in the order the games were scheduled."""
+    def __init__(self, players: Sequence[str], executor: ProcessPoolExecutor, workers: int,
+                 seed: int, max_steps: int) -> None:
+        self.players = list(players)
+        self.executor = executor
+        self.workers = workers
+        self.rng = Random(seed)
+        self.max_steps = max_steps
+
+        self.elo = {name: float(ELO_START) for name in players}
+        self.points = {name: float(0) for name in players}
+        self.record = {name: Counter() for name in players}
+        self.rallies = {name: [] for name in players}
+        self.met = {name: set() for name in players}
+        self.games: List[Dict] = []
+
+    def tasks(self, pairs: Sequence[Tuple[str, str]], games: int) -> List[GameTask]:
+        """games per pair, the sides swapped every game."""
+        tasks = []
+        for first, second in pairs:
+            for game in range(games):
+                left, right = (first, second) if game % 2 == 0 else (second, first)
+                tasks.append((left, right, self.rng.getrandbits(32), self.max_steps))
+        return tasks
+
+    def play(self, pairs: Sequence[Tuple[str, str]], games: int) -> None:
+        tasks = self.tasks(pairs, games)
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        for result in self.executor.map(play_game, tasks, chunksize=chunksize):
+            self.add_result(result)
+
+        for first, second in pairs:
+            self.met[first].add(second)
+            self.met[second].add(first)
+
+    def add_result(self, result: Dict) -> None:
+        self.games.append(result)
+        left, right = result['players']
+
+        # Game points of the left player.
+        score = 0.5 if result['winner'] is None else float(result['winner'] == 0)
+        expected = 1 / (1 + 10 ** ((self.elo[right] - self.elo[left]) / 400))
+        self.elo[left] += ELO_K * (score - expected)
+        self.elo[right] -= ELO_K * (score - expected)
+
+        self.points[left] += score
+        self.points[right] += 1 - score
+        for name, points in ((left, score), (right, 1 - score)):
+            self.record[name]['wins' if points == 1 else 'losses' if points == 0 else 'draws'] += 1
+            self.rallies[name].extend(result['rallies'])
+
+    def round_robin(self, games: int) -> None:
+        self.play(list(combinations(self.players, 2)), games)
+
+    def swiss_pairs(self) -> Tuple[List[Tuple[str, str]], Optional[str]]:
+        """Players sorted by points then Elo, each paired with the next one it has not met yet if any."""
+        standings = sorted(self.players, key=lambda name: (self.points[name], self.elo[name]), reverse=True)
+        bye = standings.pop() if len(standings) % 2 else None
+
+        pairs = []
+        while standings:
+            first = standings.pop(0)
+            second = next((name for name in standings if name not in self.met[first]), standings[0])
+            standings.remove(second)
+            pairs.append((first, second))
+        return pairs, bye
+
+    def swiss(self, rounds: int, games: int) -> None:
+        for _ in range(rounds):
+            pairs, bye = self.swiss_pairs()
+            if bye is not None:
+                # A won game worth of points, no rating change.
+                self.points[bye] += games
+            self.play(pairs, games)
+
+    def report(self) -> Dict:
+        players = {}
+        for name in sorted(self.players, key=lambda name: self.elo[name], reverse=True):
+            record = self.record[name]
+            played = sum(record.values())
+            rallies = sorted(self.rallies[name])
+            players[name] = {
+                'elo': round(self.elo[name], 1),
+                'points': self.points[name],
+                'games': played,
+                'wins': record['wins'],
+                'draws': record['draws'],
+                'losses': record['losses'],
+                'win_rate': record['wins'] / played if played else float(0),
+                'rally_mean': sum(rallies) / len(rallies) if rallies else float(0),
+                'rally_p50': int(percentile(rallies, 0.5)),
+                'rally_p90': int(percentile(rallies, 0.9)),
+                'rally_max': rallies[-1] if rallies else 0,
+            }
+
+        # Distribution of the paddle hits per point over the whole tournament.
+        rallies = Counter(hits for game in self.games for hits in game['rallies'])
+        return {
+            'players': players,
+            'rally_lengths': {str(hits): rallies[hits] for hits in sorted(rallies)},
+            'games': self.games,
+        }
+
+
+def print_report(report: Dict) -> None:
+    print(f"{'strategy':<20}{'elo':>8}{'points':>8}{'W-D-L':>12}{'win %':>8}{'rally p50':>11}{'p90':>6}{'max':>6}")
+    for name, stats in report['players'].items():
+        record = f"{stats['wins']}-{stats['draws']}-{stats['losses']}"
+        print(f"{name:<20}{stats['elo']:8.0f}{stats['points']:8.1f}{record:>12}{stats['win_rate'] * 100:8.1f}"
+              f"{stats['rally_p50']:11}{stats['rally_p90']:6}{stats['rally_max']:6}")
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Headless AI tournament of Crazy Pong.")
+    parser.add_argument('strategies', nargs='*', metavar='strategy',
+                        help=f"{', '.join(STRATEGIES)} or package.module:factory, all of them if none given")
+    parser.add_argument('--format', choices=('round-robin', 'swiss'), default='round-robin')
+    parser.add_argument('--games', type=int, default=10, help="games per pairing, the sides swapped every game")
+    parser.add_argument('--rounds', type=int, default=5, help="Swiss rounds")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-seconds', type=float, default=MAX_SECONDS, help="simulated seconds before a draw")
+    parser.add_argument('--output', metavar='FILE', help="save the ratings, rallies and games as JSON")
+    args = parser.parse_args()
+
+    players = args.strategies or list(STRATEGIES)
+    if len(set(players)) != len(players) or len(players) < 2:
+        parser.error("at least two different strategies are needed")
+    for name in players:
+        try:
+            load_strategy(name)
+        except (ValueError, ImportError, AttributeError) as error:
+            parser.error(str(error))
+
+    start = perf_counter()
+    with ProcessPoolExecutor(args.workers) as executor:
+        tournament = Tournament(players, executor, args.workers, args.seed, int(args.max_seconds / STEP))
+        if args.format == 'swiss':
+            tournament.swiss(args.rounds, args.games)
+        else:
+            tournament.round_robin(args.games)
+    elapsed = perf_counter() - start
+
+    report = tournament.report()
+    simulated = sum(game['seconds'] for game in report['games'])
+    print(f"{len(report['games'])} games, {simulated / 60:.0f} simulated minutes in {elapsed:.1f} s "
+          f"on {args.workers} workers")
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
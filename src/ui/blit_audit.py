@@ -0,0 +1,118 @@
+import logging
+import sys
+from collections import Counter
+from os import path
+from typing import Dict, Iterable, List, Tuple
+
+import pygame as pg
+from pygame import Surface, Rect
+
+from .display import Display
+
+logger = logging.getLogger(__name__)
+
+PYGAME_DIR = path.dirname(pg.__file__)
+MAIN_PATH = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+
+# Call site, source format, target format.
+BlitKey = Tuple[str, str, str]
+
+
+def pixel_format(surface: Surface) -> str:
+    """Like 'ARGB32': the channels from the most significant bits, then the bits per pixel."""
+    masks = surface.get_masks()
+    channels = sorted(((mask, channel) for mask, channel in zip(masks, 'RGBA') if mask), reverse=True)
+    return ''.join(channel for _, channel in channels) + str(surface.get_bitsize())
+
+
+def converted(source: Surface, target: Surface) -> bool:
+    """The pixels of source must be converted to be blitted on target. An alpha channel is blended, not converted."""
+    return source.get_bitsize() != target.get_bitsize() or source.get_masks()[:3] != target.get_masks()[:3]
+
+
+def call_site() -> str:
+    """First frame out of this module and of pygame, like the Group.draw of a level."""
+    frame = sys._getframe(1)
+    while frame is not None and (frame.f_code.co_filename == __file__ or frame.f_code.co_filename.startswith(PYGAME_DIR)):
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    return f"{path.relpath(frame.f_code.co_filename, MAIN_PATH)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class BlitAudit:
+    """Count the blits converting the source pixels, by call site and formats. Each new one is logged."""
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+        self.frame_count = int(0)
+
+    def check(self, source: Surface, target: Surface) -> None:
+        if not converted(source, target):
+            return
+
+        key = (call_site(), pixel_format(source), pixel_format(target))
+        if key not in self.counts:
+            logger.warning("Slow blit at %s: %s on %s", *key)
+        self.counts[key] += 1
+        self.frame_count += 1
+
+    def begin_frame(self) -> None:
+        self.frame_count = 0
+
+    def stats(self) -> Dict[str, float]:
+        return {'slow blits': self.frame_count}
+
+    def report(self) -> List[str]:
+        return [f"{count:>8} {site}: {source} on {target}" for (site, source, target), count in self.counts.most_common()]
+
+
+class AuditSurface(Surface):
+    """A frame surface checking the format of every source blitted on it."""
+    audit: BlitAudit
+
+    def blit(self, source: Surface, *args, **kwargs) -> Rect:
+        self.audit.check(source, self)
+        return Surface.blit(self, source, *args, **kwargs)
+
+    def blits(self, blit_sequence: Iterable, *args, **kwargs):
+        blit_sequence = list(blit_sequence)
+        for item in blit_sequence:
+            self.audit.check(item[0], self)
+        return Surface.blits(self, blit_sequence, *args, **kwargs)
+
+    def fblits(self, blit_sequence: Iterable, *args, **kwargs) -> None:
+        blit_sequence = list(blit_sequence)
+        for item in blit_sequence:
+            self.audit.check(item[0], self)
+        Surface.fblits(self, blit_sequence, *args, **kwargs)
+
+
+def audited(surface: Surface, audit: BlitAudit) -> AuditSurface:
+    """Copy of surface, same format, auditing the blits drawn on it."""
+    copy = AuditSurface(surface.get_size(), surface.get_flags() & pg.SRCALPHA, surface)
+    Surface.blit(copy, surface, (0, 0))
+    copy.audit = audit
+    return copy
+
+
+class AuditDisplay:
+    """
+    Debug wrapper of a display: the frame is drawn on an audited surface of the display format,
+    copied to the display surface before each flip or update.
+    """
+    def __init__(self, display: Display, audit: BlitAudit) -> None:
+        self.display = display
+        self.audit = audit
+        self.surface = audited(display.surface, audit)
+
+    def flip(self) -> None:
+        self.display.surface.blit(self.surface, (0, 0))
+        self.display.flip()
+
+    def update(self, rects: List[Rect]) -> None:
+        for rect in rects:
+            self.display.surface.blit(self.surface, rect, rect)
+        self.display.update(rects)
+
+    def mouse_pos(self) -> Tuple[int, int]:
+        return self.display.mouse_pos()
@@ -1,14 +1,29 @@
-from typing import Tuple, Dict, List
+from __future__ import annotations
+from time import perf_counter
+from typing import TYPE_CHECKING, Tuple, Dict, List
+
+if TYPE_CHECKING:
+    from src.events import EventDispatcher
 
 from pygame.locals import SYSTEM_CURSOR_HAND, SYSTEM_CURSOR_ARROW
-from pygame import Surface, Rect, draw, time, mouse, event
+from pygame import Surface, Rect, draw, mouse
 from pygame.font import Font
 from pygame.mixer import Sound
 
+from src.const.custom_typing import ColorValue
 from src.const.settings import BUTTON_ANIMATE, BTN_CLICKED
+from .display import new_surface
+from .text_cache import SHARED_TEXT_CACHE
+
+# Hovered, top rect and bottom rect: the look of a button.
+StateKey = Tuple[bool, Tuple[int, int, int, int], Tuple[int, int, int, int]]
 
 
 class ButtonAnimate:
+    """
+    Each look of the button (normal, hovered, pressed) is drawn once on a transparent surface, a frame blits it.
+    The hover is updated by check_hover on mouse motion, not by render.
+    """
     TXT_OFFSET = BUTTON_ANIMATE['text_offset']
     BORDER_RADIUS = BUTTON_ANIMATE['border_radius']
     BORDER_SIZE = BUTTON_ANIMATE['border_size']
@@ -16,6 +31,8 @@ class ButtonAnimate:
 
     FONT: Font
     CLICK_SOUND: Sound
+    DISPATCHER: EventDispatcher
+    THEME = int(0) # Changed by set_theme, the drawn looks of every button are outdated.
 
     def __init__(self, data: Dict[str, str], pos: Tuple[int, int], elevation: int = 5) -> None:
         self.pressed = bool(False)
@@ -23,12 +40,30 @@ class ButtonAnimate:
         self.click_time = None
 
         self.data = data
-
+        self.pos = pos
         self.elevation = elevation
+
+        self.states: Dict[StateKey, Surface] = {}
+        self.theme = self.THEME
+        self.set_label(data['text'])
+
+    @classmethod
+    def set_theme(cls, colors: Dict[str, ColorValue]) -> None:
+        """Colors of every button, a key of BUTTON_ANIMATE['colors'] by color."""
+        cls.COLORS = {**cls.COLORS, **colors}
+        cls.THEME += 1
+
+    def set_label(self, text: str) -> None:
+        """Layout the button around its text, back to its initial elevation."""
+        pos = self.pos
+        elevation = self.elevation
+        self.data = {**self.data, 'text': text}
+        self.states.clear()
+
         self.dynamic_elevation = elevation
         self.original_y_pos = pos[1]
 
-        self.text_surf = self.FONT.render(data['text'], True, self.COLORS['font'])
+        self.text_surf = SHARED_TEXT_CACHE.render(self.FONT, text, self.COLORS['font'])
         self.text_rect = self.text_surf.get_rect(center=(pos[0], (pos[1] - elevation) + self.TXT_OFFSET))
 
         self.top_rect = Rect(
@@ -38,7 +73,7 @@ class ButtonAnimate:
             self.text_rect.height + BUTTON_ANIMATE['height_gap']
         )
         self.top_rect.center = (pos[0], self.original_y_pos - elevation)
-        self.top_rect_color = self.COLORS['top_color']
+        self.top_rect_color = self.COLORS['top_color_hover' if self.hovered else 'top_color']
 
         self.bottom_rect = Rect(pos[0], pos[1], self.top_rect.width, self.top_rect.height + elevation)
         self.bottom_rect.center = pos
@@ -57,7 +92,7 @@ class ButtonAnimate:
         
         self.pressed = not self.pressed
         self.change_elevation(0)
-        self.click_time = time.get_ticks()
+        self.click_time = perf_counter()
         self.CLICK_SOUND.play()
 
     def check_hover(self, mouse_pos: Tuple[int, int]) -> None:
@@ -74,30 +109,50 @@ class ButtonAnimate:
             self.hovered = not self.hovered
 
     def check_click(self) -> None:
+        """End the click animation, then emit BTN_CLICKED: handled before this frame is rendered."""
         if self.click_time is None: return
         
-        clicked_time = time.get_ticks() - self.click_time
+        clicked_time = perf_counter() - self.click_time
 
-        if clicked_time >= 125 and self.dynamic_elevation == 0:
+        if clicked_time >= 0.125 and self.dynamic_elevation == 0:
             self.change_elevation(self.elevation)
 
-        if clicked_time >= 200:
-            event.post(event.Event(BTN_CLICKED, self.data))
+        if clicked_time >= 0.2:
+            self.DISPATCHER.emit(BTN_CLICKED, self.data)
             self.pressed = bool(False)
             self.click_time = None
     
-    def render(self, display_surf: Surface, mouse_pos: Tuple[int, int]) -> None:
-        self.check_hover(mouse_pos)
-        self.check_click()
+    def get_rect(self) -> Rect:
+        """Area covered by the button."""
+        return self.bottom_rect.union(self.top_rect)
+
+    def draw_state(self, area: Rect) -> Surface:
+        """The current look of the button, area is get_rect()."""
+        surf = new_surface(area.size, alpha=True)
+        bottom_rect = self.bottom_rect.move(-area.x, -area.y)
+        top_rect = self.top_rect.move(-area.x, -area.y)
 
         # Background.
-        draw.rect(display_surf, self.COLORS['bg_color'], self.bottom_rect, border_radius=self.BORDER_RADIUS)
+        draw.rect(surf, self.COLORS['bg_color'], bottom_rect, border_radius=self.BORDER_RADIUS)
         # Top.
-        draw.rect(display_surf, self.top_rect_color, self.top_rect, border_radius=self.BORDER_RADIUS)
+        draw.rect(surf, self.top_rect_color, top_rect, border_radius=self.BORDER_RADIUS)
         # Border.
-        draw.rect(display_surf, self.COLORS['bg_color'], self.top_rect, border_radius=self.BORDER_RADIUS, width=self.BORDER_SIZE)
-
-        display_surf.blit(self.text_surf, self.text_rect)
+        draw.rect(surf, self.COLORS['bg_color'], top_rect, border_radius=self.BORDER_RADIUS, width=self.BORDER_SIZE)
+
+        surf.blit(self.text_surf, self.text_rect.move(-area.x, -area.y))
+        return surf
+
+    def render(self, display_surf: Surface) -> None:
+        if self.theme != self.THEME:
+            self.theme = self.THEME
+            self.set_label(self.data['text'])
+
+        area = self.get_rect()
+        key = (self.hovered, tuple(self.top_rect), tuple(self.bottom_rect))
+        surf = self.states.get(key)
+        if surf is None:
+            surf = self.states[key] = self.draw_state(area)
+        display_surf.blit(surf, area)
 
 
 ButtonList = List[ButtonAnimate]
\ No newline at end of file
@@ -0,0 +1,79 @@
+from typing import List, Optional
+
+from pygame import Surface, Rect
+
+from src.const.settings import SCREEN_RECT
+from .display import Display
+from .screen_effect import CRS
+
+
+def merge_rects(rects: List[Rect]) -> List[Rect]:
+    """Clip the rects to the screen and merge the overlapping ones, the CRS must not be blitted twice on a pixel."""
+    merged: List[Rect] = []
+
+    for rect in rects:
+        rect = rect.clip(SCREEN_RECT)
+        if not rect.width or not rect.height:
+            continue
+
+        # Absorb every merged rect touching this one, until none is left.
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+
+        merged.append(rect)
+
+    return merged
+
+
+class DirtyRenderer:
+    """
+    Draw the frame on an offscreen scene and push only the changed regions to the display.
+    The rects of the previous frame are erased with the background, the rects of both frames are pushed.
+    """
+    def __init__(self, background: Surface, crs: CRS, display: Display) -> None:
+        self.background = background
+        self.crs = crs
+        self.display = display
+        self.scene = background.copy()
+
+        self.previous_rects: List[Rect] = []
+        self.pending_rects: Optional[List[Rect]] = None
+        self.full_update = bool(True)
+
+    def invalidate(self) -> None:
+        """Redraw and flip the whole screen on the next frame."""
+        self.full_update = bool(True)
+
+    def begin(self) -> Surface:
+        """Erase the previous frame and return the surface to draw on."""
+        if self.full_update:
+            self.scene.blit(self.background, (0, 0))
+        else:
+            for rect in self.previous_rects:
+                self.scene.blit(self.background, rect, rect)
+
+        return self.scene
+
+    def compose(self, display_surf: Surface, rects: List[Rect]) -> None:
+        """Copy the scene with the CRS effect, rects are the regions drawn by the moving objects."""
+        if self.full_update:
+            display_surf.blit(self.scene, (0, 0))
+            self.crs.render_area(display_surf, SCREEN_RECT)
+            self.pending_rects = None
+        else:
+            self.pending_rects = merge_rects(self.previous_rects + rects)
+            for rect in self.pending_rects:
+                display_surf.blit(self.scene, rect, rect)
+                self.crs.render_area(display_surf, rect)
+
+        self.previous_rects = [rect.copy() for rect in rects]
+
+    def flip(self) -> None:
+        """Push the composed regions, or the whole screen after invalidate."""
+        if self.pending_rects is None:
+            self.display.flip()
+            self.full_update = bool(False)
+        else:
+            self.display.update(self.pending_rects)
@@ -0,0 +1,94 @@
+import logging
+import os
+from typing import List, Tuple, Union
+
+from pygame import Surface, Rect, SRCALPHA, display, mouse
+from pygame._sdl2.video import Window, Renderer, Texture
+from pygame._sdl2.sdl2 import error as SDLError
+
+from src.const.settings import GAME_NAME, RENDERER, SCREEN_RECT
+
+logger = logging.getLogger(__name__)
+
+
+def convert(surface: Surface, alpha: bool = False) -> Surface:
+    """
+    convert / convert_alpha to the display format. The texture backend has no display mode:
+    the 32 bits formats of the frame are used instead.
+    """
+    if display.get_surface() is not None:
+        return surface.convert_alpha() if alpha else surface.convert()
+    return surface.convert(Surface((1, 1), SRCALPHA if alpha else 0, 32))
+
+
+def new_surface(size: Tuple[int, int], alpha: bool = False) -> Surface:
+    """Blank surface in the display format, blitted without pixel conversion. alpha: transparent, per pixel alpha."""
+    return convert(Surface(size, SRCALPHA if alpha else 0), alpha)
+
+
+class SurfaceDisplay:
+    """The display.set_mode window at SCREEN_RECT size, the frame is drawn on the window surface."""
+
+    def __init__(self) -> None:
+        self.surface = display.set_mode(SCREEN_RECT.size)
+
+    def flip(self) -> None:
+        display.flip()
+
+    def update(self, rects: List[Rect]) -> None:
+        display.update(rects)
+
+    def mouse_pos(self) -> Tuple[int, int]:
+        return mouse.get_pos()
+
+
+class TextureDisplay:
+    """
+    pygame._sdl2.video window of any size or fullscreen. The frame is drawn at SCREEN_RECT size on an
+    offscreen Surface like the surface backend, then copied to a streaming texture (only the updated rects)
+    which the renderer scales to the window, letterboxed. The CPU never touches the window size pixels
+    with a GPU renderer, the SDL software renderer is used if there is none.
+    """
+
+    def __init__(self, size: Tuple[int, int] = RENDERER['window_size'], fullscreen: bool = RENDERER['fullscreen']) -> None:
+        # Read by SDL when the texture is created.
+        os.environ.setdefault('SDL_RENDER_SCALE_QUALITY', RENDERER['scale_quality'])
+
+        self.window = Window(GAME_NAME, size, resizable=True)
+        if fullscreen:
+            self.window.set_fullscreen(True)
+
+        try:
+            self.renderer = Renderer(self.window, accelerated=1)
+            self.accelerated = bool(True)
+        except SDLError:
+            self.renderer = Renderer(self.window, accelerated=0)
+            self.accelerated = bool(False)
+        logger.info("Texture backend, %s renderer", 'GPU' if self.accelerated else 'software')
+
+        self.renderer.logical_size = SCREEN_RECT.size
+        self.surface = Surface(SCREEN_RECT.size, 0, 32)
+        self.texture = Texture(self.renderer, SCREEN_RECT.size, streaming=True)
+
+    def present(self) -> None:
+        self.renderer.clear()
+        self.texture.draw()
+        self.renderer.present()
+
+    def flip(self) -> None:
+        self.texture.update(self.surface)
+        self.present()
+
+    def update(self, rects: List[Rect]) -> None:
+        """The whole texture is drawn again, the back buffer is not kept between two frames."""
+        for rect in rects:
+            self.texture.update(self.surface.subsurface(rect), rect)
+        self.present()
+
+    def mouse_pos(self) -> Tuple[int, int]:
+        """In the frame coordinates."""
+        x, y = self.renderer.coordinates_from_window(mouse.get_pos())
+        return int(x), int(y)
+
+
+Display = Union[SurfaceDisplay, TextureDisplay]
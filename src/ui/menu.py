@@ -1,5 +1,5 @@
 from typing import List
-from pygame import Surface, mouse
+from pygame import Surface, Rect
 
 from src.const.custom_typing import FontsDict
 from src.const.settings import STARTING_MENU
@@ -27,10 +27,16 @@ class StartingMenu:
                 button.click()
                 break
 
+    def check_clicks(self) -> None:
+        for button in self.buttons:
+            button.check_click()
+
+    def dirty_rects(self) -> List[Rect]:
+        return [button.get_rect() for button in self.buttons]
+
     def render(self, display_surf: Surface) -> None:
         for text in self.texts:
             display_surf.blit(text.surf, text.rect)
 
-        mouse_pos = mouse.get_pos()
         for button in self.buttons:
-            button.render(display_surf, mouse_pos)
\ No newline at end of file
+            button.render(display_surf)
\ No newline at end of file
@@ -1,29 +1,124 @@
-from pygame import Surface, draw, transform
+from time import perf_counter
+from typing import Dict, List
+
+from pygame import Surface, Rect, draw, transform
+from pygame.locals import BLEND_RGBA_MULT, BLEND_PREMULTIPLIED, RLEACCEL
 from src.const.settings import CRS_EFFECT
-from random import randint
+from .display import convert
+from random import randint, shuffle
 
 
 class CRS:
-    """Simule a cathode ray screen"""
-    def __init__(self, vignette: Surface) -> None:
+    """
+    Simule a cathode ray screen
+        mode: 'full' alpha blend the vignette at a random alpha every frame.
+              'baked' cycle through vignettes pre-multiplied at load for the alpha range.
+              'scanline' only the lines, without per-pixel alpha.
+    """
+    MODES = ('full', 'baked', 'scanline')
+    LINES_COLORKEY = (255, 0, 255)
+
+    def __init__(self, vignette: Surface, mode: str = CRS_EFFECT['mode']) -> None:
+        self.mode = mode
         self.min_alpha = CRS_EFFECT['min_alpha']
         self.max_alpha = CRS_EFFECT['max_alpha']
+        self.steady_alpha = (self.min_alpha + self.max_alpha) // 2
         self.vignette = transform.scale(vignette, CRS_EFFECT['size'])
+        self.draw_lines(self.vignette)
+
+        if mode == 'baked':
+            self.frames = self.bake_frames()
+            self.steady_frame = self.frames[len(self.frames) // 2]
+            self.order = list(range(len(self.frames)))
+            shuffle(self.order)
+            self.frame_index = int(0)
+        elif mode == 'scanline':
+            self.lines = self.create_lines()
 
+    def draw_lines(self, surf: Surface) -> None:
         line_gap = CRS_EFFECT['line_gap']
         line_amount = CRS_EFFECT['size'][1] // line_gap
 
         for line in range(line_amount):
             y = line * line_gap
             draw.line(
-                self.vignette,
+                surf,
                 CRS_EFFECT['line_color'],
                 (0, y),
                 (CRS_EFFECT['size'][0], y),
                 1
             )
-    
+
+    def bake_frames(self) -> List[Surface]:
+        """One pre-multiplied vignette in the display format for each flicker alpha, sorted by alpha."""
+        frames = []
+        amount = max(1, CRS_EFFECT['variants'])
+
+        for index in range(amount):
+            alpha = self.min_alpha + round((self.max_alpha - self.min_alpha) * index / max(1, amount - 1))
+
+            frame = self.vignette.copy()
+            frame.fill((255, 255, 255, alpha), special_flags=BLEND_RGBA_MULT)
+            frames.append(convert(frame, True).premul_alpha())
+
+        return frames
+
+    def create_lines(self) -> Surface:
+        """Opaque lines with a colorkey, blitted with a surface alpha only."""
+        lines = Surface(CRS_EFFECT['size'])
+        lines.fill(self.LINES_COLORKEY)
+        self.draw_lines(lines)
+        lines = convert(lines)
+        lines.set_colorkey(self.LINES_COLORKEY, RLEACCEL)
+        lines.set_alpha(self.steady_alpha, RLEACCEL)
+        return lines
+
     def render(self, display_surf: Surface) -> None:
-        self.vignette.set_alpha(randint(self.min_alpha, self.max_alpha))
-        display_surf.blit(self.vignette, (0, 0))
-        
\ No newline at end of file
+        if self.mode == 'baked':
+            self.frame_index = (self.frame_index + 1) % len(self.order)
+            display_surf.blit(self.frames[self.order[self.frame_index]], (0, 0), special_flags=BLEND_PREMULTIPLIED)
+        elif self.mode == 'scanline':
+            self.lines.set_alpha(randint(self.min_alpha, self.max_alpha), RLEACCEL)
+            display_surf.blit(self.lines, (0, 0))
+        else:
+            self.vignette.set_alpha(randint(self.min_alpha, self.max_alpha))
+            display_surf.blit(self.vignette, (0, 0))
+
+    def render_area(self, display_surf: Surface, rect: Rect) -> None:
+        """Render only a part of the effect, without flicker so the parts stay the same."""
+        if self.mode == 'baked':
+            display_surf.blit(self.steady_frame, rect, rect, special_flags=BLEND_PREMULTIPLIED)
+        elif self.mode == 'scanline':
+            self.lines.set_alpha(self.steady_alpha, RLEACCEL)
+            display_surf.blit(self.lines, rect, rect)
+        else:
+            self.vignette.set_alpha(self.steady_alpha)
+            display_surf.blit(self.vignette, rect, rect)
+
+
+def measure_modes(vignette: Surface, display_surf: Surface, frames: int = 120) -> Dict[str, float]:
+    """Average cost in ms of CRS.render on display_surf for each mode."""
+    costs = {}
+
+    for mode in CRS.MODES:
+        crs = CRS(vignette, mode)
+        crs.render(display_surf)
+
+        start = perf_counter()
+        for _ in range(frames):
+            crs.render(display_surf)
+        costs[mode] = (perf_counter() - start) * 1000 / frames
+
+    return costs
+
+
+if __name__ == '__main__':
+    from pygame import display, init
+    from src.const.settings import SCREEN_RECT
+    from src.utils import load_img
+
+    init()
+    display_surf = display.set_mode(SCREEN_RECT.size)
+
+    for mode, cost in measure_modes(load_img(CRS_EFFECT['file'], convert_a=True), display_surf).items():
+        print(f"{mode:<10}{cost:.3f} ms/frame")
@@ -0,0 +1,129 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from pygame import Surface
+from pygame.locals import BLEND_RGBA_MAX
+from pygame.font import Font
+
+from src.const.custom_typing import ColorValue
+from src.const.settings import TEXT_CACHE
+from .display import convert, new_surface
+
+# A Font object is created for one family and size, so it stands for both in the keys.
+TextKey = Tuple[Font, str, Tuple[int, ...], bool]
+AtlasKey = Tuple[Font, Tuple[int, ...], bool]
+# Numbers joined from the atlas digits, without the kerning of Font.render: not the same surface as the text.
+NumberKey = Tuple[str, Font, int, Tuple[int, ...], bool]
+CacheKey = Union[TextKey, NumberKey]
+
+
+class TextCache:
+    """
+    Shared cache of rendered texts with LRU eviction, bounded in entries and pixel bytes.
+    The returned surfaces are shared: blit them, never draw on them. They are in the display format.
+    """
+    def __init__(self, max_entries: int = TEXT_CACHE['max_entries'], max_bytes: int = TEXT_CACHE['max_bytes']) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.entries: 'OrderedDict[CacheKey, Surface]' = OrderedDict()
+        self.atlases: Dict[AtlasKey, List[Surface]] = {}
+        self.bytes = int(0)
+
+        self.hits = int(0)
+        self.misses = int(0)
+        self.atlas_hits = int(0)
+        self.evictions = int(0)
+
+    @staticmethod
+    def surface_bytes(surf: Surface) -> int:
+        return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+    def get(self, key: CacheKey) -> Optional[Surface]:
+        surf = self.entries.get(key)
+        if surf is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return surf
+
+    def render(self, font: Font, text: str, color: ColorValue, antialias: bool = True) -> Surface:
+        key = (font, text, tuple(color), antialias)
+
+        surf = self.get(key)
+        if surf is not None:
+            return surf
+
+        self.misses += 1
+        surf = convert(font.render(text, antialias, color), True)
+        self.add(key, surf)
+        return surf
+
+    def add(self, key: CacheKey, surf: Surface) -> None:
+        self.entries[key] = surf
+        self.bytes += self.surface_bytes(surf)
+
+        # Keep at least the new entry, even bigger than max_bytes.
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, old_surf = self.entries.popitem(last=False)
+            self.bytes -= self.surface_bytes(old_surf)
+            self.evictions += 1
+
+    def get_atlas(self, font: Font, color: ColorValue, antialias: bool) -> List[Surface]:
+        key = (font, tuple(color), antialias)
+
+        atlas = self.atlases.get(key)
+        if atlas is None:
+            atlas = [convert(font.render(str(digit), antialias, color), True) for digit in range(10)]
+            self.atlases[key] = atlas
+        return atlas
+
+    def render_number(self, font: Font, value: int, color: ColorValue, antialias: bool = True) -> Surface:
+        """Fast path for scores and counter: digits come from a per font atlas, never evicted."""
+        if not 0 <= value <= 9:
+            if value < 0:
+                return self.render(font, str(value), color, antialias)
+
+            key = ('number', font, value, tuple(color), antialias)
+            surf = self.get(key)
+            if surf is not None:
+                return surf
+
+            # Join the digits of the atlas.
+            self.misses += 1
+            atlas = self.get_atlas(font, color, antialias)
+            digits = [atlas[int(digit)] for digit in str(value)]
+            surf = new_surface((sum(digit.get_width() for digit in digits), max(digit.get_height() for digit in digits)), alpha=True)
+
+            # The digits do not overlap, copy them as they are on the transparent surface.
+            x = int(0)
+            for digit in digits:
+                surf.blit(digit, (x, 0), special_flags=BLEND_RGBA_MAX)
+                x += digit.get_width()
+
+            self.add(key, surf)
+            return surf
+
+        self.atlas_hits += 1
+        return self.get_atlas(font, color, antialias)[value]
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.atlases.clear()
+        self.bytes = int(0)
+
+    def counters(self) -> Dict[str, float]:
+        """Shown by the profiler overlay, since the start."""
+        return {'text hits': self.hits + self.atlas_hits, 'text misses': self.misses}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'atlas_hits': self.atlas_hits,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+        }
+
+
+SHARED_TEXT_CACHE = TextCache()
@@ -1,50 +1,70 @@
 import sys
 from os import path
 from pygame import Surface, font, mixer, image
-from typing import Tuple
+from typing import IO, Optional, Tuple, Union
 
-from .const.settings import BG_CLR, FONT_CLR
+from .asset_pack import AssetPack
+from .const.settings import ASSETS, BG_CLR, FONT_CLR
+from .ui.display import convert, new_surface
+from .ui.text_cache import SHARED_TEXT_CACHE
 
 # Get absolute path to resource, works for dev and for PyInstaller.
 def get_path(tmp_path: str):
-    for exception in ['\\src', '\\_internal']:
+    for exception in [path.sep + 'src', path.sep + '_internal']:
         if exception in tmp_path:
             tmp_path = tmp_path.split(exception)[0]
     return tmp_path
 MAIN_PATH = get_path(getattr(sys, '_MEIPASS', path.dirname(path.abspath(__file__))))
-del sys # Delete sys from memory.
 
-FONTS_DIR = path.join(MAIN_PATH, "assets", "fonts")
-SOUNDS_DIR = path.join(MAIN_PATH, "assets", "sounds")
-GRAPHICS_DIR = path.join(MAIN_PATH, "assets", "graphics")
+# Built games read the asset pack, next to the executable (a one-file build does not extract it) or bundled.
+# The loose files are used in development.
+PACK_PATHS = [
+    path.join(path.dirname(sys.executable), ASSETS['pack']),
+    path.join(MAIN_PATH, ASSETS['pack'])
+] if getattr(sys, 'frozen', False) else []
+del sys # Delete sys from memory.
 
-def load_font(font_name: str, size: int, custom: bool = True):
-    """Load the font from system if custom is False."""
+ASSETS_DIR = path.join(MAIN_PATH, "assets")
+FONTS_DIR = path.join(ASSETS_DIR, "fonts")
+SOUNDS_DIR = path.join(ASSETS_DIR, "sounds")
+GRAPHICS_DIR = path.join(ASSETS_DIR, "graphics")
+ASSET_PACK = AssetPack.find(PACK_PATHS)
+
+def asset_source(*parts: str) -> Union[str, IO[bytes]]:
+    """A file object over the packed asset, or the path of the loose file. parts: 'sounds', 'ball_hit.wav'"""
+    parts = tuple(part for part in parts if part)
+    name = '/'.join(parts)
+    if ASSET_PACK is not None and name in ASSET_PACK:
+        return ASSET_PACK.open(name)
+    return path.join(ASSETS_DIR, *parts)
+
+def load_font(font_name: str, size: int, custom: bool = True, source: Optional[IO[bytes]] = None):
+    """
+    Load the font from system if custom is False.
+        source: File object already read, used instead of the file path.
+    """
     if not custom:
         return font.SysFont(font, size)
     
-    return font.Font(path.join(FONTS_DIR, font_name), size)
+    return font.Font(source if source is not None else asset_source('fonts', font_name), size)
 
-def load_sound(file: str, vol: float = 0.5, sub_dir: str = '') -> mixer.Sound:
+def load_sound(file: str, vol: float = 0.5, sub_dir: str = '', source: Optional[IO[bytes]] = None) -> mixer.Sound:
     """Return NoneSound to avoid errors if pygame mixer is not ready"""
     if not mixer or not mixer.get_init():
         return NoneSound()
 
-    loaded_sound = mixer.Sound(path.join(SOUNDS_DIR, sub_dir, file))
+    loaded_sound = mixer.Sound(source if source is not None else asset_source('sounds', sub_dir, file))
     loaded_sound.set_volume(vol)
     return loaded_sound
 
-def load_img(file: str, sub_dir: str = "", convert_a: bool = False) -> Surface:
+def load_img(file: str, sub_dir: str = "", convert_a: bool = False, source: Optional[IO[bytes]] = None) -> Surface:
     """
     Return a Surface if the file doesn't exist to avoid errors.
         convert_a: Convert with alpha
     """
-    file_path = path.join(GRAPHICS_DIR, sub_dir, file)
+    file_path = source if source is not None else asset_source('graphics', sub_dir, file)
 
-    if convert_a:
-        return image.load(file_path).convert_alpha()
-    
-    return image.load(file_path).convert()
+    return convert(image.load(file_path, file), convert_a)
 
 
 class Text:
@@ -59,8 +79,8 @@ class Text:
         bg: True if you want a bg behind the text.
         """
 
-        txt = font.render(text, True, self.COLOR)
-        self.surf = Surface(txt.get_size())
+        txt = SHARED_TEXT_CACHE.render(font, text, self.COLOR)
+        self.surf = new_surface(txt.get_size())
 
         if bg:
             self.surf.fill(self.BG_COLOR)